@@ -0,0 +1,67 @@
+"""Password hashing throughput per scheme, to size login capacity.
+
+Hashes (registration / password change) and verifications (login) per second with the configured
+costs, in one process and through PasswordHashPool with PASSWORD_HASH_WORKERS processes. argon2 is
+skipped when argon2-cffi isn't installed.
+
+    python -m benchmarks.password_hashing [--schemes bcrypt,argon2] [--seconds 3] [--workers 2]
+"""
+from functools import lru_cache
+from time import perf_counter
+import argparse
+import asyncio
+
+from passlib.exc import MissingBackendError
+
+from src.utils.password_hash import PasswordHashPool, PASSWORD_HASH_WORKERS, build_context, time_hash
+
+
+def throughput(func, seconds: float) -> float:
+    count, start = 0, perf_counter()
+    while perf_counter() - start < seconds:
+        func()
+        count += 1
+    return count / (perf_counter() - start)
+
+@lru_cache
+def scheme_context(scheme: str):
+    return build_context(scheme)
+
+def pool_hash(scheme: str, password: str):
+    # Runs in the pool's processes: CryptContext objects can't be pickled, so each builds its own
+    return scheme_context(scheme).hash(password)
+
+async def pool_throughput(scheme: str, workers: int, seconds: float) -> float:
+    pool = PasswordHashPool(workers=workers, max_queue=workers)
+    count, start = 0, perf_counter()
+    try:
+        async def worker():
+            nonlocal count
+            while perf_counter() - start < seconds:
+                await pool.run(pool_hash, scheme, "benchmark password")
+                count += 1
+        await asyncio.gather(*(worker() for _ in range(workers)))
+    finally:
+        pool.shutdown()
+    return count / (perf_counter() - start)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--schemes", default="bcrypt,argon2")
+    parser.add_argument("--seconds", type=float, default=3)
+    parser.add_argument("--workers", type=int, default=PASSWORD_HASH_WORKERS)
+    args = parser.parse_args()
+
+    print(f"{'scheme':<8} {'ms/hash':>8} {'hash/s':>8} {'verify/s':>9} {f'hash/s x{args.workers}':>12}")
+    for scheme in args.schemes.split(","):
+        context = build_context(scheme)
+        try:
+            password_hash = context.hash("benchmark password")
+        except MissingBackendError:
+            print(f"{scheme:<8} skipped: backend not installed")
+            continue
+        ms = time_hash(context)
+        hashes = throughput(lambda: context.hash("benchmark password"), args.seconds)
+        verifies = throughput(lambda: context.verify("benchmark password", password_hash), args.seconds)
+        pooled = asyncio.run(pool_throughput(scheme, args.workers, args.seconds))
+        print(f"{scheme:<8} {ms:>8.1f} {hashes:>8.1f} {verifies:>9.1f} {pooled:>12.1f}")
@@ -0,0 +1,90 @@
+"""Listing serialization benchmark: FastAPI's default response path vs ORJSONRoute.
+
+Both routers return the same 5k products (ORM rows with images and sizes loaded), so the
+timings only measure validation + encoding of the response.
+
+    python -m benchmarks.serialization [--products 5000] [--rounds 20]
+"""
+from os import environ
+
+environ.setdefault("DB_URL", "sqlite://")
+environ.setdefault("ALLOWED_ORIGINS", "http://127.0.0.1:5173")
+environ.setdefault("JWT_SECRET_KEY", "benchmark")
+environ.setdefault("ALGORITHM", "HS256")
+environ.setdefault("ACCESS_TOKEN_EXPIRE_SEC", "1200")
+
+from fastapi import APIRouter, FastAPI
+from fastapi.routing import APIRoute
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from statistics import median
+from time import perf_counter
+import argparse
+import json
+import orjson
+
+from db_config.db_connection import Base
+from db_config.db_tables import Product, ProductImages, SizesLookup, Category, product_sizes_association
+from src.components.products.repository import PRODUCT_RELATIONS
+from src.components.products.schemas import ProductResponse
+from src.utils.serialization import ORJSONRoute
+
+
+def load_products(count: int) -> list:
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    db.add_all([Category(id="c1", name="Todos"), *[SizesLookup(id=i, size=size) for i, size in enumerate(("xs", "s", "m"), 1)]])
+    db.commit()
+    db.execute(insert(Product), [
+        {"id": f"p{i:05d}", "name": f"Product {i:05d}", "price": i * 1.5, "stock": i % 40, "brand": "Dalana Kids",
+         "description": "Camiseta de algodón para niños", "category_name": "Todos"}
+        for i in range(count)
+    ])
+    db.execute(insert(ProductImages), [
+        {"id": f"i{i:05d}-{n}", "url": f"https://res.cloudinary.com/demo/image/upload/{i}-{n}.jpg", "product_id": f"p{i:05d}"}
+        for i in range(count) for n in range(2)
+    ])
+    db.execute(insert(product_sizes_association), [
+        {"product_id": f"p{i:05d}", "size_id": size_id} for i in range(count) for size_id in (1, 2)
+    ])
+    db.commit()
+    return db.scalars(select(Product).options(*PRODUCT_RELATIONS)).all()
+
+def build_app(products: list) -> FastAPI:
+    app = FastAPI()
+    for prefix, route_class in (("/default", APIRoute), ("/orjson", ORJSONRoute)):
+        router = APIRouter(prefix=prefix, route_class=route_class)
+
+        @router.get("/products")
+        def list_products() -> list[ProductResponse]:
+            return products
+
+        app.include_router(router)
+    return app
+
+def bench(client: TestClient, url: str, rounds: int) -> tuple:
+    client.get(url)
+    timings = []
+    for _ in range(rounds):
+        start = perf_counter()
+        response = client.get(url)
+        timings.append(perf_counter() - start)
+    return median(timings) * 1000, response.content
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--products", type=int, default=5000)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    client = TestClient(build_app(load_products(args.products)))
+    default_ms, default_body = bench(client, "/default/products", args.rounds)
+    orjson_ms, orjson_body = bench(client, "/orjson/products", args.rounds)
+
+    assert json.loads(default_body) == orjson.loads(orjson_body)
+    print(f"{args.products} products, median of {args.rounds} requests")
+    print(f"  default response path: {default_ms:8.2f} ms")
+    print(f"  ORJSONRoute:           {orjson_ms:8.2f} ms  ({default_ms / orjson_ms:.1f}x faster)")
@@ -0,0 +1,23 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+class AsyncRepository:
+    """Base class for the async repositories.
+
+    Methods without a native async version fall back to the sync repository
+    (`sync_repository`), executed through `AsyncSession.run_sync` so the
+    queries still go through the async driver without blocking the event loop.
+    """
+    sync_repository = None
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    def __getattr__(self, name):
+        method = getattr(self.sync_repository, name, None)
+        if self.sync_repository is None or not callable(method) or name.startswith("_"):
+            raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
+
+        async def run_sync(*args, **kwargs):
+            return await self.db.run_sync(lambda session: getattr(self.sync_repository(session), name)(*args, **kwargs))
+        return run_sync
@@ -0,0 +1,111 @@
+from sqlalchemy import event, insert, select, func
+from sqlalchemy.orm import Session
+from dotenv import load_dotenv
+from os import getenv
+
+from .db_tables import Product, ProductImages, Category, CarouselImage, ChangeLog
+
+load_dotenv()
+
+UPSERT, DELETE = "upsert", "delete"
+TRACKED = {Product: "product", Category: "category", CarouselImage: "carousel"}
+# Resource whose version the writes of each entity change (ETags, response cache)
+RESOURCE_OF = {"product": "products", "category": "categories", "carousel": "carousel"}
+# change_log rows below the newest of each entity that take part in its version; compaction keeps them
+RESOURCE_VERSION_WINDOW = int(getenv("RESOURCE_VERSION_WINDOW", 10000))
+PENDING_CHANGES = "pending_changes"
+COMMITTED_VERSIONS = "committed_versions"
+
+_commit_listeners = []
+_version_listeners = []
+
+def on_commit(listener):
+    """Registers `listener(changes)`, called after each commit with the [(entity, id, operation)] it wrote."""
+    _commit_listeners.append(listener)
+
+def on_versions(listener):
+    """Registers `listener(versions)`, called after each commit with the {resource: version} it changed."""
+    _version_listeners.append(listener)
+
+def _remember(session: Session, changes):
+    session.info.setdefault(PENDING_CHANGES, []).extend(changes)
+
+
+def record_changes(db: Session, entity: str, upserted=(), deleted=()):
+    """Adds change_log rows inside the caller's transaction. Needed by Core / bulk statements,
+    which the flush listener below doesn't see (executemany updates, conditional stock updates...)."""
+    rows = [{"entity": entity, "entity_id": id, "operation": UPSERT} for id in dict.fromkeys(upserted)]
+    rows += [{"entity": entity, "entity_id": id, "operation": DELETE} for id in dict.fromkeys(deleted)]
+    if rows:
+        db.execute(insert(ChangeLog), rows)
+        _remember(db, [(row["entity"], row["entity_id"], row["operation"]) for row in rows])
+
+
+@event.listens_for(Session, "before_flush")
+def track_flushed_changes(session: Session, flush_context, instances):
+    """Logs every ORM write of a tracked row in the same flush. Image changes are logged as an
+    upsert of their product, whose payload includes the images (size changes already dirty the product)."""
+    changes = {}
+    for obj in session.deleted:
+        if type(obj) in TRACKED:
+            changes[(TRACKED[type(obj)], obj.id)] = DELETE
+    for obj in [*session.new, *session.dirty, *session.deleted]:
+        if isinstance(obj, ProductImages):
+            product_id = obj.product_id if obj.product_id is not None else (obj.product.id if obj.product is not None else None)
+            if product_id is not None:
+                changes.setdefault(("product", product_id), UPSERT)
+        elif type(obj) in TRACKED and obj not in session.deleted and (obj in session.new or session.is_modified(obj)):
+            changes.setdefault((TRACKED[type(obj)], obj.id), UPSERT)
+    session.add_all(ChangeLog(entity=entity, entity_id=id, operation=operation) for (entity, id), operation in changes.items())
+    _remember(session, [(entity, id, operation) for (entity, id), operation in changes.items()])
+
+
+def read_versions(db, resources=tuple(RESOURCE_OF.values())) -> dict:
+    """{resource: (newest change_log version, rows in the window below it)} for the given resources.
+
+    The newest version alone misses a transaction that commits a lower version after a higher one was
+    read; that late row still lands in the window and changes the count. Both only ever grow (compaction
+    doesn't touch the window), so versions compare as tuples. Reads the (entity, version) index, no locks.
+    """
+    entities = [entity for entity, resource in RESOURCE_OF.items() if resource in resources]
+    columns = []
+    for entity in entities:
+        latest = select(func.coalesce(func.max(ChangeLog.version), 0)).where(ChangeLog.entity == entity).scalar_subquery()
+        window = select(func.count()).where(ChangeLog.entity == entity, ChangeLog.version > latest - RESOURCE_VERSION_WINDOW).scalar_subquery()
+        columns += [latest, window]
+    if not columns:
+        return {}
+    row = db.execute(select(*columns)).one()
+    return {RESOURCE_OF[entity]: (row[2 * i], row[2 * i + 1]) for i, entity in enumerate(entities)}
+
+
+@event.listens_for(Session, "before_commit")
+def read_committed_versions(session: Session):
+    """Reads the versions of the resources the transaction wrote, as its last statement, so they
+    can be applied right after the commit. Nothing shared is updated, so commits don't contend."""
+    if session.in_nested_transaction():
+        return
+    session.flush()
+    changes = session.info.get(PENDING_CHANGES)
+    if not changes:
+        return
+    session.info[COMMITTED_VERSIONS] = read_versions(session, {RESOURCE_OF[entity] for entity, _, _ in changes})
+
+
+@event.listens_for(Session, "after_commit")
+def notify_committed_changes(session: Session):
+    changes = session.info.pop(PENDING_CHANGES, None)
+    versions = session.info.pop(COMMITTED_VERSIONS, None)
+    if versions:
+        for listener in _version_listeners:
+            listener(versions)
+    if changes:
+        for listener in _commit_listeners:
+            listener(changes)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def discard_rolled_back_changes(session: Session, previous_transaction):
+    if previous_transaction.parent is None:
+        session.info.pop(PENDING_CHANGES, None)
+        session.info.pop(COMMITTED_VERSIONS, None)
@@ -1,14 +1,147 @@
+from fastapi import Depends
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import Session, sessionmaker, declarative_base 
+from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
 from dotenv import load_dotenv
+from inspect import iscoroutinefunction
+from threading import Lock
+from time import perf_counter
 from os import getenv
 
 load_dotenv()
 
 DATABASE_URL = getenv('DB_URL')
 
-engine = create_engine(DATABASE_URL)
+# DB_ASYNC=true serves the repositories through an asyncio engine (asyncpg / aiosqlite)
+DB_ASYNC = getenv('DB_ASYNC', 'false').lower() == 'true'
+
+# Pool settings (only applied to QueuePool backed databases such as Postgres or MySQL)
+DB_POOL_SIZE = int(getenv('DB_POOL_SIZE', 10))
+DB_MAX_OVERFLOW = int(getenv('DB_MAX_OVERFLOW', 20))
+DB_POOL_TIMEOUT = int(getenv('DB_POOL_TIMEOUT', 30))
+DB_POOL_RECYCLE = int(getenv('DB_POOL_RECYCLE', 1800))
+DB_POOL_PRE_PING = getenv('DB_POOL_PRE_PING', 'true').lower() == 'true'
+
+
+class PoolStats:
+    """Counters for connection checkouts and the time spent waiting for a free connection."""
+    def __init__(self):
+        self._lock = Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.total_wait = 0.0
+            self.max_wait = 0.0
+
+    def record_checkout(self, wait: float):
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+    def snapshot(self, pool=None) -> dict:
+        with self._lock:
+            stats = {
+                "checkouts": self.checkouts,
+                "avg_wait_ms": round(self.total_wait / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "max_wait_ms": round(self.max_wait * 1000, 3),
+            }
+        if isinstance(pool, QueuePool):
+            stats.update({
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "overflow": pool.overflow(),
+            })
+        return stats
+
+pool_stats = PoolStats()
+async_pool_stats = PoolStats()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection."""
+    stats = pool_stats
+
+    def _do_get(self):
+        start = perf_counter()
+        connection = super()._do_get()
+        self.stats.record_checkout(perf_counter() - start)
+        return connection
+
+
+class InstrumentedAsyncQueuePool(InstrumentedQueuePool, AsyncAdaptedQueuePool):
+    stats = async_pool_stats
+
+
+def _engine_options(url: str, poolclass=InstrumentedQueuePool) -> dict:
+    if url.startswith("sqlite"):
+        return {"connect_args": {"check_same_thread": False}}
+    return {
+        "poolclass": poolclass,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+engine = create_engine(DATABASE_URL, **_engine_options(DATABASE_URL))
 Base = declarative_base()
 Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-session = Session()
\ No newline at end of file
+
+
+def to_async_url(url: str) -> str:
+    if url.startswith(("postgresql://", "postgres://")):
+        return "postgresql+asyncpg://" + url.split("://", 1)[1]
+    if url.startswith("sqlite://"):
+        return "sqlite+aiosqlite://" + url.split("://", 1)[1]
+    return url
+
+async_engine = None
+AsyncSession = None
+if DB_ASYNC:
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+    ASYNC_DATABASE_URL = to_async_url(DATABASE_URL)
+    async_engine = create_async_engine(ASYNC_DATABASE_URL, **_engine_options(ASYNC_DATABASE_URL, InstrumentedAsyncQueuePool))
+    # expire_on_commit=False: reloading expired attributes would need implicit IO outside the loop
+    AsyncSession = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+def get_db():
+    """Request scoped session: one Session per request, always returned to the pool."""
+    db = Session()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_db():
+    async with AsyncSession() as db:
+        yield db
+
+def repository(sync_repository, async_repository=None):
+    """Dependency that builds the repository matching the configured database mode."""
+    if DB_ASYNC and async_repository is not None:
+        def dependency(db=Depends(get_async_db)):
+            return async_repository(db)
+    else:
+        def dependency(db=Depends(get_db)):
+            return sync_repository(db)
+    return dependency
+
+async def run_db(func, *args, **kwargs):
+    """Await an async repository method, or run a sync one on the threadpool so it never blocks the event loop."""
+    if iscoroutinefunction(func):
+        return await func(*args, **kwargs)
+    return await run_in_threadpool(func, *args, **kwargs)
+
+def get_pool_stats() -> dict:
+    """The sync pool is always open (auth, roles and the importer use it); the async one only with DB_ASYNC."""
+    stats = {"sync": pool_stats.snapshot(engine.pool)}
+    if async_engine is not None:
+        stats["async"] = async_pool_stats.snapshot(async_engine.sync_engine.pool)
+    return stats
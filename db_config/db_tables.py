@@ -1,12 +1,11 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Boolean, Float, Text, Table
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Boolean, Float, Text, Table, Index, DDL, event
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from os import getenv
-from passlib.context import CryptContext
 import uuid
 
-from .db_connection import Base, engine, session
-from .enums import UserRole, ProductSizes
+from .db_connection import Base, engine, Session
+from .enums import UserRole, ProductSizes, ReservationStatus
 
 
 product_sizes_association = Table(
@@ -43,6 +42,61 @@ class Product(Base):
     images = relationship("ProductImages", back_populates="product", cascade="all, delete-orphan")
     sizes = relationship("SizesLookup", secondary=product_sizes_association, back_populates="product")
 
+    # Keyset pagination indexes: one per sort key (price, name, stock, id), globally and per category
+    __table_args__ = (
+        Index("ix_products_price_id", "price", "id"),
+        Index("ix_products_name_id", "name", "id"),
+        Index("ix_products_stock_id", "stock", "id"),
+        Index("ix_products_category_id", "category_name", "id"),
+        Index("ix_products_category_price_id", "category_name", "price", "id"),
+        Index("ix_products_category_name_id", "category_name", "name", "id"),
+        Index("ix_products_category_stock_id", "category_name", "stock", "id"),
+    )
+
+# ----------------------------------------------------------------------------------
+#                  FULL TEXT SEARCH OVER NAME, BRAND AND DESCRIPTION:
+# ----------------------------------------------------------------------------------
+
+# Postgres: expression GIN index. Queries must use the exact same expression to hit it. The text search
+# configuration is 'simple' plus the unaccent dictionary, so "algodon" finds "Algodón" as it does in SQLite.
+PRODUCTS_SEARCH_CONFIG = "products_search"
+PRODUCTS_SEARCH_VECTOR = (
+    f"to_tsvector('{PRODUCTS_SEARCH_CONFIG}', "
+    "coalesce(products.name, '') || ' ' || coalesce(products.brand, '') || ' ' || coalesce(products.description, ''))"
+)
+for statement in (
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    f"DO $$ BEGIN IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = '{PRODUCTS_SEARCH_CONFIG}') THEN "
+    f"CREATE TEXT SEARCH CONFIGURATION {PRODUCTS_SEARCH_CONFIG} (COPY = simple); "
+    f"ALTER TEXT SEARCH CONFIGURATION {PRODUCTS_SEARCH_CONFIG} ALTER MAPPING FOR hword, hword_part, word WITH unaccent, simple; "
+    "END IF; END $$",
+    f"CREATE INDEX IF NOT EXISTS ix_products_search ON products USING gin ({PRODUCTS_SEARCH_VECTOR})",
+):
+    event.listen(Product.__table__, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+
+# SQLite: FTS5 table kept in sync by triggers. products has a TEXT primary key and its implicit rowid
+# may be renumbered by VACUUM, so the index is keyed by products_search_keys, whose INTEGER PRIMARY KEY is stable.
+for statement in (
+    "CREATE TABLE IF NOT EXISTS products_search_keys (id INTEGER PRIMARY KEY, product_id TEXT NOT NULL UNIQUE)",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5("
+    "name, brand, description, tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN "
+    "INSERT INTO products_search_keys(product_id) VALUES (new.id); "
+    "INSERT INTO products_fts(rowid, name, brand, description) "
+    "VALUES ((SELECT id FROM products_search_keys WHERE product_id = new.id), new.name, new.brand, new.description); END",
+    "CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN "
+    "DELETE FROM products_fts WHERE rowid = (SELECT id FROM products_search_keys WHERE product_id = old.id); "
+    "DELETE FROM products_search_keys WHERE product_id = old.id; END",
+    # Only the indexed columns: stock and price writes don't touch the index
+    "CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE OF id, name, brand, description ON products BEGIN "
+    "UPDATE products_search_keys SET product_id = new.id WHERE product_id = old.id; "
+    "UPDATE products_fts SET name = new.name, brand = new.brand, description = new.description "
+    "WHERE rowid = (SELECT id FROM products_search_keys WHERE product_id = new.id); END",
+):
+    event.listen(Product.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+for table in ("products_fts", "products_search_keys"):
+    event.listen(Product.__table__, "after_drop", DDL(f"DROP TABLE IF EXISTS {table}").execute_if(dialect="sqlite"))
+
 class SizesLookup(Base):
     __tablename__ = "product_sizes_lookup"
     id = Column(Integer, primary_key=True, autoincrement=True, unique=True)
@@ -58,6 +112,38 @@ class ProductImages(Base):
 
     product = relationship("Product", back_populates="images")
 
+class StockReservation(Base):
+    """Units held for a checkout. The stock is decremented when the hold is taken and given back on release or expiry."""
+    __tablename__ = "stock_reservations"
+    id = Column(String, primary_key=True, unique=True)
+    product_id = Column(String, ForeignKey("products.id", ondelete="CASCADE"), nullable=False, index=True)
+    user_id = Column(String, ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False)
+    quantity = Column(Integer, nullable=False)
+    status = Column(String(20), nullable=False, default=ReservationStatus.held.value)
+    created_at = Column(DateTime, default=datetime.now)
+    expires_at = Column(DateTime, nullable=False)
+
+    # The sweeper looks up expired holds by (status, expires_at); the per user limit counts by (user_id, status)
+    __table_args__ = (
+        Index("ix_stock_reservations_status_expires_at", "status", "expires_at"),
+        Index("ix_stock_reservations_user_id_status", "user_id", "status"),
+    )
+
+class ChangeLog(Base):
+    """Append only feed of catalog writes; `version` is the monotonic cursor clients sync from (GET /changes)."""
+    __tablename__ = "change_log"
+    version = Column(Integer, primary_key=True, autoincrement=True)
+    entity = Column(String(20), nullable=False)
+    entity_id = Column(String, nullable=False)
+    operation = Column(String(10), nullable=False)
+    changed_at = Column(DateTime, default=datetime.now)
+
+    # The feed and the resource versions filter by entity and version; compaction looks up newer rows of the same record
+    __table_args__ = (
+        Index("ix_change_log_entity_version", "entity", "version"),
+        Index("ix_change_log_entity_entity_id_version", "entity", "entity_id", "version"),
+    )
+
 class UserRolesLookup(Base):
     __tablename__ = "user_roles_lookup"
     id = Column(Integer, primary_key=True, autoincrement=True, unique=True)
@@ -71,6 +157,15 @@ class ResetPasswordToken(Base):
     token = Column(String(255))
     created_at = Column(DateTime)
 
+class RevokedToken(Base):
+    """Access tokens revoked before their expiry (logout), by their jti claim. Rows are pruned once the token expires.
+    `id` is the cursor other processes sync from, assigned by the database so it doesn't depend on any host clock."""
+    __tablename__ = "revoked_tokens"
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    jti = Column(String(64), nullable=False, unique=True)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    revoked_at = Column(DateTime, nullable=False, default=datetime.now, index=True)
+
 class Category(Base):
     __tablename__ = "categories"
     id = Column(String, primary_key=True, unique=True)
@@ -89,6 +184,7 @@ if __name__ == "__main__":
     Base.metadata.drop_all(bind=engine)
     Base.metadata.create_all(bind=engine)
     print("Migrations to database executed correctly in db_tables.py.")
+    session = Session()
 
     # ----------------------------------------------------------------------------------
     #                  INSERTION OF ENUMS DATA INTO LOOKUP TABLES:
@@ -106,14 +202,14 @@ if __name__ == "__main__":
     #                 INSERTION OF ADMIN USER DATA INTO USERS TABLE:
     # ----------------------------------------------------------------------------------
 
-    bcrypt_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    from src.utils.password_hash import get_password_hash
 
     name = getenv("NAME")
     email = getenv("ADMIN_EMAIL")
     role = UserRole.admin.name
 
     admin_user_password = getenv("PASSWORD")
-    admin_user_password_hash = bcrypt_context.hash(admin_user_password)
+    admin_user_password_hash = get_password_hash(admin_user_password)
     admin_user = User(user_id = str(uuid.uuid4()), name=name, email=email, password_hash=admin_user_password_hash, role=role)
     
     session.add(admin_user)
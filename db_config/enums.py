@@ -63,3 +63,9 @@ class ProductSizes (str, pyEnum):
     kid_24x = "24X"
     kid_26 = "26"
     kid_26x = "26X"
+
+class ReservationStatus(str, pyEnum):
+    held = "held"
+    committed = "committed"
+    released = "released"
+    expired = "expired"
@@ -0,0 +1,91 @@
+from os import getenv
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from .db_tables import SizesLookup, Category
+from .enums import ProductSizes
+from src.utils.cache import TTLCache, MISSING
+from src.utils.etag import resource_versions
+
+
+def _load_sizes(db: Session) -> dict:
+    """Size value shown to clients ("XS", "3M") -> (lookup key, id)."""
+    rows = db.execute(select(SizesLookup.size, SizesLookup.id)).all()
+    return {(ProductSizes[key].value if key in ProductSizes.__members__ else key): (key, id) for key, id in rows}
+
+def _load_categories(db: Session) -> dict:
+    return dict(db.execute(select(Category.name, Category.id)).all())
+
+
+class LookupRegistry:
+    """Per process copy of the lookup tables (sizes, categories).
+
+    Loaded once at startup (or on first use) and reloaded only after `invalidate`, which
+    the repositories call when an admin changes one of these tables. Category writes of other
+    processes invalidate it too, when the "categories" resource version changes. Each table is
+    swapped in as a whole, so readers never see a half built map, and a load that started before
+    an invalidation is used once but not kept. Category names still unknown after
+    a reload are remembered for `LOOKUP_MISS_TTL` seconds, so a batch of rows naming a missing
+    category costs one reload instead of one per row.
+    """
+    loaders = {"sizes": _load_sizes, "categories": _load_categories}
+
+    def __init__(self):
+        self._tables = {}
+        self._generation = 0
+        self._category_misses = TTLCache(
+            maxsize=int(getenv("LOOKUP_MISS_SIZE", 1024)),
+            ttl=float(getenv("LOOKUP_MISS_TTL", 5)),
+        )
+
+    def load(self, db: Session, *tables: str):
+        for table in tables or self.loaders:
+            self._load(db, table)
+
+    def _load(self, db: Session, table: str) -> dict:
+        generation = self._generation
+        values = self.loaders[table](db)
+        if generation == self._generation:
+            self._tables[table] = values
+            if table == "categories":
+                self._category_misses.clear()
+        return values
+
+    def invalidate(self, *tables: str):
+        self._generation += 1
+        for table in tables or list(self._tables):
+            self._tables.pop(table, None)
+            if table == "categories":
+                self._category_misses.clear()
+
+    def clear(self):
+        self._generation += 1
+        self._tables = {}
+        self._category_misses.clear()
+
+    def _get(self, db: Session, table: str) -> dict:
+        values = self._tables.get(table)
+        if values is None:
+            values = self._load(db, table)
+        return values
+
+    def sizes(self, db: Session, values) -> list:
+        """(key, id) of every known size in `values`; unknown values are skipped."""
+        sizes = self._get(db, "sizes")
+        return [sizes[value] for value in dict.fromkeys(values or []) if value in sizes]
+
+    def size_id(self, db: Session, value: str):
+        size = self._get(db, "sizes").get(value)
+        return size[1] if size else None
+
+    def category_id(self, db: Session, name: str):
+        """Unknown names reload the categories once, in case another process created it."""
+        category_id = self._get(db, "categories").get(name)
+        if category_id is None and self._category_misses.get(name) is MISSING:
+            category_id = self._load(db, "categories").get(name)
+            if category_id is None:
+                self._category_misses.set(name, None)
+        return category_id
+
+lookups = LookupRegistry()
+resource_versions.subscribe(lambda *resources: "categories" in resources and lookups.invalidate("categories"))
@@ -1,38 +1,91 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.templating import Jinja2Templates
-from fastapi.staticfiles import StaticFiles
 from fastapi.responses import HTMLResponse
 from dotenv import load_dotenv
+from contextlib import asynccontextmanager
 from os import getenv
+import asyncio
 
 from src.components.routes import router
+from src.components.reservations.sweeper import sweep_reservations
+from src.components.changes.compactor import compact_change_log
+from src.components.products.live import live_products
+from db_config.db_connection import Session
+from db_config.lookups import lookups
+from src.utils.response_cache import ResponseCacheMiddleware
+from src.components.images.storage import image_store, MEDIA_URL
+from src.utils.password_hash import password_hasher
+from src.utils.token_revocation import maintain_revocations
+from src.utils.etag import resource_versions, follow_resource_versions
+from src.utils.static_assets import StaticAssets, ImmutableStaticFiles, Asset
 
 load_dotenv()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    try:
+        with Session() as db:
+            lookups.load(db)
+    except Exception as e:
+        print(f"Lookup tables not loaded at startup, they will be loaded on first use: {e}")
+    try:
+        resource_versions.sync()
+    except Exception as e:
+        print(f"Resource versions not loaded at startup: {e}")
+    sweeper = asyncio.create_task(sweep_reservations())
+    revocations = asyncio.create_task(maintain_revocations())
+    compactor = asyncio.create_task(compact_change_log())
+    versions = asyncio.create_task(follow_resource_versions())
+    live_products.start()
+    yield
+    await live_products.stop()
+    sweeper.cancel()
+    revocations.cancel()
+    compactor.cancel()
+    versions.cancel()
+    image_store.shutdown()
+    password_hasher.shutdown()
+
 app = FastAPI(
     title="Products API",
     description="API for managing products",
-    version="0.0.1"
+    version="0.0.1",
+    lifespan=lifespan
 )
 
 ORIGINS = getenv('ALLOWED_ORIGINS').split(",")
 # print(f'Clientes autorizados: {ORIGINS}.\nSi notas que no se actualizan las URL al modificarlas en la variable de entorno ALLOWED_ORIGINS del archivo .env,\ntrata cerrando la consola y abre una diferente para levantar el servidor nuevamente.')
 
 app.include_router(router, prefix="/api/v1")
+# Added before CORS so CORS stays the outer middleware and also decorates cached responses
+app.add_middleware(ResponseCacheMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=ORIGINS,
     allow_credentials=True,
     allow_methods=["*"],
-    allow_headers=["*"]
+    allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "X-Cache"]
 )
-app.mount("/static", StaticFiles(directory="static"), name="static")
+# Read, fingerprinted and precompressed once; see src/utils/static_assets.py
+static_assets = StaticAssets("static", prefix="/static")
+app.mount("/static", static_assets, name="static")
+if MEDIA_URL.startswith("/"):
+    # Uploaded images are served by this app unless MEDIA_URL points to a CDN / another host
+    image_store.root.mkdir(parents=True, exist_ok=True)
+    app.mount(MEDIA_URL, ImmutableStaticFiles(directory=image_store.root), name="media")
 
 jinja2_templates = Jinja2Templates(directory="templates")
+# The docs page has no per request data: render it once and serve it from memory
+docs_page = Asset(
+    jinja2_templates.get_template("api_docs.html").render(static=static_assets.url).encode(),
+    "text/html; charset=utf-8",
+)
 
 @app.get("/", response_class=HTMLResponse, tags=["Docs"])
 def docs_layout(request: Request):
-    return jinja2_templates.TemplateResponse("api_docs.html", {"request": request})
+    return docs_page.response(request.headers.get("accept-encoding"), request.headers.get("if-none-match"))
 
 if __name__ == "__main__":
     import uvicorn
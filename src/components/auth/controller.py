@@ -2,16 +2,21 @@ from fastapi import APIRouter, Depends
 from fastapi.security import OAuth2PasswordRequestForm, OAuth2PasswordBearer
 from pydantic import EmailStr
 from typing import Annotated
+from sqlalchemy.orm import Session
 
 from .service import AuthService
 from .schemas import Register, ResetPasswordReq, ConfirmationCode
 from .repository import AuthRepository
 from src.components.users.repository import UserRepository
-from db_config.db_connection import session
+from db_config.db_connection import get_db
 from src.utils.email_handler import EmailHandler
 from src.utils.jwt_handler import TokenHandler
 
-auth_service = AuthService(session, AuthRepository, UserRepository, EmailHandler, TokenHandler)
+def get_auth_service(db: Session = Depends(get_db)) -> AuthService:
+    return AuthService(db, AuthRepository, UserRepository, EmailHandler, TokenHandler)
+
+Service = Annotated[AuthService, Depends(get_auth_service)]
+
 auth_router = APIRouter(
     prefix="/auth",
     tags=["Auth"])
@@ -19,27 +24,27 @@ auth_router = APIRouter(
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
 @auth_router.post("/register")
-def pre_register(data: Register):
-    return auth_service.pre_register(data)
+async def pre_register(data: Register, auth_service: Service):
+    return await auth_service.pre_register(data)
 
 @auth_router.post("/confirm")
-def confirm_register(request:ConfirmationCode):
+def confirm_register(request:ConfirmationCode, auth_service: Service):
     return auth_service.confirm_register(request.code)
 
 @auth_router.post("/login")
-def login(form_data: Annotated[OAuth2PasswordRequestForm, Depends()]):
-    access_token = auth_service.login(form_data)
+async def login(form_data: Annotated[OAuth2PasswordRequestForm, Depends()], auth_service: Service):
+    access_token = await auth_service.login(form_data)
     return access_token
 
 @auth_router.get("/logout")
-def logout(token: Annotated[str, Depends(oauth2_scheme)]):
-    # TODO: Implement table of revoked tokens to add them to blacklist
+def logout(token: Annotated[str, Depends(oauth2_scheme)], db: Session = Depends(get_db)):
+    TokenHandler.revoke_token(token, db)
     return {"message": "Logout successful"}
 
 @auth_router.post("/forgot_password")
-def forgot_password(email: EmailStr):
+def forgot_password(email: EmailStr, auth_service: Service):
     return auth_service.forgot_password(email)
 
 @auth_router.post("/reset_password")
-def reset_password(reset_password_req: ResetPasswordReq):
-    return auth_service.reset_password(reset_password_req)
\ No newline at end of file
+async def reset_password(reset_password_req: ResetPasswordReq, auth_service: Service):
+    return await auth_service.reset_password(reset_password_req)
\ No newline at end of file
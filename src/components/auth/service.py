@@ -1,13 +1,15 @@
 
 from fastapi import HTTPException
 from fastapi.responses import JSONResponse
+from fastapi.concurrency import run_in_threadpool
 from datetime import datetime, timedelta
 
 from src.components.users.repository import UserRepository
 from src.utils.jwt_handler import TokenHandler
 from db_config.db_tables import User, UserRole, ResetPasswordToken
 import uuid
-from src.utils.password_hash import get_password_hash, verify_password
+from src.utils.password_hash import get_password_hash_async, verify_and_update_async
+from db_config.db_connection import run_db
 from .repository import AuthRepository
 
 class AuthService:
@@ -16,21 +18,24 @@ class AuthService:
         self.user_repository: UserRepository = user_repository(session)
         self.email_handler = email_handler
         self.token_handler: TokenHandler = token_handler
-    def pre_register(self, data):
+    # Hashing runs on the password process pool; database and email calls go to the threadpool
+    async def pre_register(self, data):
+        # Hash first: a 503 from a saturated hash pool must not leave a verification email already sent
+        password_hash = await get_password_hash_async(data.password)
         email_handler = self.email_handler(data.email)
-        email_handler.send_verification_email()
+        await run_in_threadpool(email_handler.send_verification_email)
         try:
             user = User( 
                 user_id = str(uuid.uuid4()),
                 name = data.user_name,
                 email = data.email,
                 role = UserRole.unconfirmed,
-                password_hash = get_password_hash(data.password),
+                password_hash = password_hash,
                 confirmation_code = email_handler.get_verification_code(),
                  )
         except Exception as e:
             raise HTTPException(status_code=400, detail=f"Something went wrong creating register model in service: {e}")
-        return self.auth_repository.create_pre_register(user)
+        return await run_db(self.auth_repository.create_pre_register, user)
 
     def confirm_register(self, confirmation_code:int):
         user = self.user_repository.get_user_by_confirmation_code(confirmation_code)
@@ -42,22 +47,29 @@ class AuthService:
             }
         return self.user_repository.update_user(user.user_id, updates)
 
-    def login(self, form_data):
-        user_db = self.user_repository.get_user_by_email(form_data.username)
+    async def login(self, form_data):
+        user_db = await run_db(self.user_repository.get_user_by_email, form_data.username)
         if not user_db:
             raise HTTPException(status_code=401, detail=f"User {form_data.username} not authenticated")
         if user_db.role != UserRole.admin and user_db.role != UserRole.user:
             raise HTTPException(status_code=403, detail=f"Forbidden: Not authorized in UserService.login()")
-        verified_password = verify_password(form_data.password, user_db.password_hash)
+        verified_password, upgraded_hash = await verify_and_update_async(form_data.password, user_db.password_hash)
         if not verified_password:
             raise HTTPException(status_code=400, detail="Incorrect User or Password")
+        user_data_token = {
+            "user_id": user_db.user_id,
+            "name": user_db.name,
+            "email": user_db.email,
+            "role": user_db.role
+            }
+        if upgraded_hash:
+            # Outdated scheme or cost: rehash now, the only moment the plain password is known.
+            # Best effort: the old hash still works, so a failed write must not fail the login.
+            try:
+                await run_db(self.user_repository.update_user, user_db.user_id, {"password_hash": upgraded_hash})
+            except Exception as e:
+                print(f"Error upgrading password hash of user {user_db.user_id}: {e}")
         try:
-            user_data_token = {
-                "user_id": user_db.user_id,
-                "name": user_db.name,
-                "email": user_db.email,
-                "role": user_db.role
-                }
             return {
                     "access_token": self.token_handler.create_access_token(user_data_token),
                     "token_type": "bearer"
@@ -88,13 +100,13 @@ class AuthService:
         self.auth_repository.save_reset_password_token(reset_password_token)
         return JSONResponse(status_code=200, content={"message": f'Email to "{email}" sent successfully.'})
 
-    def reset_password(self, reset_password_req):
-        reset_password_token_db = self.auth_repository.get_reset_password_token(reset_password_req.token)
+    async def reset_password(self, reset_password_req):
+        reset_password_token_db = await run_db(self.auth_repository.get_reset_password_token, reset_password_req.token)
         if not reset_password_token_db:
             raise HTTPException(status_code=404, detail=f'Reset password token for {reset_password_req.email} not found')
         if reset_password_token_db.created_at < datetime.now() - timedelta(minutes=10):
             raise HTTPException(status_code=404, detail='Reset password token expired')
         
-        update_user = {"password_hash": get_password_hash(reset_password_req.password1)}
-        self.user_repository.update_user(reset_password_token_db.user_id, update_user)
+        update_user = {"password_hash": await get_password_hash_async(reset_password_req.password1)}
+        await run_db(self.user_repository.update_user, reset_password_token_db.user_id, update_user)
         return JSONResponse(status_code=200, content={"message": f'Password reset successfully'})
\ No newline at end of file
@@ -0,0 +1,59 @@
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from sqlalchemy import select, update, delete
+
+from db_config.async_repository import AsyncRepository
+from db_config.change_tracking import record_changes
+from db_config.db_tables import CarouselImage
+from src.components.carousel.schemas import CarouselReq
+from .repository import CarouselRepository
+
+class AsyncCarouselRepository(AsyncRepository):
+    sync_repository = CarouselRepository
+
+    async def get_carousel_imges(self):
+        try:
+            result = await self.db.scalars(select(CarouselImage))
+            return result.all()
+        except Exception as e:
+            await self.db.rollback()
+            raise HTTPException(status_code=500, detail=f"Error getting carousel: {e}")
+
+    async def get_carousel_image(self, id):
+        try:
+            return await self.db.get(CarouselImage, id)
+        except Exception as e:
+            await self.db.rollback()
+            raise HTTPException(status_code=500, detail=f"Error gettin carousel image: {e}")
+
+    async def create_carousel_image(self, data):
+        try:
+            self.db.add(data)
+            await self.db.commit()
+            return data
+        except Exception as e:
+            await self.db.rollback()
+            raise HTTPException(status_code=500, detail=f"Error creating carousel image: {e}")
+
+    async def update_carousel_image(self, data: CarouselReq):
+        try:
+            await self.db.execute(update(CarouselImage).filter(CarouselImage.id==data.id).values({
+                CarouselImage.img_url: data.img_url,
+                CarouselImage.slug: data.slug
+            }))
+            await self.db.run_sync(record_changes, "carousel", [data.id])
+            await self.db.commit()
+            return JSONResponse(status_code=200, content={"msg": "Carousel image updated successfully"})
+        except Exception as e:
+            await self.db.rollback()
+            raise HTTPException(status_code=500, detail=f"Error updating carousel image: {e}")
+
+    async def delete_carousel_image(self, id):
+        try:
+            await self.db.execute(delete(CarouselImage).filter(CarouselImage.id == id))
+            await self.db.run_sync(record_changes, "carousel", (), [id])
+            await self.db.commit()
+            return JSONResponse(status_code=200, content={"msg": "Carousel image deleted successfully"})
+        except Exception as e:
+            await self.db.rollback()
+            raise HTTPException(status_code=500, detail=f"Error deleting image: {e}")
@@ -1,14 +1,17 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
 from typing import Annotated
 from uuid import uuid4
+from sqlalchemy.orm import Session
 
-from src.utils.roles import roles_required
+from src.utils.roles import roles_required, CurrentUser
+from src.utils.etag import conditional_get
 from src.components.auth.controller import oauth2_scheme
 from db_config.enums import UserRole
-from db_config.db_connection import session
+from db_config.db_connection import get_db, repository, run_db
 from db_config.db_tables import CarouselImage
 from src.components.carousel.schemas import CarouselReq, CarouselRes, CarouselCreateReq
 from .repository import CarouselRepository
+from .async_repository import AsyncCarouselRepository
 
 ADMIN = UserRole.admin
 
@@ -17,35 +20,37 @@ carousel_router = APIRouter(
     tags=["Carousel"],
     )
 
-carousel_repo = CarouselRepository(session)
+def admin_role_required(token: Annotated[str, Depends(oauth2_scheme)], db: Session = Depends(get_db)):
+    return roles_required([ADMIN], token, db=db)
+
+CarouselRepo = Annotated[CarouselRepository, Depends(repository(CarouselRepository, AsyncCarouselRepository))]
 
 @carousel_router.get("/")
-def get_carousel_imges() -> list[CarouselRes]:
-    return carousel_repo.get_carousel_imges()
+async def get_carousel_imges(carousel_repo: CarouselRepo, request: Request, response: Response) -> list[CarouselRes]:
+    not_modified = conditional_get(request, response, "carousel")
+    if not_modified:
+        return not_modified
+    return await run_db(carousel_repo.get_carousel_imges)
 
 @carousel_router.get("/{image_id}")
-def get_image_by_id(id, token: Annotated[str, Depends(oauth2_scheme)]) -> CarouselRes:
-    roles_required([ADMIN], token)
-    image = carousel_repo.get_carousel_image(id)
+async def get_image_by_id(id, carousel_repo: CarouselRepo, authorization: CurrentUser = Depends(admin_role_required)) -> CarouselRes:
+    image = await run_db(carousel_repo.get_carousel_image, id)
     if not image:
         raise HTTPException(status_code=404, detail="Image not found")
     return image
 
 @carousel_router.post("/")
-def create_image(data: CarouselCreateReq, token: Annotated[str, Depends(oauth2_scheme)]):
-    roles_required([ADMIN], token)
+async def create_image(data: CarouselCreateReq, carousel_repo: CarouselRepo, authorization: CurrentUser = Depends(admin_role_required)):
     new_image = CarouselImage(id=str(uuid4()), **data.model_dump())
-    return carousel_repo.create_carousel_image(new_image)
+    return await run_db(carousel_repo.create_carousel_image, new_image)
 
 @carousel_router.put("/")
-def update_carousel_iamge(data: CarouselReq, token: Annotated[str, Depends(oauth2_scheme)]):
-    roles_required([ADMIN], token)
-    image_exst = carousel_repo.get_carousel_image(data.id)
+async def update_carousel_iamge(data: CarouselReq, carousel_repo: CarouselRepo, authorization: CurrentUser = Depends(admin_role_required)):
+    image_exst = await run_db(carousel_repo.get_carousel_image, data.id)
     if not image_exst:
         raise HTTPException(status_code=404, detail="Image not found")
-    return carousel_repo.update_carousel_image(data)
+    return await run_db(carousel_repo.update_carousel_image, data)
 
 @carousel_router.delete("/{image_id}")
-def delete_image(id, token: Annotated[str, Depends(oauth2_scheme)]):
-    roles_required([ADMIN], token)
-    return carousel_repo.delete_carousel_image(id)
\ No newline at end of file
+async def delete_image(id, carousel_repo: CarouselRepo, authorization: CurrentUser = Depends(admin_role_required)):
+    return await run_db(carousel_repo.delete_carousel_image, id)
\ No newline at end of file
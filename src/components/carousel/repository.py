@@ -2,6 +2,7 @@ from fastapi import HTTPException
 from fastapi.responses import JSONResponse
 
 from sqlalchemy.orm import Session
+from db_config.change_tracking import record_changes
 from db_config.db_tables import CarouselImage
 from src.components.carousel.schemas import CarouselReq
 
@@ -38,6 +39,7 @@ class CarouselRepository:
                 CarouselImage.img_url: data.img_url,
                 CarouselImage.slug: data.slug
            })
+           record_changes(self.db, "carousel", upserted=[data.id])
            self.db.commit()
            return JSONResponse(status_code=200, content={"msg": "Carousel image updated successfully"})
         except Exception as e:
@@ -47,6 +49,7 @@ class CarouselRepository:
     def delete_carousel_image(self, id):
         try:
             self.db.query(CarouselImage).filter(CarouselImage.id == id).delete()
+            record_changes(self.db, "carousel", deleted=[id])
             self.db.commit()
             return JSONResponse(status_code=200, content={"msg": "Carousel image deleted successfully"})
         except Exception as e:
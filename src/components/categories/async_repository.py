@@ -0,0 +1,71 @@
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db_config.async_repository import AsyncRepository
+from db_config.lookups import lookups
+from db_config.change_tracking import record_changes
+from db_config.db_tables import Category
+from .repository import CategotyRepository
+
+class AsyncCategotyRepository(AsyncRepository):
+    sync_repository = CategotyRepository
+
+    def __init__(self, sess):
+        self.sess: AsyncSession = sess
+        self.db = sess
+
+    async def get_all_categories(self):
+        try:
+            result = await self.sess.scalars(select(Category))
+            return result.all()
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error getting categories: {e}")
+
+    async def get_category_by_id(self, id):
+        try:
+            return await self.sess.get(Category, id)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error getting category by id: {e}")
+
+    async def get_category_by_name(self, name):
+        try:
+            result = await self.sess.scalars(select(Category).filter(Category.name == name))
+            return result.first()
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error getting category by name: {e}")
+
+    async def create_category(self, new_category):
+        try:
+            self.sess.add(new_category)
+            await self.sess.commit()
+            lookups.invalidate("categories")
+            return {"message": f"Category '{new_category.name}' created successfully"}
+        except Exception as e:
+            await self.sess.rollback()
+            raise HTTPException(status_code=500, detail=f"Couldn't create category: {e}")
+
+    async def update_category(self, updates):
+        try:
+            await self.sess.execute(update(Category).filter(Category.id == updates['id']).values(updates))
+            await self.sess.run_sync(record_changes, "category", [updates['id']])
+            await self.sess.commit()
+            lookups.invalidate("categories")
+            return JSONResponse(status_code=200, content=f"Category {updates['name']} updated successfully.")
+        except Exception as e:
+            await self.sess.rollback()
+            raise HTTPException(status_code=500, detail=f"Couldn't update category: {e}")
+
+    async def delete_category(self, id):
+        to_delete = await self.sess.get(Category, id)
+        if not to_delete:
+            raise HTTPException(status_code=404, detail="Category not found")
+        try:
+            await self.sess.delete(to_delete)
+            await self.sess.commit()
+            lookups.invalidate("categories")
+            return JSONResponse(status_code=200, content=f"Category {to_delete.name} deleted successfully.")
+        except Exception as e:
+            await self.sess.rollback()
+            raise HTTPException(status_code=500, detail=f"Couldn't delete category: {e}")
@@ -1,46 +1,62 @@
-from fastapi import APIRouter, Depends, HTTPException
-from typing import Annotated
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, Query
+from typing import Annotated, Literal
+from sqlalchemy.orm import Session
 import uuid
 
-from src.utils.roles import roles_required
+from src.utils.roles import roles_required, CurrentUser
+from src.utils.etag import conditional_get
 from src.components.auth.controller import oauth2_scheme
 from db_config.enums import UserRole
-from db_config.db_connection import session
+from db_config.db_connection import get_db, repository, run_db
 from src.components.categories.repository import CategotyRepository
+from src.components.categories.async_repository import AsyncCategotyRepository
 from db_config.db_tables import Category
-from src.components.categories.schemas import CategoryReq
-
-repository = CategotyRepository(session)
+from src.components.categories.schemas import CategoryReq, CategorySummary
 
 ADMIN, USER = UserRole.admin, UserRole.user
 
-def admin_role_required(token: Annotated[str, Depends(oauth2_scheme)]):
-    return roles_required([ADMIN], token)
+def admin_role_required(token: Annotated[str, Depends(oauth2_scheme)], db: Session = Depends(get_db)):
+    return roles_required([ADMIN], token, db=db)
+
+Repository = Annotated[CategotyRepository, Depends(repository(CategotyRepository, AsyncCategotyRepository))]
 
 categories_router = APIRouter(
     prefix="/categories",
     tags=["Categories"])
 
 @categories_router.get("/")
-async def get_all_categories():
-    return repository.get_all_categories()
+async def get_all_categories(repository: Repository, request: Request, response: Response):
+    not_modified = conditional_get(request, response, "categories")
+    if not_modified:
+        return not_modified
+    return await run_db(repository.get_all_categories)
+
+@categories_router.get("/summary")
+async def get_categories_summary(
+    repository: Repository,
+    per_category: int = Query(8, ge=1, le=50),
+    sort_by: Literal["id", "name", "price", "stock"] = "id",
+    order: Literal["asc", "desc"] = "asc",
+) -> list[CategorySummary]:
+    """Homepage data in one request: every category with its product count and first products."""
+    return await run_db(repository.get_categories_summary, per_category, sort_by, order)
 
 @categories_router.get("/{category_id}")
-async def get_category_by_id(category_id: str, authorization: str = Depends(admin_role_required)):
-    return repository.get_category_by_id(category_id)
+async def get_category_by_id(category_id: str, repository: Repository, authorization: CurrentUser = Depends(admin_role_required)):
+    return await run_db(repository.get_category_by_id, category_id)
 
 @categories_router.post("/")
-async def create_category(data: CategoryReq, authorization: str = Depends(admin_role_required)):
+async def create_category(data: CategoryReq, repository: Repository, authorization: CurrentUser = Depends(admin_role_required)):
     new_category = Category(id=str(uuid.uuid4()), **data.model_dump())
-    return repository.create_category(new_category)
+    return await run_db(repository.create_category, new_category)
 
 @categories_router.put("/{category_id}")
-async def update_category(updates: CategoryReq, category_id: str, authorization: str = Depends(admin_role_required)):
-    category = repository.get_category_by_id(category_id)
+async def update_category(updates: CategoryReq, category_id: str, repository: Repository, authorization: CurrentUser = Depends(admin_role_required)):
+    category = await run_db(repository.get_category_by_id, category_id)
     if not category:
         raise HTTPException(status_code=404, detail="Category not found.")
-    return repository.update_category({"id": category_id, **updates.model_dump()})
+    return await run_db(repository.update_category, {"id": category_id, **updates.model_dump()})
 
 @categories_router.delete("/{category_id}")
-async def delete_category(id: str, authorization: str = Depends(admin_role_required)):
-    return repository.delete_category(id)
\ No newline at end of file
+async def delete_category(id: str, repository: Repository, authorization: CurrentUser = Depends(admin_role_required)):
+    return await run_db(repository.delete_category, id)
\ No newline at end of file
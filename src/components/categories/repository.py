@@ -1,8 +1,13 @@
 from fastapi import HTTPException
 from fastapi.responses import JSONResponse
+from sqlalchemy import select, func
 from sqlalchemy.orm import Session
+from collections import defaultdict
 
-from db_config.db_tables import Category
+from db_config.lookups import lookups
+from db_config.change_tracking import record_changes
+from db_config.db_tables import Category, Product
+from src.components.products.repository import PRODUCT_RELATIONS, SORT_COLUMNS
 
 class CategotyRepository:
     def __init__(self, sess):
@@ -33,6 +38,7 @@ class CategotyRepository:
         try:
             self.sess.add(new_category)
             self.sess.commit()
+            lookups.invalidate("categories")
             return {"message": f"Category '{new_category.name}' created successfully"}
         except Exception as e:
             print(e) # TODO: Implement a logger to register this errors
@@ -41,7 +47,9 @@ class CategotyRepository:
     def update_category(self, updates):
         try:
             self.sess.query(Category).filter(Category.id == updates['id']).update(updates)
+            record_changes(self.sess, "category", upserted=[updates['id']])
             self.sess.commit()
+            lookups.invalidate("categories")
             return JSONResponse(status_code=200, content=f"Category {updates['name']} updated successfully.")
         except Exception as e:
             print(e) # TODO: Implement a logger to register this errors
@@ -54,7 +62,38 @@ class CategotyRepository:
         try:
             self.sess.delete(to_delete)
             self.sess.commit()
+            lookups.invalidate("categories")
             return JSONResponse(status_code=200, content=f"Category {to_delete.name} deleted successfully.")
         except Exception as e:
             print(e) # TODO: Implement a logger to register this errors
-            raise HTTPException(status_code=500, detail=f"Couldn't delete category")
\ No newline at end of file
+            raise HTTPException(status_code=500, detail=f"Couldn't delete category")
+
+    def get_categories_summary(self, per_category: int, sort_by: str = "id", order: str = "asc"):
+        """Every category with its product count and first `per_category` products, in four queries:
+        counts (GROUP BY), top N per category (row_number window), then images and sizes (SELECT ... IN)."""
+        column = SORT_COLUMNS[sort_by]
+        ordering = (column.desc(), Product.id.desc()) if order == "desc" else (column.asc(), Product.id.asc())
+        ranked = select(
+            Product.id,
+            func.row_number().over(partition_by=Product.category_name, order_by=ordering).label("position"),
+        ).subquery()
+        try:
+            categories = self.sess.execute(
+                select(Category.id, Category.name, Category.color, func.count(Product.id).label("product_count"))
+                .outerjoin(Product, Product.category_name == Category.name)
+                .group_by(Category.id, Category.name, Category.color)
+                .order_by(Category.name)
+            ).all()
+            products = self.sess.scalars(
+                select(Product).options(*PRODUCT_RELATIONS)
+                .join(ranked, ranked.c.id == Product.id)
+                .filter(ranked.c.position <= per_category)
+                .order_by(Product.category_name, ranked.c.position)
+            ).all()
+        except Exception as e:
+            print(e) # TODO: Implement a logger to register this errors
+            raise HTTPException(status_code=500, detail=f"Error getting categories summary")
+        by_category = defaultdict(list)
+        for product in products:
+            by_category[product.category_name].append(product)
+        return [{**category._asdict(), "products": by_category[category.name]} for category in categories]
@@ -1,4 +1,7 @@
 from pydantic import BaseModel, model_validator
+from typing import List
+
+from src.components.products.schemas import ProductResponse
 
 
 class CategoryReq(BaseModel):
@@ -12,4 +15,16 @@ class CategoryReq(BaseModel):
         elif self.name == None or self.name == '' or self.name == ' ' or self.name == 'string':
             raise ValueError('NAME IS REQUIRED')
         self.name = self.name.strip().lower()
-        return self
\ No newline at end of file
+        return self
+
+class CategoryRes(BaseModel):
+    id: str
+    name: str
+    color: str
+
+class CategorySummary(BaseModel):
+    id: str
+    name: str
+    color: str
+    product_count: int
+    products: List[ProductResponse]
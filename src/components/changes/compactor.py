@@ -0,0 +1,24 @@
+from fastapi.concurrency import run_in_threadpool
+from dotenv import load_dotenv
+from os import getenv
+import asyncio
+
+from db_config.db_connection import Session as SessionLocal
+from .repository import ChangesRepository
+
+load_dotenv()
+
+CHANGES_COMPACT_INTERVAL = float(getenv("CHANGES_COMPACT_INTERVAL", 3600))
+
+def compact_changes(session_factory=SessionLocal) -> int:
+    with session_factory() as db:
+        return ChangesRepository(db).compact()
+
+async def compact_change_log(interval: float = CHANGES_COMPACT_INTERVAL):
+    """Background task started with the app: drops superseded change_log rows every `interval` seconds."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await run_in_threadpool(compact_changes)
+        except Exception as e:
+            print(f"Error compacting the change log: {e}")
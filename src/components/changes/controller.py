@@ -0,0 +1,25 @@
+from fastapi import APIRouter, Depends, Query
+from typing import Annotated, Literal
+
+from db_config.db_connection import repository, run_db
+from src.utils.serialization import ORJSONRoute
+from .repository import ChangesRepository
+from .schemas import ChangeFeed
+
+changes_router = APIRouter(
+    prefix="/changes",
+    tags=["Changes"],
+    route_class=ORJSONRoute,
+    )
+
+Changes = Annotated[ChangesRepository, Depends(repository(ChangesRepository))]
+
+@changes_router.get("/")
+async def get_changes(
+    changes: Changes,
+    since: int = Query(0, ge=0, description="next_since of the previous call; 0 for a full sync"),
+    limit: int = Query(500, ge=1, le=5000),
+    entity: list[Literal["product", "category", "carousel"]] = Query(None),
+) -> ChangeFeed:
+    """Upserts (with their current payload) and deletes (tombstones) after `since`, oldest first."""
+    return await run_db(changes.get_changes, since, limit, entity)
@@ -0,0 +1,112 @@
+from fastapi import HTTPException
+from sqlalchemy import select, delete, func
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+from os import getenv
+
+from db_config.db_tables import ChangeLog, Product, Category, CarouselImage
+from db_config.change_tracking import RESOURCE_VERSION_WINDOW
+from src.components.products.repository import PRODUCT_RELATIONS
+from src.components.products.schemas import ProductResponse
+from src.components.categories.schemas import CategoryRes
+from src.components.carousel.schemas import CarouselRes
+
+load_dotenv()
+
+# Versions are assigned at flush and become visible at commit, so a slow transaction can commit
+# a lower version after a higher one was already served. Rows younger than this lag are held back.
+CHANGES_SAFETY_LAG_SEC = float(getenv("CHANGES_SAFETY_LAG_SEC", 2))
+CHANGES_COMPACT_BATCH = 1000
+
+PAYLOADS = {
+    "product": (Product, PRODUCT_RELATIONS, ProductResponse),
+    "category": (Category, (), CategoryRes),
+    "carousel": (CarouselImage, (), CarouselRes),
+}
+
+
+class ChangesRepository:
+    def __init__(self, db: Session, safety_lag: float = CHANGES_SAFETY_LAG_SEC):
+        self.db = db
+        self.safety_lag = safety_lag
+
+    def get_changes(self, since: int, limit: int, entities: list = None) -> dict:
+        """Latest change of every row modified after `since`, oldest first, with the current payload of upserts."""
+        latest = func.max(ChangeLog.version)
+        stmt = (
+            select(ChangeLog.entity, ChangeLog.entity_id, latest.label("version"))
+            .filter(ChangeLog.version > since, ChangeLog.changed_at <= datetime.now() - timedelta(seconds=self.safety_lag))
+            .group_by(ChangeLog.entity, ChangeLog.entity_id)
+            .order_by(latest)
+            .limit(limit + 1)
+        )
+        if entities:
+            stmt = stmt.filter(ChangeLog.entity.in_(entities))
+        try:
+            rows = self.db.execute(stmt).all()
+            rows, has_more = rows[:limit], len(rows) > limit
+            operations = dict(self.db.execute(
+                select(ChangeLog.version, ChangeLog.operation).filter(ChangeLog.version.in_([row.version for row in rows]))
+            ).all()) if rows else {}
+            payloads = self._payloads([row for row in rows if operations[row.version] == "upsert"])
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error getting changes: {e}")
+
+        changes = []
+        for row in rows:
+            data = payloads.get((row.entity, row.entity_id))
+            # A row upserted and then deleted by a transaction that isn't served yet: report the delete
+            changes.append({
+                "version": row.version,
+                "entity": row.entity,
+                "id": row.entity_id,
+                "operation": "upsert" if data is not None else "delete",
+                "data": data,
+            })
+        return {"changes": changes, "next_since": rows[-1].version if rows else since, "has_more": has_more}
+
+    def _payloads(self, rows: list) -> dict:
+        payloads = {}
+        for entity, (model, options, schema) in PAYLOADS.items():
+            ids = [row.entity_id for row in rows if row.entity == entity]
+            if ids:
+                for obj in self.db.scalars(select(model).options(*options).filter(model.id.in_(ids))).all():
+                    payloads[(entity, obj.id)] = schema.model_validate(obj, from_attributes=True).model_dump(mode="json")
+        return payloads
+
+    def compact(self, batch_size: int = CHANGES_COMPACT_BATCH, keep_window: int = RESOURCE_VERSION_WINDOW) -> int:
+        """Deletes the rows superseded by a newer change of the same record; returns how many were removed.
+
+        The feed only ever serves the latest change of each record, so its output doesn't change. A row is
+        only removed once the newer one is older than the safety lag (already served), and the latest row of
+        a record is always kept, so deletes (tombstones) stay in the feed for clients syncing from any `since`.
+        The `keep_window` newest versions of each entity are left alone: resource versions count them.
+        """
+        newer = ChangeLog.__table__.alias("newer")
+        latest = ChangeLog.__table__.alias("latest")
+        cutoff = datetime.now() - timedelta(seconds=self.safety_lag)
+        superseded = (
+            select(ChangeLog.version)
+            .filter(
+                select(newer.c.version)
+                .where(newer.c.entity == ChangeLog.entity, newer.c.entity_id == ChangeLog.entity_id,
+                       newer.c.version > ChangeLog.version, newer.c.changed_at <= cutoff)
+                .exists(),
+                ChangeLog.version <= select(func.max(latest.c.version)).where(latest.c.entity == ChangeLog.entity).scalar_subquery() - keep_window,
+            )
+            .limit(batch_size)
+        )
+        removed = 0
+        try:
+            while True:
+                versions = self.db.scalars(superseded).all()
+                if versions:
+                    self.db.execute(delete(ChangeLog).where(ChangeLog.version.in_(versions)))
+                    self.db.commit()
+                    removed += len(versions)
+                if len(versions) < batch_size:
+                    return removed
+        except Exception as e:
+            self.db.rollback()
+            raise HTTPException(status_code=500, detail=f"Error compacting the change log: {e}")
@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+from typing import List, Optional, Literal
+
+class Change(BaseModel):
+    version: int
+    entity: Literal["product", "category", "carousel"]
+    id: str
+    operation: Literal["upsert", "delete"]
+    data: Optional[dict] = None
+
+class ChangeFeed(BaseModel):
+    changes: List[Change]
+    next_since: int
+    has_more: bool
@@ -0,0 +1,36 @@
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import JSONResponse
+from typing import Annotated
+from sqlalchemy.orm import Session
+
+from src.utils.roles import roles_required, CurrentUser
+from src.components.auth.controller import oauth2_scheme
+from db_config.enums import UserRole
+from db_config.db_connection import get_db
+from .schemas import ImageUploadRes
+from .storage import image_store
+
+ADMIN = UserRole.admin
+
+images_router = APIRouter(
+    prefix="/images",
+    tags=["Images"],
+    )
+
+def admin_role_required(token: Annotated[str, Depends(oauth2_scheme)], db: Session = Depends(get_db)):
+    return roles_required([ADMIN], token, db=db)
+
+@images_router.post(
+    "/",
+    response_model=ImageUploadRes,
+    openapi_extra={"requestBody": {"required": True, "content": {"application/octet-stream": {"schema": {"type": "string", "format": "binary"}}}}},
+)
+async def upload_image(request: Request, authorization: CurrentUser = Depends(admin_role_required)):
+    """Raw image body (not multipart). The returned `url` / `derivatives` go in ProductImages.url or CarouselImage.img_url."""
+    image = await image_store.save(request.stream(), str(request.base_url))
+    return JSONResponse(status_code=200 if image["duplicate"] else 201, content=image)
+
+@images_router.get("/{name}", response_model=ImageUploadRes)
+async def get_image(name: str, request: Request, authorization: CurrentUser = Depends(admin_role_required)):
+    """Same body as the upload, to check which derivatives are ready (`pending` lists the ones still being generated)."""
+    return image_store.describe(name, str(request.base_url))
@@ -0,0 +1,9 @@
+from pydantic import BaseModel
+
+class ImageUploadRes(BaseModel):
+    sha256: str
+    size: int
+    url: str
+    derivatives: dict[str, str] = {}
+    pending: list[str] = []
+    duplicate: bool = False
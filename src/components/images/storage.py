@@ -0,0 +1,209 @@
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from dotenv import load_dotenv
+from hashlib import sha256
+from importlib.util import find_spec
+from pathlib import Path
+from os import getenv, replace
+from uuid import uuid4
+import asyncio
+
+load_dotenv()
+
+MEDIA_ROOT = getenv("MEDIA_ROOT", "media")
+MEDIA_URL = getenv("MEDIA_URL", "/media")
+MAX_IMAGE_BYTES = int(getenv("MAX_IMAGE_BYTES", 10 * 1024 * 1024))
+IMAGE_WIDTHS = tuple(int(width) for width in getenv("IMAGE_WIDTHS", "320,640,1280").split(","))
+IMAGE_WORKERS = int(getenv("IMAGE_WORKERS", 2))
+# Decoded size limit: a few KB of compressed pixels can expand to gigabytes in memory
+MAX_IMAGE_PIXELS = int(getenv("MAX_IMAGE_PIXELS", 40_000_000))
+WEBP_QUALITY = 80
+PILLOW_INSTALLED = find_spec("PIL") is not None
+
+# Detected from the first bytes instead of trusting the Content-Type sent by the client
+SIGNATURES = {
+    b"\x89PNG\r\n\x1a\n": "png",
+    b"\xff\xd8\xff": "jpg",
+    b"GIF87a": "gif",
+    b"GIF89a": "gif",
+}
+SIGNATURE_SIZE = 12
+UNSUPPORTED_FORMAT = "Only PNG, JPEG, GIF or WebP images are allowed."
+PILLOW_FORMATS = {"PNG": "png", "JPEG": "jpg", "GIF": "gif", "WEBP": "webp"}
+
+def sniff_extension(head: bytes):
+    for signature, extension in SIGNATURES.items():
+        if head.startswith(signature):
+            return extension
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+def derivative_name(digest: str, width: int) -> str:
+    return f"{digest}-{width}.webp"
+
+def verify_image(path: str, extension: str, max_pixels: int = MAX_IMAGE_PIXELS):
+    """Parses the whole file with Pillow before it is accepted: corrupt / truncated files, a format
+    other than the sniffed one and images over `max_pixels` are rejected."""
+    from PIL import Image
+
+    Image.MAX_IMAGE_PIXELS = max_pixels
+    try:
+        with Image.open(path) as image:
+            if PILLOW_FORMATS.get(image.format) != extension:
+                raise HTTPException(status_code=415, detail=UNSUPPORTED_FORMAT)
+            if image.width * image.height > max_pixels:
+                raise HTTPException(status_code=413, detail=f"Image larger than {max_pixels} pixels.")
+            image.verify()
+    except Image.DecompressionBombError:
+        raise HTTPException(status_code=413, detail=f"Image larger than {max_pixels} pixels.")
+    except HTTPException:
+        raise
+    except Exception:
+        raise HTTPException(status_code=415, detail="The image is corrupt or truncated.")
+
+def make_derivatives(source: str, digest: str, widths: tuple, quality: int = WEBP_QUALITY) -> list:
+    """Runs in a worker process: writes one WebP per width (never upscaled) next to the original."""
+    from PIL import Image
+
+    Image.MAX_IMAGE_PIXELS = MAX_IMAGE_PIXELS
+    created = []
+    folder = Path(source).parent
+    with Image.open(source) as image:
+        image = image.convert("RGBA" if image.mode in ("RGBA", "LA", "P") else "RGB")
+        for width in widths:
+            target = folder / derivative_name(digest, width)
+            if target.exists():
+                continue
+            resized = image.copy()
+            resized.thumbnail((width, width * 10))
+            partial = folder / f".{target.name}.{uuid4().hex}"
+            resized.save(partial, "WEBP", quality=quality, method=4)
+            replace(partial, target)
+            created.append(target.name)
+    return created
+
+
+class ImageStore:
+    """Content addressed image storage: files are named by their sha256, so the same upload is stored once.
+
+    Uploads are written to disk chunk by chunk while hashing and, when Pillow is installed, fully
+    parsed before they are kept. The resized WebP derivatives are produced afterwards on a process
+    pool without delaying the response, which lists them as pending until their files exist.
+    """
+    def __init__(self, root: str = MEDIA_ROOT, base_url: str = MEDIA_URL, widths: tuple = IMAGE_WIDTHS,
+                 max_bytes: int = MAX_IMAGE_BYTES, workers: int = IMAGE_WORKERS, max_pixels: int = MAX_IMAGE_PIXELS):
+        self.root = Path(root)
+        self.base_url = base_url.rstrip("/")
+        self.widths = widths
+        self.max_bytes = max_bytes
+        self.max_pixels = max_pixels
+        self.workers = workers
+        self._executor = None
+        self._jobs = set()
+
+    @property
+    def derivatives_enabled(self) -> bool:
+        return PILLOW_INSTALLED and bool(self.widths)
+
+    def url(self, name: str, host: str = "") -> str:
+        """`host` prefixes relative MEDIA_URLs, so the result can be stored as is in the image url fields."""
+        if self.base_url.startswith("/"):
+            return f"{host.rstrip('/')}{self.base_url}/{name}"
+        return f"{self.base_url}/{name}"
+
+    def _check_format(self, head: bytes) -> str:
+        extension = sniff_extension(head)
+        if extension is None:
+            raise HTTPException(status_code=415, detail=UNSUPPORTED_FORMAT)
+        return extension
+
+    async def save(self, chunks, host: str = "") -> dict:
+        """Stores the streamed body; returns its urls and whether the same content was already stored."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        partial = self.root / f".upload-{uuid4().hex}"
+        digest, size, extension, head = sha256(), 0, None, b""
+        try:
+            with open(partial, "wb") as file:
+                async for chunk in chunks:
+                    if extension is None:
+                        # Hold back the first bytes until there are enough to recognize the format
+                        head += chunk
+                        if len(head) < SIGNATURE_SIZE:
+                            continue
+                        extension = self._check_format(head)
+                        chunk, head = head, b""
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        raise HTTPException(status_code=413, detail=f"Image larger than {self.max_bytes} bytes.")
+                    digest.update(chunk)
+                    await run_in_threadpool(file.write, chunk)
+            if head:
+                raise HTTPException(status_code=415, detail=UNSUPPORTED_FORMAT)
+            if extension is None:
+                raise HTTPException(status_code=400, detail="Empty upload.")
+            name = f"{digest.hexdigest()}.{extension}"
+            target = self.root / name
+            duplicate = target.exists()
+            if duplicate:
+                partial.unlink()
+            else:
+                if PILLOW_INSTALLED:
+                    await run_in_threadpool(verify_image, str(partial), extension, self.max_pixels)
+                replace(partial, target)
+        except BaseException:
+            partial.unlink(missing_ok=True)
+            raise
+
+        if self.derivatives_enabled:
+            self.schedule_derivatives(target, digest.hexdigest())
+        return {**self.describe(name, host), "duplicate": duplicate}
+
+    def describe(self, name: str, host: str = "") -> dict:
+        """Urls of a stored image. Derivatives are listed once their file exists; until then their width is in `pending`."""
+        target = self.root / name
+        if "/" in name or name.startswith(".") or not target.is_file():
+            raise HTTPException(status_code=404, detail="Image not found.")
+        digest = target.stem
+        derivatives, pending = {}, []
+        if self.derivatives_enabled:
+            for width in self.widths:
+                if (self.root / derivative_name(digest, width)).exists():
+                    derivatives[str(width)] = self.url(derivative_name(digest, width), host)
+                else:
+                    pending.append(str(width))
+        return {
+            "sha256": digest,
+            "size": target.stat().st_size,
+            "url": self.url(name, host),
+            "derivatives": derivatives,
+            "pending": pending,
+        }
+
+    def schedule_derivatives(self, source: Path, digest: str):
+        missing = tuple(width for width in self.widths if not (self.root / derivative_name(digest, width)).exists())
+        if not missing:
+            return
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=get_context("spawn"))
+        job = asyncio.get_running_loop().run_in_executor(self._executor, make_derivatives, str(source), digest, missing)
+        self._jobs.add(job)
+        job.add_done_callback(self._job_done)
+
+    def _job_done(self, job):
+        self._jobs.discard(job)
+        if not job.cancelled() and job.exception() is not None:
+            print(f"Error generating image derivatives: {job.exception()}")
+
+    async def wait_for_derivatives(self):
+        if self._jobs:
+            await asyncio.gather(*self._jobs, return_exceptions=True)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+image_store = ImageStore()
@@ -0,0 +1,36 @@
+from fastapi import APIRouter, Depends
+from typing import Annotated
+from sqlalchemy.orm import Session
+
+from src.utils.roles import roles_required, CurrentUser
+from src.components.auth.controller import oauth2_scheme
+from db_config.enums import UserRole
+from db_config.db_connection import get_db, get_pool_stats
+from src.components.products.cache import product_cache
+from src.utils.response_cache import response_cache
+from src.components.products.live import live_products
+from src.components.users.cache import principal_cache
+from src.utils.password_hash import password_hasher
+from src.utils.token_revocation import revocation_list
+
+ADMIN = UserRole.admin
+
+def admin_role_required(token: Annotated[str, Depends(oauth2_scheme)], db: Session = Depends(get_db)):
+    return roles_required([ADMIN], token, db=db)
+
+metrics_router = APIRouter(
+    prefix="/metrics",
+    tags=["Metrics"],
+    )
+
+@metrics_router.get("/")
+def get_metrics(authorization: CurrentUser = Depends(admin_role_required)):
+    return {
+        "db_pool": get_pool_stats(),
+        "product_cache": product_cache.stats(),
+        "response_cache": response_cache.stats(),
+        "live_products": live_products.stats(),
+        "principal_cache": principal_cache.stats(),
+        "password_hashing": password_hasher.stats(),
+        "revoked_tokens": revocation_list.stats(),
+    }
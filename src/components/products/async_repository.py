@@ -0,0 +1,66 @@
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from sqlalchemy import select
+
+from db_config.async_repository import AsyncRepository
+from db_config.db_tables import Product
+from src.utils.pagination import DEFAULT_PAGE_SIZE, keyset_page
+from .repository import ProductModel, PRODUCT_RELATIONS, products_page_query
+from .cache import MISSING, get_cached, cache_product, invalidate_product, generation as cache_generation
+
+class AsyncProductModel(AsyncRepository):
+    sync_repository = ProductModel
+
+    async def get_all_products(self, limit: int = DEFAULT_PAGE_SIZE, cursor: str = None, sort_by: str = "id", order: str = "asc"):
+        stmt = products_page_query(select(Product).options(*PRODUCT_RELATIONS), limit, cursor, sort_by, order)
+        try:
+            result = await self.db.scalars(stmt)
+        except Exception as e:
+            raise HTTPException(status_code=404, detail=f"Not products found: {e}")
+        return keyset_page(result.all(), sort_by, limit)
+
+    async def get_products_by_category(self, category: str, limit: int = DEFAULT_PAGE_SIZE, cursor: str = None, sort_by: str = "id", order: str = "asc"):
+        stmt = products_page_query(select(Product).options(*PRODUCT_RELATIONS).filter(Product.category_name==category), limit, cursor, sort_by, order)
+        try:
+            result = await self.db.scalars(stmt)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error getting product by category in repository: {e}")
+        return keyset_page(result.all(), sort_by, limit)
+
+    async def get_product_by_name(self, name: str):
+        cached = get_cached(("name", name))
+        if cached is not MISSING:
+            return cached
+        generation = cache_generation()
+        try:
+            result = await self.db.scalars(select(Product).options(*PRODUCT_RELATIONS).filter(Product.name==name))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error getting product by name in repository: {e}")
+        return cache_product(("name", name), result.first(), generation)
+
+    async def get_product_by_id(self, id: str):
+        cached = get_cached(("id", id))
+        if cached is not MISSING:
+            return cached
+        generation = cache_generation()
+        return cache_product(("id", id), await self.get_product(id), generation)
+
+    async def get_product(self, id: str):
+        try:
+            result = await self.db.scalars(select(Product).options(*PRODUCT_RELATIONS).filter(Product.id==id))
+            return result.first()
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error getting product by id in repository: {e}")
+
+    async def delete_product(self, id):
+        to_delete = await self.get_product(id)
+        if not to_delete:
+            raise HTTPException(status_code=404, detail="Product not found")
+        try:
+            await self.db.delete(to_delete)
+            await self.db.commit()
+        except Exception as e:
+            await self.db.rollback()
+            raise HTTPException(status_code=500, detail=f"Couldn't delete product: {e}")
+        invalidate_product(to_delete.id, to_delete.name)
+        return JSONResponse(status_code=200, content=f"Product {to_delete.name} deleted successfully")
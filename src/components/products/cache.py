@@ -0,0 +1,59 @@
+from dotenv import load_dotenv
+from itertools import count
+from os import getenv
+
+from src.utils.cache import TTLCache, MISSING
+from src.utils.etag import resource_versions
+from .schemas import ProductResponse
+
+load_dotenv()
+
+# Per process cache of single product reads, keyed by ("id", id) and ("name", name).
+# Misses are cached as None so unknown ids/names don't hit the database on every call.
+product_cache = TTLCache(
+    maxsize=int(getenv("PRODUCT_CACHE_SIZE", 4096)),
+    ttl=float(getenv("PRODUCT_CACHE_TTL", 300)),
+)
+# Incremented by every invalidation: a read that started before it may have loaded the old row
+_generations = count()
+_generation = next(_generations)
+
+def get_cached(key):
+    return product_cache.get(key)
+
+def generation() -> int:
+    """Taken before the database read and passed to cache_product."""
+    return _generation
+
+def cache_product(key, product, generation: int):
+    """Store a snapshot of the product under `key` (and its other key when found); returns the snapshot.
+    Nothing is stored if the cache was invalidated since `generation` was taken."""
+    if product is None:
+        if generation == _generation:
+            product_cache.set(key, None)
+        return None
+    snapshot = ProductResponse.model_validate(product, from_attributes=True)
+    if generation == _generation:
+        product_cache.set(("id", snapshot.id), snapshot)
+        product_cache.set(("name", snapshot.name), snapshot)
+    return snapshot
+
+def invalidate_product(product_id: str = None, *names: str):
+    """Called after every committed product write of this process: evicts the cached reads."""
+    global _generation
+    _generation = next(_generations)
+    if product_id is not None:
+        cached = product_cache.pop(("id", product_id))
+        if cached is not None:
+            names = (*names, cached.name)
+    for name in names:
+        product_cache.pop(("name", name))
+
+def invalidate_products(*resources: str):
+    """Subscribed to resource_versions: product writes of any process (stock included) clear the cache."""
+    global _generation
+    if "products" in resources:
+        _generation = next(_generations)
+        product_cache.clear()
+
+resource_versions.subscribe(invalidate_products)
@@ -1,102 +1,189 @@
-from fastapi import APIRouter, HTTPException, Depends
-from fastapi.responses import JSONResponse
-from uuid import uuid4
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response, UploadFile, File, Body
+from fastapi.responses import JSONResponse, StreamingResponse
 from dotenv import load_dotenv
 from os import getenv
-from typing import Annotated
+from typing import Annotated, Literal
+
+from sqlalchemy.orm import Session
 
 from src.components.auth.controller import oauth2_scheme
 from .repository import ProductModel
-from src.components.products.schemas import ProductReq, ProductUpdateRequest, ProductResponse
-from db_config.db_connection import session
-from db_config.db_tables import Product, ProductImages
-from src.utils.roles import roles_required
-from db_config.enums import UserRole, ProductSizes
+from .async_repository import AsyncProductModel
+from .importer import ProductImporter, DEFAULT_BATCH_SIZE
+from .exporter import export_products, MEDIA_TYPES
+from .live import live_products
+from src.components.products.schemas import ProductReq, ProductUpdateRequest, ProductResponse, ProductFilter, ProductFilterResponse, ProductPatch, BatchItemResult
+from db_config.db_connection import get_db, repository, run_db
+from src.utils.roles import roles_required, CurrentUser
+from src.utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from src.utils.etag import conditional_get
+from src.utils.serialization import ORJSONRoute
+from db_config.enums import UserRole
 
 load_dotenv()
 
 ADMIN, USER = UserRole.admin, UserRole.user
+MAX_BATCH_SIZE = 1000
+MAX_STREAM_KEYS = 100
 
+# Listing endpoints return thousands of rows: serialize them with orjson, see src/utils/serialization.py
 products_router = APIRouter(
     prefix="/products",
     tags=["Products"],
+    route_class=ORJSONRoute,
 )
-products = ProductModel(session)
+
+def admin_role_required(token: Annotated[str, Depends(oauth2_scheme)], db: Session = Depends(get_db)):
+    return roles_required([ADMIN], token, db=db)
+
+Products = Annotated[ProductModel, Depends(repository(ProductModel, AsyncProductModel))]
+
+class PageParams:
+    def __init__(
+        self,
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        cursor: str = Query(None, description="X-Next-Cursor header value of the previous page"),
+        sort_by: Literal["id", "name", "price", "stock"] = "id",
+        order: Literal["asc", "desc"] = "asc",
+    ):
+        self.limit = limit
+        self.cursor = cursor
+        self.sort_by = sort_by
+        self.order = order
+
+    def as_kwargs(self) -> dict:
+        return {"limit": self.limit, "cursor": self.cursor, "sort_by": self.sort_by, "order": self.order}
+
+def set_next_cursor(response: Response, next_cursor: str):
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
 
 # ==================================
 #             FILTERS
 # ==================================
 
 @products_router.get("/")
-async def get_all_products() -> list[ProductResponse]:
-    all_products = await products.get_all_products()
+async def get_all_products(products: Products, request: Request, response: Response, page: PageParams = Depends()) -> list[ProductResponse]:
+    not_modified = conditional_get(request, response, "products")
+    if not_modified:
+        return not_modified
+    all_products, next_cursor = await run_db(products.get_all_products, **page.as_kwargs())
+    set_next_cursor(response, next_cursor)
     return all_products
 
 @products_router.get("/categories/{product_category}")
-async def get_products_by_category(product_category: str) -> list[ProductResponse]:
-    return products.get_products_by_category(product_category)
+async def get_products_by_category(product_category: str, products: Products, request: Request, response: Response, page: PageParams = Depends()) -> list[ProductResponse]:
+    not_modified = conditional_get(request, response, "products")
+    if not_modified:
+        return not_modified
+    category_products, next_cursor = await run_db(products.get_products_by_category, product_category, **page.as_kwargs())
+    set_next_cursor(response, next_cursor)
+    return category_products
+
+@products_router.get("/filter")
+async def filter_products(
+    products: Products,
+    page: PageParams = Depends(),
+    min_price: float = Query(None, ge=0),
+    max_price: float = Query(None, ge=0),
+    sizes: list[str] = Query(None),
+    brands: list[str] = Query(None),
+    categories: list[str] = Query(None),
+    in_stock: bool = None,
+) -> ProductFilterResponse:
+    filters = ProductFilter(min_price=min_price, max_price=max_price, sizes=sizes, brands=brands, categories=categories, in_stock=in_stock)
+    items, next_cursor, facets = await run_db(products.filter_products, filters, **page.as_kwargs())
+    return {"items": items, "facets": facets, "next_cursor": next_cursor}
+
+@products_router.get("/search")
+async def search_products(
+    products: Products,
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=10000),
+) -> list[ProductResponse]:
+    return await run_db(products.search_products, q, limit, offset)
+
+@products_router.get("/export")
+def export_catalog(format: Literal["ndjson", "csv"] = "ndjson", db: Session = Depends(get_db), authorization: CurrentUser = Depends(admin_role_required)):
+    """Streams the whole catalog; rows are read and written in chunks instead of building one list."""
+    return StreamingResponse(
+        export_products(format, db),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="products.{format}"'},
+    )
+
+@products_router.get("/stream")
+async def stream_product_changes(
+    ids: list[str] = Query([], max_length=MAX_STREAM_KEYS),
+    categories: list[str] = Query([], max_length=MAX_STREAM_KEYS),
+):
+    """Server-Sent Events with the price and stock of the given products / categories each time they change."""
+    if not ids and not categories:
+        raise HTTPException(status_code=400, detail="Subscribe to at least one product id or category.")
+    subscription = live_products.subscribe(ids, categories)
+    return StreamingResponse(
+        live_products.stream(subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 @products_router.get("/name/{product_name}")
-async def get_product_by_name(product_name: str) -> ProductResponse:
-    return products.get_product_by_name(product_name)
+async def get_product_by_name(product_name: str, products: Products) -> ProductResponse:
+    product = await run_db(products.get_product_by_name, product_name)
+    if not product:
+        raise HTTPException(status_code=404, detail="Product not found.")
+    return product
 
 # ==================================
 
 @products_router.get("/{product_id}")
-async def get_product_by_id(id: str) -> ProductResponse:
-    return products.get_product_by_id(id)
+async def get_product_by_id(id: str, products: Products) -> ProductResponse:
+    product = await run_db(products.get_product_by_id, id)
+    if not product:
+        raise HTTPException(status_code=404, detail="Product not found.")
+    return product
 
 @products_router.post("/")
-async def create_product(data:ProductReq, token: Annotated[str, Depends(oauth2_scheme)]):
-    roles_required([ADMIN], token)
-    product_id = str(uuid4())
-    
-    sizes_lookup_values = [key for key, value in ProductSizes.__members__.items() if value in data.sizes]
-    new_product = Product(
-        id=product_id,
-        name=data.name,
-        price=data.price,
-        stock=data.stock,
-        brand=data.brand,
-        description=data.description,
-        category_name=data.category_name,
-        sizes = products.get_lookup_sizes(sizes_lookup_values)
-        )
-    products.create_product(new_product)
-    for image in data.images:
-        image_register = ProductImages(id=str(uuid4()), url=image, product_id=product_id)
-        products.save_product_image_url(image_register)
-        print(image_register.product_id)  
+async def create_product(data:ProductReq, products: Products, authorization: CurrentUser = Depends(admin_role_required)):
+    await run_db(products.save_new_product, data)
     return JSONResponse(status_code=201, content={"message": "Product created successfully"})
 
-@products_router.put("/{product_id}")
-async def update_product(id:str, updates:ProductUpdateRequest, token: Annotated[str, Depends(oauth2_scheme)]):
-    roles_required([ADMIN], token)
-    product = products.get_product_by_id(updates.id)
-    sizes_lookup_keys = [key for key, value in ProductSizes.__members__.items() if value in updates.sizes]
+@products_router.post("/import")
+async def import_products(
+    db: Session = Depends(get_db),
+    file: UploadFile = File(..., description='CSV (header row, images and sizes separated by "|") or NDJSON'),
+    format: Literal["csv", "ndjson"] = Query(None, description="Defaults to the file extension"),
+    batch_size: int = Query(DEFAULT_BATCH_SIZE, ge=1, le=10000),
+    authorization: CurrentUser = Depends(admin_role_required),
+):
+    file_format = format or ("csv" if (file.filename or "").lower().endswith(".csv") else "ndjson")
+    return await run_db(ProductImporter(db, batch_size).import_file, file.file, file_format)
+
+@products_router.patch("/batch")
+async def batch_update_products(
+    products: Products,
+    updates: Annotated[list[ProductPatch], Body(min_length=1, max_length=MAX_BATCH_SIZE)],
+    authorization: CurrentUser = Depends(admin_role_required),
+) -> list[BatchItemResult]:
+    return await run_db(products.batch_update_products, [update.model_dump(exclude_none=True) for update in updates])
+
+@products_router.post("/batch/delete")
+async def batch_delete_products(
+    products: Products,
+    ids: Annotated[list[str], Body(min_length=1, max_length=MAX_BATCH_SIZE)],
+    authorization: CurrentUser = Depends(admin_role_required),
+) -> list[BatchItemResult]:
+    return await run_db(products.batch_delete_products, ids)
 
-    sizes = products.get_lookup_sizes(sizes_lookup_keys)
-    product.sizes = sizes
-    if not product:
-        raise HTTPException(status_code=404, detail="Product not found.")
-    for image in product.images:
-        if image not in updates.images:
-            products.delete_product_image(image.id)
-    for image in updates.images:
-        if image not in product.images:
-            image = ProductImages(id=image.id, url=image.url, product_id=product.id)
-            products.save_product_image_url(image)
-        else:
-            products.update_product_image(id, image)
-
-    return products.update_product(id, updates.model_dump())
+@products_router.put("/{product_id}")
+async def update_product(id:str, updates:ProductUpdateRequest, products: Products, authorization: CurrentUser = Depends(admin_role_required)) -> ProductResponse:
+    return await run_db(products.save_product_changes, id, updates)
 
 @products_router.delete("/{product_id}")
-async def delete_product(id:str, token: Annotated[str, Depends(oauth2_scheme)]):
-    roles_required([ADMIN], token)
-    return products.delete_product(id)
+async def delete_product(id:str, products: Products, authorization: CurrentUser = Depends(admin_role_required)):
+    return await run_db(products.delete_product, id)
 
 @products_router.get("/image_host/")
-async def get_image_host(token: Annotated[str, Depends(oauth2_scheme)]):
-    roles_required([ADMIN], token)
+async def get_image_host(authorization: CurrentUser = Depends(admin_role_required)):
     return getenv("IMAGES_SERVICE")
\ No newline at end of file
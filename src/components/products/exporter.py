@@ -0,0 +1,54 @@
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from typing import Iterator
+import csv
+import io
+
+from db_config.db_tables import Product
+from db_config.enums import ProductSizes
+from .repository import PRODUCT_RELATIONS
+from .schemas import ProductResponse
+from .importer import LIST_SEPARATOR
+
+EXPORT_CHUNK_SIZE = 1000
+CSV_COLUMNS = ["id", "name", "price", "stock", "brand", "description", "category_name", "images", "sizes"]
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def product_chunks(db: Session, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[list]:
+    """Yields the catalog in id order, `chunk_size` products at a time.
+
+    The rows are streamed from the database (server side cursor on Postgres) and the session's
+    identity map only holds weak references, so each chunk is released once it has been written
+    and memory stays flat whatever the catalog size. The request session stays open until the
+    streamed response is finished.
+    """
+    query = select(Product).options(*PRODUCT_RELATIONS).order_by(Product.id).execution_options(yield_per=chunk_size)
+    for chunk in db.scalars(query).partitions():
+        yield chunk
+
+def export_ndjson(chunks: Iterator[list]) -> Iterator[str]:
+    for chunk in chunks:
+        yield "".join(ProductResponse.model_validate(product, from_attributes=True).model_dump_json() + "\n" for product in chunk)
+
+def export_csv(chunks: Iterator[list]) -> Iterator[str]:
+    """Same columns as the bulk importer, so an export can be imported back."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+    for chunk in chunks:
+        for product in chunk:
+            writer.writerow([
+                product.id, product.name, product.price, product.stock, product.brand, product.description, product.category_name,
+                LIST_SEPARATOR.join(image.url for image in product.images),
+                LIST_SEPARATOR.join(ProductSizes[size.size].value if size.size in ProductSizes.__members__ else size.size for size in product.sizes),
+            ])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+def export_products(file_format: str, db: Session, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[str]:
+    chunks = product_chunks(db, chunk_size)
+    return export_csv(chunks) if file_format == "csv" else export_ndjson(chunks)
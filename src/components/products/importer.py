@@ -0,0 +1,155 @@
+from sqlalchemy import select, insert
+from sqlalchemy.orm import Session
+from pydantic import ValidationError
+from typing import Iterable, Iterator, NamedTuple
+from uuid import uuid4
+import argparse
+import csv
+import io
+import json
+
+from db_config.db_tables import Product, ProductImages, product_sizes_association
+from db_config.lookups import lookups
+from db_config.change_tracking import record_changes
+from .schemas import ProductReq
+from .cache import invalidate_product
+
+DEFAULT_BATCH_SIZE = 1000
+LIST_SEPARATOR = "|"
+
+
+class UnreadableRow(NamedTuple):
+    """Yielded by the row iterators in place of a line that can't be parsed, so the rows after it are still read."""
+    error: str
+
+
+def iter_csv_rows(lines: Iterable[str]) -> Iterator[dict]:
+    """CSV with a header row; `images` and `sizes` hold several values separated by "|", empty cells use the column default."""
+    reader = csv.DictReader(lines)
+    while True:
+        try:
+            row = next(reader)
+        except StopIteration:
+            return
+        except csv.Error as e:
+            yield UnreadableRow(str(e))
+            continue
+        for key in ("images", "sizes"):
+            value = row.get(key)
+            row[key] = [item.strip() for item in value.split(LIST_SEPARATOR) if item.strip()] if value else []
+        yield {key: value for key, value in row.items() if value != ""}
+
+def iter_ndjson_rows(lines: Iterable[str]) -> Iterator[dict]:
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as e:
+            row = UnreadableRow(str(e))
+        yield row
+
+
+class ProductImporter:
+    """Streams rows into the products, product_images and product_sizes_association tables in batched transactions."""
+    def __init__(self, db: Session, batch_size: int = DEFAULT_BATCH_SIZE):
+        self.db = db
+        self.batch_size = batch_size
+        self.seen_names = set()
+        self.imported = 0
+        self.errors = []
+
+    def import_file(self, file, file_format: str) -> dict:
+        lines = io.TextIOWrapper(file, encoding="utf-8-sig", newline="") if isinstance(file.read(0), bytes) else file
+        rows = iter_csv_rows(lines) if file_format == "csv" else iter_ndjson_rows(lines)
+        return self.import_rows(rows)
+
+    def import_rows(self, rows: Iterable[dict]) -> dict:
+        batch = []
+        row_number = 0
+        try:
+            for row_number, row in enumerate(rows, start=1):
+                if isinstance(row, UnreadableRow):
+                    self.errors.append({"row": row_number, "error": f"Unreadable row: {row.error}"})
+                    continue
+                record = self._build_record(row_number, row)
+                if record:
+                    batch.append(record)
+                if len(batch) >= self.batch_size:
+                    self._insert_batch(batch)
+                    batch = []
+        except UnicodeDecodeError as e:
+            # The decoder can't resynchronize after invalid bytes: keep what was read and stop
+            self.errors.append({"row": row_number + 1, "error": f"Unreadable file, import stopped: {e}"})
+        if batch:
+            self._insert_batch(batch)
+        return {"imported": self.imported, "failed": len(self.errors), "errors": self.errors}
+
+
+    def _build_record(self, row_number: int, row: dict):
+        try:
+            data = ProductReq(**row)
+        except (ValidationError, TypeError, ValueError) as e:
+            self.errors.append({"row": row_number, "error": str(e)})
+            return None
+        unknown_sizes = [size for size in data.sizes or [] if lookups.size_id(self.db, size) is None]
+        if unknown_sizes:
+            self.errors.append({"row": row_number, "error": f"Unknown sizes: {', '.join(unknown_sizes)}"})
+            return None
+        if lookups.category_id(self.db, data.category_name) is None:
+            self.errors.append({"row": row_number, "error": f'Category "{data.category_name}" not found'})
+            return None
+        if data.name in self.seen_names:
+            self.errors.append({"row": row_number, "error": f'Duplicated product name "{data.name}"'})
+            return None
+        self.seen_names.add(data.name)
+        return row_number, data
+
+    def _insert_batch(self, batch: list):
+        names = [data.name for _, data in batch]
+        existing = set(self.db.scalars(select(Product.name).filter(Product.name.in_(names))).all())
+        products, images, sizes = [], [], []
+        for row_number, data in batch:
+            if data.name in existing:
+                self.errors.append({"row": row_number, "error": f'Product "{data.name}" already exists'})
+                continue
+            product_id = str(uuid4())
+            product = data.model_dump(exclude={"images", "sizes"})
+            if product["brand"] is None:
+                del product["brand"]
+            products.append({"id": product_id, **product})
+            images.extend({"id": str(uuid4()), "url": url, "product_id": product_id} for url in data.images or [])
+            sizes.extend({"product_id": product_id, "size_id": id} for _, id in lookups.sizes(self.db, data.sizes))
+        if not products:
+            return
+        try:
+            self.db.execute(insert(Product), products)
+            if images:
+                self.db.execute(insert(ProductImages), images)
+            if sizes:
+                self.db.execute(insert(product_sizes_association), sizes)
+            record_changes(self.db, "product", upserted=[product["id"] for product in products])
+            self.db.commit()
+        except Exception as e:
+            self.db.rollback()
+            self.errors.extend({"row": row_number, "error": f"Batch insert failed: {e}"} for row_number, data in batch if data.name not in existing)
+            return
+        self.imported += len(products)
+        invalidate_product(None, *(product["name"] for product in products))
+
+
+if __name__ == "__main__":
+    from db_config.db_connection import Session as SessionLocal
+
+    parser = argparse.ArgumentParser(description="Bulk import products from a CSV or NDJSON file.")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=["csv", "ndjson"], help="Defaults to the file extension")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    file_format = args.format or ("csv" if args.path.lower().endswith(".csv") else "ndjson")
+    with SessionLocal() as db, open(args.path, encoding="utf-8-sig", newline="") as file:
+        result = ProductImporter(db, args.batch_size).import_file(file, file_format)
+    for error in result["errors"]:
+        print(f'Row {error["row"]}: {error["error"]}')
+    print(f'Imported {result["imported"]} products, {result["failed"]} rows failed.')
@@ -0,0 +1,242 @@
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select, func
+from collections import defaultdict
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+from time import monotonic
+from os import getenv
+import asyncio
+import orjson
+
+from db_config.db_connection import Session as SessionLocal
+from db_config.db_tables import Product, ChangeLog
+from db_config.change_tracking import on_commit, DELETE
+from src.utils.cache import TTLCache
+
+load_dotenv()
+
+LIVE_HEARTBEAT_SEC = float(getenv("LIVE_HEARTBEAT_SEC", 15))
+LIVE_QUEUE_SIZE = int(getenv("LIVE_QUEUE_SIZE", 100))
+LIVE_MAX_SUBSCRIPTIONS = int(getenv("LIVE_MAX_SUBSCRIPTIONS", 1000))
+LIVE_POLL_SEC = float(getenv("LIVE_POLL_SEC", 1))
+# Same reasoning as CHANGES_SAFETY_LAG_SEC: change_log rows younger than this may still have
+# lower versions pending in open transactions, so the poll leaves them for the next round.
+LIVE_SAFETY_LAG_SEC = float(getenv("LIVE_SAFETY_LAG_SEC", 2))
+LIVE_POLL_BATCH = 500
+LIVE_FIELDS = (Product.id, Product.name, Product.price, Product.stock, Product.category_name)
+
+
+def sse_message(event: str, data: dict) -> bytes:
+    return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+
+
+class Subscription:
+    """One open stream. Messages are queued as already encoded bytes shared by every subscriber."""
+    def __init__(self, product_ids=(), categories=(), queue_size: int = LIVE_QUEUE_SIZE):
+        self.product_ids = frozenset(product_ids)
+        self.categories = frozenset(categories)
+        self.queue_size = queue_size
+        self.queue = asyncio.Queue()
+        self.closed = False
+
+    def send(self, message: bytes):
+        if self.closed:
+            return
+        if self.queue.qsize() >= self.queue_size:
+            # A client this far behind is closed instead of buffering without limit; it reconnects and refetches
+            self.close()
+            return
+        self.queue.put_nowait(message)
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.queue.put_nowait(None)
+
+
+class LiveProductHub:
+    """Fan-out of committed product changes to the open SSE streams of this process.
+
+    The publisher task polls change_log every `poll_interval` for product versions it hasn't seen,
+    so writes committed by any process reach the streams. Commits made in this process are also
+    handed over right away (from any thread) as a low latency shortcut; the poll later sees the
+    same changes, and messages identical to the last one sent for a product are dropped. Each
+    round loads price / stock / category of the changed ids in one query and pushes one encoded
+    message per product to the matching subscriptions. With no subscribers nothing is queried.
+    """
+    def __init__(self, session_factory=SessionLocal, poll_interval: float = LIVE_POLL_SEC,
+                 safety_lag: float = LIVE_SAFETY_LAG_SEC, max_subscriptions: int = LIVE_MAX_SUBSCRIPTIONS):
+        self.session_factory = session_factory
+        self.poll_interval = poll_interval
+        self.safety_lag = safety_lag
+        self.max_subscriptions = max_subscriptions
+        self._by_product = defaultdict(set)
+        self._by_category = defaultdict(set)
+        self._subscriptions = set()
+        self._pending = {}
+        self._last_version = None
+        self._sent = TTLCache(maxsize=4096, ttl=60)
+        self._loop = None
+        self._wakeup = None
+        self._task = None
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._publish_loop())
+
+    async def stop(self):
+        for subscription in list(self._subscriptions):
+            self.unsubscribe(subscription)
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._loop = self._wakeup = self._task = None
+        self._last_version = None
+        self._sent.clear()
+
+    def subscribe(self, product_ids=(), categories=()) -> Subscription:
+        if len(self._subscriptions) >= self.max_subscriptions:
+            raise HTTPException(status_code=503, detail="Too many open streams, try again later.")
+        subscription = Subscription(product_ids, categories)
+        self._subscriptions.add(subscription)
+        for product_id in subscription.product_ids:
+            self._by_product[product_id].add(subscription)
+        for category in subscription.categories:
+            self._by_category[category].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscription.close()
+        self._subscriptions.discard(subscription)
+        for index, keys in ((self._by_product, subscription.product_ids), (self._by_category, subscription.categories)):
+            for key in keys:
+                subscribers = index.get(key)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del index[key]
+
+    def publish(self, changes):
+        """Commit listener; may run on a threadpool worker, so it only hands the ids over to the loop."""
+        loop = self._loop
+        if loop is None or not self._subscriptions:
+            return
+        products = [(id, operation) for entity, id, operation in changes if entity == "product"]
+        if products:
+            try:
+                loop.call_soon_threadsafe(self._enqueue, products)
+            except RuntimeError:
+                pass  # loop already closed
+
+    def _enqueue(self, products):
+        for id, operation in products:
+            self._pending[id] = operation
+        self._wakeup.set()
+
+    async def _publish_loop(self):
+        next_poll = monotonic()
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), max(0, next_poll - monotonic()))
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            pending, self._pending = self._pending, {}
+            try:
+                if monotonic() >= next_poll:
+                    next_poll = monotonic() + self.poll_interval
+                    pending = {**await run_in_threadpool(self._poll), **pending}
+                if pending:
+                    await self.dispatch(pending)
+            except Exception as e:
+                print(f"Error publishing live product changes: {e}")
+
+    def _poll(self) -> dict:
+        """{id: operation} of the product changes committed (by any process) since the last poll."""
+        if not self._subscriptions:
+            # Nobody to notify: start from the current version when someone subscribes
+            self._last_version = None
+            return {}
+        with self.session_factory() as db:
+            if self._last_version is None:
+                self._last_version = db.scalar(select(func.max(ChangeLog.version))) or 0
+                return {}
+            changes = {}
+            while True:
+                rows = db.execute(
+                    select(ChangeLog.version, ChangeLog.entity_id, ChangeLog.operation)
+                    .filter(
+                        ChangeLog.version > self._last_version,
+                        ChangeLog.entity == "product",
+                        ChangeLog.changed_at <= datetime.now() - timedelta(seconds=self.safety_lag),
+                    )
+                    .order_by(ChangeLog.version)
+                    .limit(LIVE_POLL_BATCH)
+                ).all()
+                for row in rows:
+                    changes[row.entity_id] = row.operation
+                if rows:
+                    self._last_version = rows[-1].version
+                if len(rows) < LIVE_POLL_BATCH:
+                    return changes
+
+    async def dispatch(self, pending: dict):
+        """Sends one message per changed product: `product` with its current price and stock, or `delete`."""
+        ids = list(pending) if self._by_category else [id for id in pending if id in self._by_product]
+        upserted = [id for id in ids if pending[id] != DELETE]
+        rows = await run_in_threadpool(self._load, upserted) if upserted else {}
+        for id in ids:
+            row = rows.get(id)
+            # The category of a deleted row is unknown here, so category streams get every delete
+            message = sse_message("delete", {"id": id}) if row is None else sse_message("product", row)
+            if self._sent.get(id) == message:
+                continue  # already sent by the commit shortcut, now seen again by the poll
+            self._sent.set(id, message)
+            self._fan_out(message, id, row["category_name"] if row is not None else None)
+
+    def _load(self, ids) -> dict:
+        with self.session_factory() as db:
+            return {row.id: row._asdict() for row in db.execute(select(*LIVE_FIELDS).where(Product.id.in_(ids)))}
+
+    def _fan_out(self, message: bytes, product_id: str, category: str = None):
+        targets = set(self._by_product.get(product_id, ()))
+        if category is not None:
+            targets.update(self._by_category.get(category, ()))
+        else:
+            for subscribers in self._by_category.values():
+                targets.update(subscribers)
+        for subscription in targets:
+            subscription.send(message)
+            if subscription.closed:
+                self.unsubscribe(subscription)
+
+    async def stream(self, subscription: Subscription, heartbeat: float = LIVE_HEARTBEAT_SEC):
+        """SSE body for one subscription; the comment lines keep proxies from closing idle streams."""
+        try:
+            yield b"retry: 3000\n\n"
+            while True:
+                try:
+                    message = await asyncio.wait_for(subscription.queue.get(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield b": ping\n\n"
+                    continue
+                if message is None:
+                    return
+                yield message
+        finally:
+            self.unsubscribe(subscription)
+
+    def stats(self) -> dict:
+        return {
+            "subscriptions": len(self._subscriptions),
+            "products": len(self._by_product),
+            "categories": len(self._by_category),
+        }
+
+live_products = LiveProductHub()
+on_commit(live_products.publish)
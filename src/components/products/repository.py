@@ -1,32 +1,175 @@
 from fastapi import HTTPException
 from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session, joinedload
-from db_config.db_tables import Product, ProductImages, SizesLookup, product_sizes_association
+from sqlalchemy import select, update, delete, text, or_, func, case
+from sqlalchemy.orm import Session, selectinload, make_transient_to_detached
+from db_config.db_tables import Product, ProductImages, SizesLookup, product_sizes_association, PRODUCTS_SEARCH_CONFIG, PRODUCTS_SEARCH_VECTOR
+from db_config.enums import ProductSizes
+from db_config.lookups import lookups
+from db_config.change_tracking import record_changes
+from src.utils.pagination import DEFAULT_PAGE_SIZE, keyset_paginate, keyset_page
+from .schemas import ProductFilter, ProductReq, ProductUpdateRequest, ProductResponse
+from .cache import MISSING, get_cached, cache_product, invalidate_product, generation as cache_generation
 import uuid
+import re
+
+# Every read path loads the relationships ProductResponse serializes with one extra
+# SELECT ... IN per relationship, instead of one lazy load per product
+PRODUCT_RELATIONS = (selectinload(Product.images), selectinload(Product.sizes))
+
+SORT_COLUMNS = {
+    "id": Product.id,
+    "name": Product.name,
+    "price": Product.price,
+    "stock": Product.stock,
+}
+
+POSTGRES_SEARCH = text(f"""
+    SELECT products.id FROM products, to_tsquery('{PRODUCTS_SEARCH_CONFIG}', :query) AS query
+    WHERE {PRODUCTS_SEARCH_VECTOR} @@ query
+    ORDER BY ts_rank_cd({PRODUCTS_SEARCH_VECTOR}, query) DESC, products.id
+    LIMIT :limit OFFSET :offset
+""")
+SQLITE_SEARCH = text("""
+    SELECT products_search_keys.product_id FROM products_fts JOIN products_search_keys ON products_search_keys.id = products_fts.rowid
+    WHERE products_fts MATCH :query
+    ORDER BY bm25(products_fts), products_search_keys.product_id
+    LIMIT :limit OFFSET :offset
+""")
+
+def search_terms(q: str) -> list:
+    return re.findall(r"\w+", q.lower())
+
+def product_filters(filters: ProductFilter, exclude: str = None) -> list:
+    """WHERE clauses for the filter; `exclude` leaves one facet out so its own counts stay disjunctive."""
+    clauses = []
+    if exclude != "price":
+        if filters.min_price is not None:
+            clauses.append(Product.price >= filters.min_price)
+        if filters.max_price is not None:
+            clauses.append(Product.price <= filters.max_price)
+    if exclude != "brands" and filters.brands:
+        clauses.append(Product.brand.in_(filters.brands))
+    if exclude != "categories" and filters.categories:
+        clauses.append(Product.category_name.in_(filters.categories))
+    if exclude != "in_stock" and filters.in_stock is not None:
+        clauses.append(Product.stock > 0 if filters.in_stock else Product.stock <= 0)
+    if exclude != "sizes" and filters.sizes:
+        size_keys = [size.name for size in ProductSizes if size.value in filters.sizes]
+        clauses.append(Product.sizes.any(SizesLookup.size.in_(size_keys)))
+    return clauses
+
+def products_page_query(stmt, limit: int, cursor: str = None, sort_by: str = "id", order: str = "asc"):
+    return keyset_paginate(stmt, sort_by, SORT_COLUMNS[sort_by], Product.id, limit, cursor, descending=order == "desc")
 
 class ProductModel:
     def __init__(self, db: Session):
         self.db = db
     
-    async def get_all_products(self):
+    def get_all_products(self, limit: int = DEFAULT_PAGE_SIZE, cursor: str = None, sort_by: str = "id", order: str = "asc"):
+        stmt = products_page_query(select(Product).options(*PRODUCT_RELATIONS), limit, cursor, sort_by, order)
         try:
-            return self.db.query(Product).options(joinedload(Product.sizes)).all()
+            rows = self.db.scalars(stmt).all()
         except Exception as e:
             raise HTTPException(status_code=404, detail=f"Not products found: {e}")
-    def get_products_by_category(self, category: str) -> list:
+        return keyset_page(rows, sort_by, limit)
+
+    def get_products_by_category(self, category: str, limit: int = DEFAULT_PAGE_SIZE, cursor: str = None, sort_by: str = "id", order: str = "asc"):
+        stmt = products_page_query(select(Product).options(*PRODUCT_RELATIONS).filter(Product.category_name==category), limit, cursor, sort_by, order)
         try:
-            return self.db.query(Product).filter(Product.category_name==category).all()
+            rows = self.db.scalars(stmt).all()
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error getting product by category in repository: {e}")
+        return keyset_page(rows, sort_by, limit)
+    def search_products(self, q: str, limit: int = DEFAULT_PAGE_SIZE, offset: int = 0) -> list:
+        """Ranked prefix search over name, brand and description using the full text index of the database."""
+        terms = search_terms(q)
+        if not terms:
+            return []
+        dialect = self.db.get_bind().dialect.name
+        try:
+            if dialect == "postgresql":
+                query = " & ".join(f"{term}:*" for term in terms)
+                ids = self.db.scalars(POSTGRES_SEARCH, {"query": query, "limit": limit, "offset": offset}).all()
+            elif dialect == "sqlite":
+                query = " ".join(f'"{term}"*' for term in terms)
+                ids = self.db.scalars(SQLITE_SEARCH, {"query": query, "limit": limit, "offset": offset}).all()
+            else:
+                stmt = select(Product.id).order_by(Product.name, Product.id).limit(limit).offset(offset)
+                for term in terms:
+                    pattern = f"%{term}%"
+                    stmt = stmt.filter(or_(Product.name.ilike(pattern), Product.brand.ilike(pattern), Product.description.ilike(pattern)))
+                ids = self.db.scalars(stmt).all()
+            if not ids:
+                return []
+            found = {product.id: product for product in self.db.scalars(select(Product).options(*PRODUCT_RELATIONS).filter(Product.id.in_(ids)))}
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error searching products in repository: {e}")
+        return [found[id] for id in ids if id in found]
+
+    def filter_products(self, filters: ProductFilter, limit: int = DEFAULT_PAGE_SIZE, cursor: str = None, sort_by: str = "id", order: str = "asc"):
+        """One page of matching products plus the facet counts, in a fixed number of queries."""
+        stmt = products_page_query(select(Product).options(*PRODUCT_RELATIONS).filter(*product_filters(filters)), limit, cursor, sort_by, order)
+        try:
+            items, next_cursor = keyset_page(self.db.scalars(stmt).all(), sort_by, limit)
+            facets = {
+                "brands": self._count_by(Product.brand, filters, "brands"),
+                "categories": self._count_by(Product.category_name, filters, "categories"),
+                "sizes": self._count_sizes(filters),
+                "in_stock": self._count_in_stock(filters),
+                "price": self._price_range(filters),
+            }
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error filtering products in repository: {e}")
+        return items, next_cursor, facets
+
+    def _count_by(self, column, filters: ProductFilter, facet: str) -> dict:
+        stmt = select(column, func.count()).filter(*product_filters(filters, exclude=facet)).group_by(column)
+        return {value: count for value, count in self.db.execute(stmt) if value is not None}
+
+    def _count_sizes(self, filters: ProductFilter) -> dict:
+        stmt = (
+            select(SizesLookup.size, func.count(func.distinct(Product.id)))
+            .join(product_sizes_association, product_sizes_association.c.size_id == SizesLookup.id)
+            .join(Product, Product.id == product_sizes_association.c.product_id)
+            .filter(*product_filters(filters, exclude="sizes"))
+            .group_by(SizesLookup.size)
+        )
+        return {ProductSizes[key].value: count for key, count in self.db.execute(stmt) if key in ProductSizes.__members__}
+
+    def _count_in_stock(self, filters: ProductFilter) -> dict:
+        in_stock = func.coalesce(func.sum(case((Product.stock > 0, 1), else_=0)), 0)
+        stmt = select(in_stock, func.count()).filter(*product_filters(filters, exclude="in_stock"))
+        available, total = self.db.execute(stmt).one()
+        return {"true": available, "false": total - available}
+
+    def _price_range(self, filters: ProductFilter) -> dict:
+        stmt = select(func.min(Product.price), func.max(Product.price)).filter(*product_filters(filters, exclude="price"))
+        minimum, maximum = self.db.execute(stmt).one()
+        return {"min": minimum, "max": maximum}
+
     def get_product_by_name(self, name: str):
+        """Cached read: returns a ProductResponse snapshot (or None)."""
+        cached = get_cached(("name", name))
+        if cached is not MISSING:
+            return cached
+        generation = cache_generation()
         try:
-            return self.db.query(Product).filter(Product.name==name).first()
+            product = self.db.query(Product).options(*PRODUCT_RELATIONS).filter(Product.name==name).first()
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error getting product by name in repository: {e}")
+        return cache_product(("name", name), product, generation)
     
     def get_product_by_id(self, id: str):
+        """Cached read: returns a ProductResponse snapshot (or None). Use get_product to modify it."""
+        cached = get_cached(("id", id))
+        if cached is not MISSING:
+            return cached
+        generation = cache_generation()
+        return cache_product(("id", id), self.get_product(id), generation)
+
+    def get_product(self, id: str):
         try:
-            return self.db.query(Product).filter(Product.id==id).first()
+            return self.db.query(Product).options(*PRODUCT_RELATIONS).filter(Product.id==id).first()
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error getting product by id in repository: {e}")
 
@@ -36,86 +179,141 @@ class ProductModel:
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"ERROR GETTING PRODUCT SIZES IN REPOSITORY: {e}")
         
-    def create_product(self, new_product):
-        try:
-            self.db.add(new_product)
-            self.db.commit()           
-        except Exception as err:
-            self.db.rollback()
-            raise HTTPException(status_code=500, detail=f'Could not create product "{new_product.name}": {err}')
-        return JSONResponse(status_code=200, content=f"Product {new_product.name} created successfully")
-    
-    def get_lookup_sizes(self, sizes):
-        try:
-            return self.db.query(SizesLookup).filter(SizesLookup.size.in_(sizes)).all()
-        except Exception as e:
-            self.db.rollback()
-            raise HTTPException(status_code=500, detail=f"COULDN'T GET PRODUCT SIZES: {e}")
-
-    def save_product_image_url(self, image):
+    def delete_product(self, id):
+        to_delete = self.db.query(Product).filter(Product.id==id).first()
+        if not to_delete:
+            raise HTTPException(status_code=404, detail="Product not found")
         try:
-            self.db.add(image)
+            self.db.delete(to_delete)
             self.db.commit()
         except Exception as e:
             self.db.rollback()
-            raise HTTPException(status_code=500, detail=f"Couldn't save product image: {e}")
-    
-    def update_product(self, product_id: str, data: dict):
-        try:
-            product = self.db.query(Product).filter(Product.id == product_id).one()
-        except Exception as e:
-            raise HTTPException(status_code=404, detail=f"PRODUCT NOT FOUND IN REPOSITORY: {e.args[0]}")
-        
-        for key, value in data.items():
-            if key != "images" and key != "sizes":
-                setattr(product, key, value)
+            raise HTTPException(status_code=500, detail=f"Couldn't delete product: {e}")
+        invalidate_product(to_delete.id, to_delete.name)
+        return JSONResponse(status_code=200, content=f"Product {to_delete.name} deleted successfully")
 
-        self.db.commit()
-        self.db.refresh(product)
-        return product
-    
-    def update_product_image(self, product_id: str, image: ProductImages):
+    def batch_update_products(self, patches: list) -> list:
+        """Applies partial updates (dicts with "id" plus the changed columns) with one executemany UPDATE by primary key.
+
+        Invalid items (unknown id or category, duplicated name) are reported and skipped; the rest commit together.
+        """
+        ids = [patch["id"] for patch in patches]
+        names = {patch["name"] for patch in patches if patch.get("name")}
+        categories = {patch["category_name"] for patch in patches if patch.get("category_name")}
         try:
-            product = self.db.query(Product).filter(Product.id == product_id).one()
+            current_names = dict(self.db.execute(select(Product.id, Product.name).filter(Product.id.in_(ids))).all())
+            taken_names = dict(self.db.execute(select(Product.name, Product.id).filter(Product.name.in_(names))).all()) if names else {}
+            known_categories = {name for name in categories if lookups.category_id(self.db, name) is not None}
         except Exception as e:
-            raise HTTPException(status_code=500, detail=f"ERROR RETRIEVING PRODUCT: {e}")
-        
-        current_image = self.db.query(ProductImages).filter(ProductImages.id == image.id).first()
-        
-        if not current_image:
-            raise HTTPException(status_code=404, detail="PRODUCT IMAGE REGISTER NOT FOUND")
+            raise HTTPException(status_code=500, detail=f"Error loading products to update: {e}")
 
-        if current_image.url != image.url:
-            current_image.url = image.url
-            
+        results, rows, seen = [], [], set()
+        for patch in patches:
+            product_id, name = patch["id"], patch.get("name")
+            if product_id not in current_names:
+                results.append({"id": product_id, "status": "not_found"})
+            elif product_id in seen:
+                results.append({"id": product_id, "status": "error", "detail": "Product id repeated in the batch"})
+            elif name and taken_names.setdefault(name, product_id) != product_id:
+                results.append({"id": product_id, "status": "error", "detail": f'Product name "{name}" already exists'})
+            elif patch.get("category_name") and patch["category_name"] not in known_categories:
+                results.append({"id": product_id, "status": "error", "detail": f'Category "{patch["category_name"]}" not found'})
+            else:
+                seen.add(product_id)
+                rows.append(patch)
+                results.append({"id": product_id, "status": "updated"})
+        if rows:
             try:
-                self.db.commit()  
-                self.db.refresh(product)
+                self.db.execute(update(Product), rows)
+                record_changes(self.db, "product", upserted=[row["id"] for row in rows])
+                self.db.commit()
             except Exception as e:
                 self.db.rollback()
-                raise HTTPException(status_code=500, detail=f"ERROR UPDATING PRODUCT IMAGE: {e}")
-        
-        return product
+                raise HTTPException(status_code=500, detail=f"Couldn't update products: {e}")
+            for row in rows:
+                invalidate_product(row["id"], current_names[row["id"]], *filter(None, [row.get("name")]))
+        return results
 
-    def delete_product(self, id):
-        to_delete = self.db.query(Product).filter(Product.id==id).first()
-        if not to_delete:
-            raise HTTPException(status_code=404, detail="Product not found")
+    def batch_delete_products(self, ids: list) -> list:
+        """Deletes the products, their images and size links with one DELETE ... IN per table."""
         try:
-            self.db.delete(to_delete)
+            found = dict(self.db.execute(select(Product.id, Product.name).filter(Product.id.in_(ids))).all())
+            if found:
+                self.db.execute(delete(ProductImages).filter(ProductImages.product_id.in_(found)))
+                self.db.execute(delete(product_sizes_association).where(product_sizes_association.c.product_id.in_(found)))
+                self.db.execute(delete(Product).filter(Product.id.in_(found)))
+                record_changes(self.db, "product", deleted=found)
+                self.db.commit()
+        except Exception as e:
+            self.db.rollback()
+            raise HTTPException(status_code=500, detail=f"Couldn't delete products: {e}")
+        for product_id, name in found.items():
+            invalidate_product(product_id, name)
+        return [{"id": id, "status": "deleted" if id in found else "not_found"} for id in ids]
+
+    # ==================================
+    #     SINGLE TRANSACTION WRITES
+    # ==================================
+
+    def _lookup_sizes(self, values: list) -> list:
+        """SizesLookup rows from the lookup registry, attached to the session without a query."""
+        sizes = []
+        for key, id in lookups.sizes(self.db, values):
+            size = SizesLookup(id=id, size=key)
+            make_transient_to_detached(size)
+            sizes.append(self.db.merge(size, load=False))
+        return sizes
+
+    def save_new_product(self, data: ProductReq) -> str:
+        """Product, images and size links are flushed together and committed once."""
+        product_id = str(uuid.uuid4())
+        try:
+            product = Product(
+                id=product_id,
+                **data.model_dump(exclude={"images", "sizes"}, exclude_none=True),
+                sizes=self._lookup_sizes(data.sizes),
+                images=[ProductImages(id=str(uuid.uuid4()), url=url) for url in data.images or []],
+            )
+            self.db.add(product)
             self.db.commit()
         except Exception as e:
             self.db.rollback()
-            raise HTTPException(status_code=500, detail=f"Couldn't delete product: {e}")
-        return JSONResponse(status_code=200, content=f"Product {to_delete.name} deleted successfully")
+            raise HTTPException(status_code=500, detail=f'Could not create product "{data.name}": {e}')
+        invalidate_product(product_id, data.name)
+        return product_id
 
-    def delete_product_image(self, id):
-        to_delete = self.db.query(ProductImages).filter(ProductImages.id==id).first()
-        if not to_delete:
-            raise HTTPException(status_code=404, detail="Product image not found")
+    def save_product_changes(self, product_id: str, updates: ProductUpdateRequest) -> ProductResponse:
+        """Applies the columns plus a set based diff of images (by id) and sizes, then commits once.
+        Omitted (or null) fields are left as they are."""
+        product = self.get_product(product_id)
+        if not product:
+            raise HTTPException(status_code=404, detail="Product not found.")
+        previous_name = product.name
         try:
-            self.db.delete(to_delete)
+            for key, value in updates.model_dump(exclude={"id", "images", "sizes"}, exclude_none=True).items():
+                setattr(product, key, value)
+
+            if "sizes" in updates.model_fields_set and updates.sizes is not None:
+                wanted = {id for _, id in lookups.sizes(self.db, updates.sizes)}
+                if wanted != {size.id for size in product.sizes}:
+                    product.sizes = self._lookup_sizes(updates.sizes)
+
+            if "images" in updates.model_fields_set and updates.images is not None:
+                current = {image.id: image for image in product.images}
+                incoming = {image.id: image for image in updates.images}
+                for image in list(product.images):
+                    if image.id not in incoming:
+                        product.images.remove(image)
+                for image_id, image in incoming.items():
+                    if image_id not in current:
+                        product.images.append(ProductImages(id=image_id or str(uuid.uuid4()), url=image.url))
+                    elif current[image_id].url != image.url:
+                        current[image_id].url = image.url
+
             self.db.commit()
         except Exception as e:
             self.db.rollback()
-            raise HTTPException(status_code=500, detail=f"Couldn't delete product image: {e}")
\ No newline at end of file
+            raise HTTPException(status_code=500, detail=f"Couldn't update product: {e}")
+        invalidate_product(product_id, previous_name, updates.name)
+        generation = cache_generation()
+        return cache_product(("id", product_id), self.get_product(product_id), generation)
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, model_validator, Field
-from typing import List
+from typing import List, Dict, Optional, Literal
 from datetime import datetime
 
 class ProductImage(BaseModel):
@@ -38,11 +38,12 @@ class ProductUpdateRequest(BaseModel):
     description: str = None
     category_name: str = None
     sizes: List[str] = None
-    images: List[ProductImage] = Field(default_factory=list)
+    images: List[ProductImage] = None
     @model_validator(mode='after')
     def check_category(self):
-        if self.category_name is None or self.category_name == 'string':
-            self.category_name = 'Todos'
+        # Omitted fields keep their current value, so unlike ProductReq there is no default category
+        if self.category_name == 'string':
+            self.category_name = None
         return self
 
 class ProductResponse(BaseModel):
@@ -54,4 +55,41 @@ class ProductResponse(BaseModel):
     description: str
     category_name: str
     sizes: List[SizeResponse] = None
-    images: List[ProductImage]
\ No newline at end of file
+    images: List[ProductImage]
+class ProductFilter(BaseModel):
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+    sizes: Optional[List[str]] = None
+    brands: Optional[List[str]] = None
+    categories: Optional[List[str]] = None
+    in_stock: Optional[bool] = None
+
+class PriceRange(BaseModel):
+    min: Optional[float] = None
+    max: Optional[float] = None
+
+class ProductFacets(BaseModel):
+    brands: Dict[str, int]
+    categories: Dict[str, int]
+    sizes: Dict[str, int]
+    in_stock: Dict[str, int]
+    price: PriceRange
+
+class ProductFilterResponse(BaseModel):
+    items: List[ProductResponse]
+    facets: ProductFacets
+    next_cursor: Optional[str] = None
+
+class ProductPatch(BaseModel):
+    id: str
+    name: Optional[str] = None
+    price: Optional[float] = None
+    stock: Optional[int] = None
+    brand: Optional[str] = None
+    description: Optional[str] = None
+    category_name: Optional[str] = None
+
+class BatchItemResult(BaseModel):
+    id: str
+    status: Literal["updated", "deleted", "not_found", "error"]
+    detail: Optional[str] = None
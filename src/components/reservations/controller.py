@@ -0,0 +1,38 @@
+from fastapi import APIRouter, Depends
+from typing import Annotated
+from sqlalchemy.orm import Session
+
+from src.utils.roles import roles_required, CurrentUser
+from src.components.auth.controller import oauth2_scheme
+from db_config.enums import UserRole
+from db_config.db_connection import get_db, repository, run_db
+from .repository import ReservationRepository
+from .schemas import ReservationReq, ReservationRes
+
+ADMIN, USER = UserRole.admin, UserRole.user
+
+reservations_router = APIRouter(
+    prefix="/reservations",
+    tags=["Reservations"],
+    )
+
+def user_role_required(token: Annotated[str, Depends(oauth2_scheme)], db: Session = Depends(get_db)) -> CurrentUser:
+    return roles_required([ADMIN, USER], token, db=db)
+
+def owner_filter(user: CurrentUser):
+    """Admins can commit or release any hold; users only their own."""
+    return None if user.role == ADMIN else user.user_id
+
+Reservations = Annotated[ReservationRepository, Depends(repository(ReservationRepository))]
+
+@reservations_router.post("/", status_code=201)
+async def reserve_stock(data: ReservationReq, reservations: Reservations, user: CurrentUser = Depends(user_role_required)) -> ReservationRes:
+    return await run_db(reservations.reserve, user.user_id, data.product_id, data.quantity, data.ttl_sec)
+
+@reservations_router.post("/{reservation_id}/commit")
+async def commit_reservation(reservation_id: str, reservations: Reservations, user: CurrentUser = Depends(user_role_required)) -> ReservationRes:
+    return await run_db(reservations.commit_reservation, reservation_id, owner_filter(user))
+
+@reservations_router.post("/{reservation_id}/release")
+async def release_reservation(reservation_id: str, reservations: Reservations, user: CurrentUser = Depends(user_role_required)) -> ReservationRes:
+    return await run_db(reservations.release_reservation, reservation_id, owner_filter(user))
@@ -0,0 +1,173 @@
+from fastapi import HTTPException
+from sqlalchemy import select, update, bindparam, func
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
+from collections import Counter
+from dotenv import load_dotenv
+from os import getenv
+import uuid
+
+from db_config.db_tables import Product, StockReservation, User
+from db_config.enums import ReservationStatus
+from db_config.change_tracking import record_changes
+from src.components.products.cache import invalidate_product
+from .schemas import ReservationRes
+
+load_dotenv()
+
+RESERVATION_TTL_SEC = int(getenv("RESERVATION_TTL_SEC", 900))
+# Live holds a user can have at once, so one account can't take a product's whole stock off sale
+RESERVATION_MAX_ACTIVE = int(getenv("RESERVATION_MAX_ACTIVE", 5))
+HELD = ReservationStatus.held.value
+
+# Every stock change is a single conditional UPDATE: it only locks the product's row,
+# and the WHERE clause re-checked under that lock is what prevents overselling.
+NO_SYNC = {"synchronize_session": False}
+
+
+class ReservationRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def reserve(self, user_id: str, product_id: str, quantity: int, ttl_sec: int = None) -> ReservationRes:
+        reservation = StockReservation(
+            id=str(uuid.uuid4()),
+            product_id=product_id,
+            user_id=user_id,
+            quantity=quantity,
+            status=HELD,
+            expires_at=datetime.now() + timedelta(seconds=ttl_sec or RESERVATION_TTL_SEC),
+        )
+        try:
+            # Serializes the reservations of one user (a no-op on SQLite, where the UPDATE below already
+            # serializes writers), so concurrent requests can't both pass the active holds check
+            self.db.execute(select(User.user_id).where(User.user_id == user_id).with_for_update())
+            decremented = self.db.execute(
+                update(Product)
+                .where(Product.id == product_id, Product.stock >= quantity)
+                .values(stock=Product.stock - quantity)
+                .execution_options(**NO_SYNC)
+            ).rowcount
+            active = self.db.scalar(
+                select(func.count()).select_from(StockReservation)
+                .where(StockReservation.user_id == user_id, StockReservation.status == HELD, StockReservation.expires_at > datetime.now())
+            ) if decremented else 0
+            if active >= RESERVATION_MAX_ACTIVE:
+                self.db.rollback()
+            elif decremented:
+                self.db.add(reservation)
+                record_changes(self.db, "product", upserted=[product_id])
+                self.db.commit()
+            else:
+                self.db.rollback()
+                stock = self.db.scalar(select(Product.stock).where(Product.id == product_id))
+        except Exception as e:
+            self.db.rollback()
+            raise HTTPException(status_code=500, detail=f"Error reserving stock: {e}")
+        if active >= RESERVATION_MAX_ACTIVE:
+            raise HTTPException(status_code=429, detail=f"Too many active reservations: at most {RESERVATION_MAX_ACTIVE}.")
+        if not decremented:
+            if stock is None:
+                raise HTTPException(status_code=404, detail="Product not found.")
+            raise HTTPException(status_code=409, detail=f"Not enough stock: {stock} units available.")
+        invalidate_product(product_id)
+        return ReservationRes.model_validate(reservation, from_attributes=True)
+
+    def commit_reservation(self, reservation_id: str, user_id: str = None) -> ReservationRes:
+        """Turns a live hold into a sale; the stock was already taken when the hold was created.
+        With a `user_id` only that user's holds can be committed (None is for admins)."""
+        self._check_owner(reservation_id, user_id)
+        try:
+            committed = self.db.execute(
+                update(StockReservation)
+                .where(StockReservation.id == reservation_id, StockReservation.status == HELD, StockReservation.expires_at > datetime.now())
+                .values(status=ReservationStatus.committed.value)
+                .execution_options(**NO_SYNC)
+            ).rowcount
+            self.db.commit()
+        except Exception as e:
+            self.db.rollback()
+            raise HTTPException(status_code=500, detail=f"Error committing reservation: {e}")
+        return self._result(reservation_id, committed)
+
+    def release_reservation(self, reservation_id: str, user_id: str = None) -> ReservationRes:
+        self._check_owner(reservation_id, user_id)
+        try:
+            reservation = self.db.get(StockReservation, reservation_id)
+            released = reservation is not None and self._give_back(reservation, ReservationStatus.released)
+            product_id = reservation.product_id if released else None
+            self.db.commit()
+        except Exception as e:
+            self.db.rollback()
+            raise HTTPException(status_code=500, detail=f"Error releasing reservation: {e}")
+        if released:
+            invalidate_product(product_id)
+        return self._result(reservation_id, released)
+
+    def expire_reservations(self, batch_size: int = 500) -> int:
+        """Gives back the stock of abandoned holds, `batch_size` per transaction. Returns how many expired."""
+        expired = 0
+        while True:
+            try:
+                reservations = self.db.scalars(
+                    select(StockReservation)
+                    .where(StockReservation.status == HELD, StockReservation.expires_at <= datetime.now())
+                    .order_by(StockReservation.expires_at)
+                    .limit(batch_size)
+                ).all()
+                restored = Counter()
+                for reservation in reservations:
+                    if self._give_back(reservation, ReservationStatus.expired, restock=False):
+                        restored[reservation.product_id] += reservation.quantity
+                        expired += 1
+                if restored:
+                    self._restock(restored)
+                self.db.commit()
+            except Exception as e:
+                self.db.rollback()
+                raise HTTPException(status_code=500, detail=f"Error expiring reservations: {e}")
+            for product_id in restored:
+                invalidate_product(product_id)
+            if len(reservations) < batch_size:
+                return expired
+
+    def _give_back(self, reservation: StockReservation, status: ReservationStatus, restock: bool = True) -> bool:
+        """Moves a hold out of "held"; only the caller whose UPDATE wins returns the units to the product."""
+        changed = self.db.execute(
+            update(StockReservation)
+            .where(StockReservation.id == reservation.id, StockReservation.status == HELD)
+            .values(status=status.value)
+            .execution_options(**NO_SYNC)
+        ).rowcount
+        if changed and restock:
+            self._restock({reservation.product_id: reservation.quantity})
+        return bool(changed)
+
+    def _restock(self, quantities: dict):
+        products = Product.__table__
+        self.db.execute(
+            update(products).where(products.c.id == bindparam("product_id")).values(stock=products.c.stock + bindparam("quantity")),
+            [{"product_id": product_id, "quantity": quantity} for product_id, quantity in quantities.items()],
+        )
+        record_changes(self.db, "product", upserted=quantities)
+
+    def _check_owner(self, reservation_id: str, user_id: str = None):
+        if user_id is None:
+            return
+        try:
+            owner = self.db.scalar(select(StockReservation.user_id).where(StockReservation.id == reservation_id))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error getting reservation: {e}")
+        if owner is None:
+            raise HTTPException(status_code=404, detail="Reservation not found.")
+        if owner != user_id:
+            raise HTTPException(status_code=403, detail="Access denied")
+
+    def _result(self, reservation_id: str, changed: bool) -> ReservationRes:
+        reservation = self.db.get(StockReservation, reservation_id, populate_existing=True)
+        if reservation is None:
+            raise HTTPException(status_code=404, detail="Reservation not found.")
+        if not changed:
+            status = ReservationStatus.expired.value if reservation.status == HELD else reservation.status
+            raise HTTPException(status_code=409, detail=f"Reservation is already {status}.")
+        return ReservationRes.model_validate(reservation, from_attributes=True)
@@ -0,0 +1,22 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+from datetime import datetime
+from dotenv import load_dotenv
+from os import getenv
+
+load_dotenv()
+
+RESERVATION_MAX_QUANTITY = int(getenv("RESERVATION_MAX_QUANTITY", 10))
+RESERVATION_MAX_TTL_SEC = int(getenv("RESERVATION_MAX_TTL_SEC", 900))
+
+class ReservationReq(BaseModel):
+    product_id: str
+    quantity: int = Field(gt=0, le=RESERVATION_MAX_QUANTITY)
+    ttl_sec: Optional[int] = Field(None, ge=1, le=RESERVATION_MAX_TTL_SEC)
+
+class ReservationRes(BaseModel):
+    id: str
+    product_id: str
+    quantity: int
+    status: str
+    expires_at: datetime
@@ -0,0 +1,24 @@
+from fastapi.concurrency import run_in_threadpool
+from dotenv import load_dotenv
+from os import getenv
+import asyncio
+
+from db_config.db_connection import Session as SessionLocal
+from .repository import ReservationRepository
+
+load_dotenv()
+
+RESERVATION_SWEEP_INTERVAL = float(getenv("RESERVATION_SWEEP_INTERVAL", 30))
+
+def expire_reservations(session_factory=SessionLocal) -> int:
+    with session_factory() as db:
+        return ReservationRepository(db).expire_reservations()
+
+async def sweep_reservations(interval: float = RESERVATION_SWEEP_INTERVAL):
+    """Background task started with the app: returns the stock of expired holds every `interval` seconds."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await run_in_threadpool(expire_reservations)
+        except Exception as e:
+            print(f"Error sweeping expired reservations: {e}")
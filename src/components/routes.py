@@ -4,6 +4,10 @@ from src.components.users.controller import  users_router
 from src.components.categories.controller import  categories_router
 from src.components.carousel.controller import  carousel_router
 from src.components.auth.controller import  auth_router
+from src.components.metrics.controller import  metrics_router
+from src.components.reservations.controller import  reservations_router
+from src.components.changes.controller import  changes_router
+from src.components.images.controller import  images_router
 
 router = APIRouter()
 
@@ -11,4 +15,8 @@ router.include_router(products_router)
 router.include_router(users_router)
 router.include_router(carousel_router)
 router.include_router(categories_router)
-router.include_router(auth_router)
\ No newline at end of file
+router.include_router(auth_router)
+router.include_router(metrics_router)
+router.include_router(reservations_router)
+router.include_router(changes_router)
+router.include_router(images_router)
\ No newline at end of file
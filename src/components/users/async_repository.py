@@ -0,0 +1,92 @@
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from sqlalchemy import select, update, delete
+from typing import Dict
+from pydantic import EmailStr
+
+from db_config.async_repository import AsyncRepository
+from db_config.db_tables import User, ResetPasswordToken
+from .repository import UserRepository
+from .cache import invalidate_principal
+
+class AsyncUserRepository(AsyncRepository):
+    sync_repository = UserRepository
+
+    async def get_all_users(self):
+        try:
+            result = await self.db.scalars(select(User))
+            return result.all()
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error getting all users in repository: {e}")
+
+    async def get_user_by_confirmation_code(self, code):
+        try:
+            result = await self.db.scalars(select(User).filter(User.confirmation_code == code))
+            return result.first()
+        except Exception as e:
+            await self.db.rollback()
+            raise HTTPException(status_code=404, detail=f"User with code {code} not found in repository: {e}")
+
+    async def create_user(self, user: User):
+        try:
+            self.db.add(user)
+            await self.db.commit()
+            invalidate_principal(user.user_id)
+        except Exception as e:
+            await self.db.rollback()
+            raise HTTPException(status_code=500, detail=f"Error creating user in repository: {e}")
+        return JSONResponse(status_code=200, content={"message": f"User {user.email} created successfully."})
+
+    async def get_user_by_id(self, user_id: str):
+        try:
+            return await self.db.get(User, user_id)
+        except Exception as e:
+            raise HTTPException(status_code=404, detail=f"User not found: {e}")
+
+    async def get_user_by_email(self, email: EmailStr):
+        try:
+            result = await self.db.scalars(select(User).filter(User.email==email))
+            return result.first()
+        except Exception as e:
+            raise HTTPException(status_code=404, detail=f"User with email {email} not found: {e}")
+
+    async def update_user(self, id: str, data: Dict):
+        try:
+            await self.db.execute(update(User).filter(User.user_id == id).values(data))
+            await self.db.commit()
+            invalidate_principal(id)
+            updated_user: User = await self.get_user_by_id(id)
+            if updated_user:
+                await self.db.refresh(updated_user)
+                return JSONResponse(status_code=200, content={"message": f"User {updated_user.name} updated successfully."})
+            else:
+                raise HTTPException(status_code=404, detail=f"User with id {id} not found.")
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error updating user in repository: {e}")
+
+    async def save_reset_password_token(self, reset_password_token: ResetPasswordToken):
+        try:
+            self.db.add(reset_password_token)
+            await self.db.commit()
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error creating reset_password_token in users/repository: {e}")
+
+    async def get_reset_password_token(self, token):
+        try:
+            result = await self.db.scalars(select(ResetPasswordToken).filter(ResetPasswordToken.token == str(token)))
+            return result.first()
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error getting reset_password_token in users/repository: {e}")
+
+    # SOFT DELETION
+    async def delete_user(self, id: str):
+        try:
+            user: User = await self.get_user_by_id(id)
+            if not user:
+                raise HTTPException(status_code=404, detail=f"User not found")
+            await self.db.execute(delete(User).filter(User.user_id==id))
+            await self.db.commit()
+            invalidate_principal(id)
+            return JSONResponse (status_code=200, content={"message": f"User {user.name} deleted successfully."})
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error deleting user: {e}")
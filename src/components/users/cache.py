@@ -0,0 +1,29 @@
+from collections import namedtuple
+from dotenv import load_dotenv
+from os import getenv
+
+from src.utils.cache import TTLCache, MISSING
+from db_config.enums import UserRole
+
+load_dotenv()
+
+# What roles_required needs to authorize a request, cached per user_id so protected routes skip the users table.
+# The TTL bounds how long another process (which doesn't see this process' invalidations) can use a stale role.
+Principal = namedtuple("Principal", ["role", "active"])
+
+principal_cache = TTLCache(
+    maxsize=int(getenv("PRINCIPAL_CACHE_SIZE", 1024)),
+    ttl=float(getenv("PRINCIPAL_CACHE_TTL", 30)),
+)
+
+def get_principal(user_id: str, load_user):
+    """Cached principal of `user_id`; `load_user(user_id)` is only called on a miss. None for unknown users."""
+    principal = principal_cache.get(user_id)
+    if principal is MISSING:
+        user = load_user(user_id)
+        principal = Principal(user.role, user.role != UserRole.deleted) if user is not None else None
+        principal_cache.set(user_id, principal)
+    return principal
+
+def invalidate_principal(user_id: str):
+    principal_cache.pop(user_id)
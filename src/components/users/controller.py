@@ -1,50 +1,57 @@
 from fastapi import APIRouter, Depends
 from typing import Annotated
+from sqlalchemy.orm import Session
 
-from db_config.db_connection import session
+from db_config.db_connection import get_db, repository, run_db
 from src.components.auth.controller import oauth2_scheme
 from src.components.users.service import UserService
 from src.components.users.schemas import User, UserUpdateReq
-from src.utils.roles import roles_required
+from src.utils.roles import roles_required, CurrentUser
 from src.utils.email_handler import EmailHandler
 from src.utils.jwt_handler import TokenHandler
 from db_config.enums import UserRole
 from .repository import UserRepository
+from .async_repository import AsyncUserRepository
 from src.utils.jwt_handler import TokenHandler
 
-def only_admin(token: Annotated[str, Depends(oauth2_scheme)]):
-    return roles_required([ADMIN], token)
+def only_admin(token: Annotated[str, Depends(oauth2_scheme)], db: Session = Depends(get_db)) -> CurrentUser:
+    return roles_required([ADMIN], token, db=db)
 
-def user_admin(token: Annotated[str, Depends(oauth2_scheme)]):
-    return roles_required([ADMIN, USER], token)
+def user_admin(token: Annotated[str, Depends(oauth2_scheme)], db: Session = Depends(get_db)) -> CurrentUser:
+    return roles_required([ADMIN, USER], token, db=db)
+
+def get_user_service(db: Session = Depends(get_db)) -> UserService:
+    return UserService(db, UserRepository, EmailHandler, TokenHandler, UserRole)
+
+Service = Annotated[UserService, Depends(get_user_service)]
+Users = Annotated[UserRepository, Depends(repository(UserRepository, AsyncUserRepository))]
 
 users_router = APIRouter(
     prefix="/users",
     tags=["Users"],
     )
 
-user_service = UserService(session, UserRepository, EmailHandler, TokenHandler, UserRole)
 ADMIN, USER, UNCONFIRMED = UserRole.admin, UserRole.user, UserRole.unconfirmed
    
 @users_router.get("/", response_model=list[User])
-def get_all_users(authorization: str = Depends(only_admin)) -> list:
-    return user_service.get_all_users()
+async def get_all_users(users: Users, authorization: CurrentUser = Depends(only_admin)) -> list:
+    return await run_db(users.get_all_users)
 
 @users_router.get("/user_id/{user_id}", response_model=User)
-def get_user_by_id(user_id: str, authorization: str = Depends(only_admin)):
-    return user_service.get_user_by_id(user_id)
+async def get_user_by_id(user_id: str, users: Users, authorization: CurrentUser = Depends(only_admin)):
+    return await run_db(users.get_user_by_id, user_id)
 
 @users_router.put("/{updates}")
-def update_user(user_updates: UserUpdateReq, authorization: str = Depends(user_admin)):
-    user_id = TokenHandler.verify_token(authorization)["user_id"]
-    return user_service.update_user(user_id, user_updates)
+async def update_user(user_updates: UserUpdateReq, user_service: Service, authorization: CurrentUser = Depends(user_admin)):
+    return await user_service.update_user(authorization.user_id, user_updates)
 
 @users_router.delete("/{del_user_id}")
-def delete_user(del_user_id: str, authorization: str = Depends(user_admin)):
-    if authorization["role"] == "user":
-        del_user_id = authorization["user_id"]
+def delete_user(del_user_id: str, user_service: Service, authorization: CurrentUser = Depends(user_admin)):
+    # Users can only delete themselves
+    if authorization.role == USER:
+        del_user_id = authorization.user_id
     return user_service.delete_user(del_user_id)
 
 @users_router.get("/check_authorization")
-def check_authorization(authorization: str = Depends(only_admin)):
+def check_authorization(authorization: CurrentUser = Depends(only_admin)):
     return {"status_code": 200, "message": "Authorized"}
\ No newline at end of file
@@ -4,6 +4,7 @@ from sqlalchemy.orm import Session
 from typing import  Dict, List
 from pydantic import EmailStr
 from db_config.db_tables import User, ResetPasswordToken
+from .cache import invalidate_principal
 
 class UserRepository:
     def __init__(self, db: Session):
@@ -28,6 +29,7 @@ class UserRepository:
         try:
             self.db.add(user)
             self.db.commit()        
+            invalidate_principal(user.user_id)
         except Exception as e:
             self.db.rollback()
             raise HTTPException(status_code=500, detail=f"Error creating user in repository: {e}")
@@ -49,6 +51,7 @@ class UserRepository:
         try:
             self.db.query(User).filter(User.user_id == id).update(data)
             self.db.commit()
+            invalidate_principal(id)
             updated_user: User = self.get_user_by_id(id) 
             if updated_user:
                 return JSONResponse(status_code=200, content={"message": f"User {updated_user.name} updated successfully."})
@@ -73,15 +76,17 @@ class UserRepository:
 
     # SOFT DELETION
     def delete_user(self, id:str):
+        user: User = self.get_user_by_id(id)
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
         try:
-            user: User = self.get_user_by_id(id)            
-            if not user:
-                raise HTTPException(status_code=404, detail=f"User not found: {e}")
             # ToDo: Create table for soft deletion to register deletion date, user, etc.                 
             # user.role = UserRole.deleted
-            # self.db.commit()
             self.db.query(User).filter(User.user_id==id).delete()        
-            return JSONResponse (status_code=200, content={"message": f"User {user.name} deleted successfully."})
-
+            self.db.commit()
         except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Error deleting user: {e}")
\ No newline at end of file
+            self.db.rollback()
+            raise HTTPException(status_code=500, detail=f"Error deleting user: {e}")
+        # After the commit: a request reading the user before it would cache the old principal again
+        invalidate_principal(id)
+        return JSONResponse (status_code=200, content={"message": f"User {user.name} deleted successfully."})
\ No newline at end of file
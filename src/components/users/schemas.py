@@ -43,7 +43,7 @@ class UserUpdateReq(BaseModel):
         new_password = self.new_password
         if current_password is not None and new_password is not None and current_password == new_password:
             raise ValueError('Incorrect password')
-        return new_password
+        return self
     
 class ConfirmationCode(BaseModel):
     code: int
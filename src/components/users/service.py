@@ -7,7 +7,8 @@ from pydantic import EmailStr
 import uuid
 from datetime import datetime, timedelta
 from src.utils.email_handler import EmailHandler
-from src.utils.password_hash import get_password_hash, verify_password 
+from src.utils.password_hash import get_password_hash, verify_password, get_password_hash_async, verify_password_async
+from db_config.db_connection import run_db
 from src.utils.jwt_handler import TokenHandler
 
 class UserService():
@@ -90,22 +91,21 @@ class UserService():
     def get_user_by_email(self, user_email: EmailStr): 
         return self.user_repository.get_user_by_email(user_email)
 
-    def update_user(self, user_id: str, user_updates: UserUpdateReq):
-        user: User = self.user_repository.get_user_by_id(user_id)
+    async def update_user(self, user_id: str, user_updates: UserUpdateReq):
+        user: User = await run_db(self.user_repository.get_user_by_id, user_id)
         if user is None:
             raise HTTPException(status_code=404, detail=f"User '{user_id}' not found")
-        verified_password = verify_password(user_updates.current_password, user.password_hash)
+        verified_password = await verify_password_async(user_updates.current_password, user.password_hash)
         if not verified_password:
             raise HTTPException(status_code=400, detail="Invalid password")
         try:
-            updated_user = {
-                "name": user_updates.name,
-                "email": user_updates.email,
-                "password_hash": get_password_hash(user_updates.new_password)
-                }
+            # Omitted fields keep their current value
+            updated_user = {field: value for field, value in {"name": user_updates.name, "email": user_updates.email}.items() if value is not None}
         except Exception as e:
             raise HTTPException(status_code=400, detail=f"Something went wrong updating user in service: {e}")
-        return self.user_repository.update_user(user.user_id, updated_user)           
+        if user_updates.new_password is not None:
+            updated_user["password_hash"] = await get_password_hash_async(user_updates.new_password)
+        return await run_db(self.user_repository.update_user, user.user_id, updated_user)           
 
     def delete_user(self, user_id: str):
         return self.user_repository.delete_user(user_id)
\ No newline at end of file
@@ -0,0 +1,83 @@
+from fastapi import Request, Response
+from fastapi.concurrency import run_in_threadpool
+from dotenv import load_dotenv
+from hashlib import blake2b
+from threading import Lock
+from os import getenv
+import asyncio
+
+from db_config.db_connection import Session as SessionLocal
+from db_config.change_tracking import on_versions, read_versions
+
+load_dotenv()
+
+RESOURCE_VERSIONS_SYNC_SEC = float(getenv("RESOURCE_VERSIONS_SYNC_SEC", 1))
+
+
+class ResourceVersions:
+    """Version per resource ("products", "categories", "carousel"), derived from the change_log.
+
+    A version is the (newest version, rows in the window) pair of the resource's change_log rows (see
+    change_tracking.read_versions). Every commit that writes a resource reads it back and applies it
+    here right after the commit; writes made by other processes are read by `sync` every
+    RESOURCE_VERSIONS_SYNC_SEC. The values come from the database, so every process derives the same
+    ETag for the same data. Callbacks registered with `subscribe` are called with the resources
+    whose version changed (see response_cache).
+    """
+    def __init__(self, session_factory=SessionLocal):
+        self.session_factory = session_factory
+        self._versions = {}
+        self._lock = Lock()
+        self._listeners = []
+
+    def update(self, versions: dict):
+        # Only forward: a sync may read the log before a commit this process has already applied
+        with self._lock:
+            changed = [resource for resource, version in versions.items() if tuple(version) > self.get(resource)]
+            for resource in changed:
+                self._versions[resource] = tuple(versions[resource])
+        if changed:
+            for listener in self._listeners:
+                listener(*changed)
+
+    def sync(self):
+        with self.session_factory() as db:
+            self.update(read_versions(db))
+
+    def subscribe(self, listener):
+        self._listeners.append(listener)
+
+    def get(self, resource: str) -> tuple:
+        return self._versions.get(resource, (0, 0))
+
+    def etag(self, resource: str, *parts: str) -> str:
+        variant = blake2b("\n".join(parts).encode(), digest_size=8).hexdigest()
+        return f'"{resource}-{".".join(map(str, self.get(resource)))}-{variant}"'
+
+    def clear(self):
+        with self._lock:
+            self._versions = {}
+
+resource_versions = ResourceVersions()
+on_versions(resource_versions.update)
+
+async def follow_resource_versions(interval: float = RESOURCE_VERSIONS_SYNC_SEC):
+    """Background task started with the app: applies the versions bumped by other processes."""
+    while True:
+        try:
+            await run_in_threadpool(resource_versions.sync)
+        except Exception as e:
+            print(f"Error syncing resource versions: {e}")
+        await asyncio.sleep(interval)
+
+
+def conditional_get(request: Request, response: Response, resource: str):
+    """Returns a 304 response when If-None-Match matches the current ETag; otherwise sets the ETag header and returns None."""
+    etag = resource_versions.etag(resource, request.url.path, request.url.query)
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+        if etag in candidates or "*" in candidates:
+            return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return None
@@ -4,8 +4,11 @@ from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
+from uuid import uuid4
 from os import getenv
 
+from src.utils.token_revocation import revocation_list
+
 load_dotenv()
 
 JWT_SECRET_KEY = getenv("JWT_SECRET_KEY")
@@ -22,16 +25,28 @@ class TokenHandler:
         expiration = datetime.now() + timedelta(minutes=TOKEN_EXPIRE)
         expiration_str = expiration.isoformat()
         data["expire"] = expiration_str   
+        # jti identifies the token for revocation; exp makes it (and its revocation entry) expire
+        data["jti"] = uuid4().hex
+        data["exp"] = int(expiration.timestamp())
         token = jwt.encode(claims=data, key=JWT_SECRET_KEY,algorithm=ALGORITHM)
         return token
         
     def verify_token(token) -> dict:
         try:
             payload = jwt.decode(token,key=JWT_SECRET_KEY)
-            return payload
         except JWTError as ex:
             print(str(ex))
             raise HTTPException(status_code=401, detail="Invalid Token", headers={"WWW-Authenticate":"Bearer"})
+        if revocation_list.is_revoked(payload.get("jti")):
+            raise HTTPException(status_code=401, detail="Token revoked", headers={"WWW-Authenticate":"Bearer"})
+        return payload
+
+    def revoke_token(token, db) -> None:
+        """Logout: the token is rejected by verify_token from now on, until it would have expired anyway."""
+        payload = TokenHandler.verify_token(token)
+        # Tokens issued before jti / exp were added can't be told apart, so they stay valid
+        if payload.get("jti") and payload.get("exp"):
+            revocation_list.revoke(db, payload["jti"], datetime.fromtimestamp(payload["exp"]))
 
 # Just to try out
 if __name__ == "__main__":
@@ -0,0 +1,44 @@
+from fastapi import HTTPException
+from sqlalchemy import and_, or_
+import base64
+import json
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(sort_by: str, value, last_id: str) -> str:
+    payload = json.dumps([sort_by, value, last_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+def decode_cursor(cursor: str, sort_by: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort_by, value, last_id = json.loads(base64.urlsafe_b64decode(padded))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if cursor_sort_by != sort_by:
+        raise HTTPException(status_code=400, detail=f"Cursor was created for sort_by={cursor_sort_by}")
+    return value, last_id
+
+def keyset_paginate(stmt, sort_by: str, sort_column, id_column, limit: int, cursor: str = None, descending: bool = False):
+    """Seek to the row after `cursor` ordering by (sort_column, id_column); fetches limit + 1 rows to detect a next page."""
+    if cursor:
+        value, last_id = decode_cursor(cursor, sort_by)
+        if sort_column is id_column:
+            stmt = stmt.filter(id_column < last_id if descending else id_column > last_id)
+        elif descending:
+            stmt = stmt.filter(or_(sort_column < value, and_(sort_column == value, id_column < last_id)))
+        else:
+            stmt = stmt.filter(or_(sort_column > value, and_(sort_column == value, id_column > last_id)))
+    order_columns = [id_column] if sort_column is id_column else [sort_column, id_column]
+    stmt = stmt.order_by(*[column.desc() if descending else column.asc() for column in order_columns])
+    return stmt.limit(limit + 1)
+
+def keyset_page(rows: list, sort_by: str, limit: int):
+    """Split the limit + 1 rows fetched by keyset_paginate into (page, next_cursor)."""
+    page = rows[:limit]
+    if len(rows) <= limit:
+        return page, None
+    last = page[-1]
+    return page, encode_cursor(sort_by, getattr(last, sort_by), last.id)
@@ -1,12 +1,164 @@
+from fastapi import HTTPException
 from passlib.context import CryptContext
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from dotenv import load_dotenv
+from statistics import median
+from threading import Lock
+from time import perf_counter
+from os import getenv
+import argparse
+import asyncio
 
-bcrypt_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+load_dotenv()
+
+# The first scheme hashes new passwords; the rest are only verified and upgraded on the next login.
+# argon2 needs the argon2-cffi package. Costs are calibrated per machine, see `calibrate` below.
+PASSWORD_SCHEMES = getenv("PASSWORD_SCHEMES", "bcrypt")
+BCRYPT_ROUNDS = int(getenv("BCRYPT_ROUNDS", 12))
+ARGON2_TIME_COST = int(getenv("ARGON2_TIME_COST", 3))
+ARGON2_MEMORY_COST = int(getenv("ARGON2_MEMORY_COST", 65536))  # KiB
+ARGON2_PARALLELISM = int(getenv("ARGON2_PARALLELISM", 4))
+
+PASSWORD_HASH_WORKERS = int(getenv("PASSWORD_HASH_WORKERS", 2))
+PASSWORD_HASH_MAX_QUEUE = int(getenv("PASSWORD_HASH_MAX_QUEUE", 64))
+
+SCHEME_ALIASES = {"argon2id": "argon2"}
+
+def build_context(schemes: str = PASSWORD_SCHEMES, bcrypt_rounds: int = BCRYPT_ROUNDS, argon2_time_cost: int = ARGON2_TIME_COST,
+                  argon2_memory_cost: int = ARGON2_MEMORY_COST, argon2_parallelism: int = ARGON2_PARALLELISM) -> CryptContext:
+    """CryptContext for the configured schemes. Hashes of a non default scheme, or with lower costs
+    than configured, are reported by `verify_and_update` so they get rehashed."""
+    schemes = [SCHEME_ALIASES.get(scheme.strip(), scheme.strip()) for scheme in schemes.split(",") if scheme.strip()]
+    settings = {}
+    if "bcrypt" in schemes:
+        settings.update(bcrypt__rounds=bcrypt_rounds, bcrypt__min_rounds=bcrypt_rounds)
+    if "argon2" in schemes:
+        settings.update(
+            argon2__type="ID", argon2__rounds=argon2_time_cost, argon2__min_rounds=argon2_time_cost,
+            argon2__memory_cost=argon2_memory_cost, argon2__parallelism=argon2_parallelism,
+        )
+    return CryptContext(schemes=schemes, deprecated="auto", **settings)
+
+password_context = build_context()
 
 def get_password_hash(password):
-    return bcrypt_context.hash(password)
+    return password_context.hash(password)
 
 def verify_password(password, password_hash):
-    return bcrypt_context.verify(password, password_hash)
+    return password_context.verify(password, password_hash)
+
+def verify_and_update(password, password_hash) -> tuple:
+    """(verified, new_hash): new_hash is None unless the stored hash uses an outdated scheme or cost."""
+    return password_context.verify_and_update(password, password_hash)
+
+
+class PasswordHashPool:
+    """Runs password hashing on its own process pool so slow hashes never hold request threads or the GIL.
+
+    At most `workers` hashes run at once; up to `max_queue` more wait for a worker and anything
+    beyond that is answered with a 503, so a login burst can't queue unbounded work.
+    """
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, max_queue: int = PASSWORD_HASH_MAX_QUEUE):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = None
+        self._lock = Lock()
+        self.in_flight = self.completed = self.rejected = 0
+        self.total_time = self.max_time = 0.0
+
+    async def run(self, func, *args):
+        with self._lock:
+            if self.in_flight >= self.workers + self.max_queue:
+                self.rejected += 1
+                raise HTTPException(status_code=503, detail="Too many password operations in progress, try again.", headers={"Retry-After": "1"})
+            self.in_flight += 1
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=get_context("spawn"))
+        start = perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            elapsed = perf_counter() - start
+            with self._lock:
+                self.in_flight -= 1
+                self.completed += 1
+                self.total_time += elapsed
+                self.max_time = max(self.max_time, elapsed)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "running": min(self.in_flight, self.workers),
+                "queued": max(self.in_flight - self.workers, 0),
+                "max_queue": self.max_queue,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "avg_ms": round(self.total_time / self.completed * 1000, 3) if self.completed else 0.0,
+                "max_ms": round(self.max_time * 1000, 3),
+            }
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+password_hasher = PasswordHashPool()
+
+async def get_password_hash_async(password):
+    return await password_hasher.run(get_password_hash, password)
+
+async def verify_password_async(password, password_hash):
+    return await password_hasher.run(verify_password, password, password_hash)
+
+async def verify_and_update_async(password, password_hash) -> tuple:
+    return await password_hasher.run(verify_and_update, password, password_hash)
+
+
+# ----------------------------------------------------------------------------------
+#                              COST CALIBRATION:
+# ----------------------------------------------------------------------------------
+
+COST_SETTINGS = {
+    # scheme: (environment variable, build_context argument, smallest cost accepted)
+    "bcrypt": ("BCRYPT_ROUNDS", "bcrypt_rounds", 10),
+    "argon2": ("ARGON2_TIME_COST", "argon2_time_cost", 2),
+}
+
+def time_hash(context: CryptContext, samples: int = 3) -> float:
+    """Median milliseconds per hash."""
+    timings = []
+    for _ in range(samples):
+        start = perf_counter()
+        context.hash("calibration password")
+        timings.append(perf_counter() - start)
+    return median(timings) * 1000
+
+def calibrate(scheme: str, target_ms: float, samples: int = 3, min_cost: int = None) -> tuple:
+    """Highest cost whose hash time stays within `target_ms` on this machine (never below the
+    scheme's minimum). argon2 keeps the configured memory and parallelism and tunes the time cost.
+    Returns (cost, ms per hash)."""
+    scheme = SCHEME_ALIASES.get(scheme, scheme)
+    _, argument, floor = COST_SETTINGS[scheme]
+    cost = floor if min_cost is None else min_cost
+    best = (cost, time_hash(build_context(scheme, **{argument: cost}), samples))
+    while True:
+        cost += 1
+        ms = time_hash(build_context(scheme, **{argument: cost}), samples)
+        if ms > target_ms:
+            return best
+        best = (cost, ms)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pick the password hashing cost for a target latency on this machine.")
+    parser.add_argument("command", choices=["calibrate"])
+    parser.add_argument("--scheme", default=PASSWORD_SCHEMES.split(",")[0].strip(), choices=["bcrypt", "argon2", "argon2id"])
+    parser.add_argument("--target-ms", type=float, default=250)
+    parser.add_argument("--samples", type=int, default=3)
+    args = parser.parse_args()
 
-# password = get_password_hash("password")
-# print(password)
\ No newline at end of file
+    cost, ms = calibrate(args.scheme, args.target_ms, args.samples)
+    variable = COST_SETTINGS[SCHEME_ALIASES.get(args.scheme, args.scheme)][0]
+    print(f"{variable}={cost} # {ms:.0f} ms per hash (target {args.target_ms:.0f} ms)")
@@ -0,0 +1,163 @@
+from starlette.datastructures import Headers
+from dotenv import load_dotenv
+from os import getenv
+from itertools import count
+import gzip
+import re
+
+from src.utils.cache import TTLCache, MISSING
+from src.utils.etag import resource_versions
+
+load_dotenv()
+
+# Bodies smaller than this are not worth a gzip variant
+MIN_COMPRESS_SIZE = 1024
+
+
+class CachedResponse:
+    __slots__ = ("status", "headers", "body", "gzip_body", "etag", "tags")
+
+    def __init__(self, status: int, headers: list, body: bytes, tags: frozenset):
+        self.status = status
+        self.headers = [(name, value) for name, value in headers if name.lower() != b"content-length"]
+        self.body = body
+        self.gzip_body = gzip.compress(body, compresslevel=6) if len(body) >= MIN_COMPRESS_SIZE else None
+        self.etag = Headers(raw=headers).get("etag")
+        self.tags = tags
+
+
+class ResponseCache:
+    """Rendered GET responses keyed by (path, query, Accept), stored with a gzip variant and a set of tags.
+
+    `invalidate(*tags)` drops every entry carrying one of the tags. It is subscribed to
+    resource_versions, so every committed write that changes "products", "categories" or
+    "carousel" invalidates the matching responses. Per process, like the other caches.
+    """
+    def __init__(self, maxsize: int = 1024, ttl: float = 30):
+        self.entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._generation = count()
+        self.generation = next(self._generation)
+
+    def get(self, key):
+        return self.entries.get(key)
+
+    def set(self, key, entry: CachedResponse, generation: int):
+        # A write that committed while the response was being rendered makes it stale: don't store it
+        if generation == self.generation:
+            self.entries.set(key, entry)
+
+    def invalidate(self, *tags: str):
+        self.generation = next(self._generation)
+        tags = set(tags)
+        self.entries.pop_matching(lambda entry: not tags.isdisjoint(entry.tags))
+
+    def clear(self):
+        self.generation = next(self._generation)
+        self.entries.clear()
+
+    def stats(self) -> dict:
+        return self.entries.stats()
+
+response_cache = ResponseCache(
+    maxsize=int(getenv("RESPONSE_CACHE_SIZE", 1024)),
+    ttl=float(getenv("RESPONSE_CACHE_TTL", 30)),
+)
+resource_versions.subscribe(response_cache.invalidate)
+
+# Cacheable public listings and the resources their bodies depend on. Tags are the resource
+# names whose version changes in resource_versions, the only invalidation every process receives.
+CACHE_RULES = [
+    (re.compile(r"^/api/v1/products/$"), lambda match: {"products"}),
+    (re.compile(r"^/api/v1/products/categories/[^/]+$"), lambda match: {"products"}),
+    (re.compile(r"^/api/v1/categories/$"), lambda match: {"categories"}),
+    (re.compile(r"^/api/v1/categories/summary$"), lambda match: {"categories", "products"}),
+    (re.compile(r"^/api/v1/carousel/$"), lambda match: {"carousel"}),
+]
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """True when Accept-Encoding allows gzip, by name or through "*", with a q-value above 0."""
+    weights = {}
+    for item in accept_encoding.split(","):
+        coding, *params = [part.strip() for part in item.split(";")]
+        if not coding:
+            continue
+        weight = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[coding.lower()] = weight
+    return weights.get("gzip", weights.get("*", 0.0)) > 0
+
+def vary_on_encoding(headers: list) -> list:
+    """Raw headers with Accept-Encoding added to Vary: the same URL may be served gzipped from the cache."""
+    vary = Headers(raw=headers).get("vary")
+    if vary is None:
+        return [*headers, (b"vary", b"Accept-Encoding")]
+    if "accept-encoding" in [value.strip().lower() for value in vary.split(",")]:
+        return list(headers)
+    return [(name, f"{vary}, Accept-Encoding".encode() if name.lower() == b"vary" else value) for name, value in headers]
+
+def cache_tags(path: str):
+    for pattern, tags in CACHE_RULES:
+        match = pattern.match(path)
+        if match:
+            return frozenset(tags(match))
+    return None
+
+
+class ResponseCacheMiddleware:
+    """ASGI middleware serving cached listings before routing, dependencies or the database are touched."""
+    def __init__(self, app, cache: ResponseCache = response_cache):
+        self.app = app
+        self.cache = cache
+
+    async def __call__(self, scope, receive, send):
+        tags = cache_tags(scope["path"]) if scope["type"] == "http" and scope["method"] == "GET" else None
+        if tags is None:
+            return await self.app(scope, receive, send)
+
+        request_headers = Headers(scope=scope)
+        key = (scope["path"], scope["query_string"], request_headers.get("accept", ""))
+        entry = self.cache.get(key)
+        if entry is not MISSING:
+            return await self.send_cached(entry, request_headers, send)
+
+        generation = self.cache.generation
+        start, body = {}, []
+
+        async def capture(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": vary_on_encoding(message.get("headers", []))}
+                start.update(message)
+            elif message["type"] == "http.response.body":
+                body.append(message.get("body", b""))
+                if not message.get("more_body") and self.cacheable(start):
+                    self.cache.set(key, CachedResponse(start["status"], start.get("headers", []), b"".join(body), tags), generation)
+            await send(message)
+
+        await self.app(scope, receive, capture)
+
+    @staticmethod
+    def cacheable(start: dict) -> bool:
+        if start.get("status") != 200:
+            return False
+        headers = Headers(raw=start.get("headers", []))
+        return "set-cookie" not in headers and "no-store" not in headers.get("cache-control", "")
+
+    @staticmethod
+    async def send_cached(entry: CachedResponse, request_headers: Headers, send):
+        if entry.etag and entry.etag in [candidate.strip() for candidate in request_headers.get("if-none-match", "").split(",")]:
+            await send({"type": "http.response.start", "status": 304, "headers": [(b"etag", entry.etag.encode())]})
+            await send({"type": "http.response.body", "body": b""})
+            return
+        body, headers = entry.body, vary_on_encoding(entry.headers)
+        if entry.gzip_body is not None and accepts_gzip(request_headers.get("accept-encoding", "")):
+            body = entry.gzip_body
+            headers.append((b"content-encoding", b"gzip"))
+        headers += [(b"content-length", str(len(body)).encode()), (b"x-cache", b"HIT")]
+        await send({"type": "http.response.start", "status": entry.status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
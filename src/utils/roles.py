@@ -1,23 +1,39 @@
 from fastapi import HTTPException, Request
+from collections import namedtuple
+from functools import partial
+from sqlalchemy.orm import Session
 from src.utils.jwt_handler import TokenHandler
 from src.components.users.repository import UserRepository
-from db_config.db_connection import session
+from src.components.users.cache import get_principal
+from db_config.db_connection import Session as SessionLocal
 
-user_repository = UserRepository(session)
+# Returned by roles_required, for routes that act on behalf of the caller
+CurrentUser = namedtuple("CurrentUser", ["user_id", "role"])
 
-def roles_required(allowed_roles:list, token=None, code=None) -> None:
-    user = None
+def roles_required(allowed_roles:list, token=None, code=None, db: Session = None) -> CurrentUser:
     if token:
+        # Token checks read the cached principal; the session is only used on a cache miss
         decoded_user = TokenHandler.verify_token(token)
-        if decoded_user:
-            user = user_repository.get_user_by_id(decoded_user["user_id"])
-    elif code:
-        user = user_repository.get_user_by_confirmation_code(code)    
+        principal = get_principal(decoded_user["user_id"], partial(load_user, db=db)) if decoded_user else None
+        if principal is None or not principal.active or principal.role not in allowed_roles:
+            raise HTTPException(status_code=403, detail="Access denied")
+        return CurrentUser(decoded_user["user_id"], principal.role)
+    if db is None:
+        with SessionLocal() as db:
+            return roles_required(allowed_roles, token, code, db)
+    user = UserRepository(db).get_user_by_confirmation_code(code) if code else None
     if user is None or user.role not in allowed_roles:
         raise HTTPException(status_code=403, detail="Access denied")
+    return CurrentUser(user.user_id, user.role)
+
+def load_user(user_id: str, db: Session = None):
+    if db is None:
+        with SessionLocal() as db:
+            return UserRepository(db).get_user_by_id(user_id)
+    return UserRepository(db).get_user_by_id(user_id)
 
 def get_token_from_cookie(request: Request) -> str:
     token = request.cookies.get("access_token")
     if not token:
         raise HTTPException(status_code=401, detail="Not authenticated")
-    return token
\ No newline at end of file
+    return token
@@ -0,0 +1,83 @@
+from fastapi import Response
+from fastapi.datastructures import DefaultPlaceholder
+from fastapi.dependencies.utils import get_typed_return_annotation
+from fastapi.routing import APIRoute
+from pydantic import BaseModel
+from functools import lru_cache, wraps
+from inspect import isclass, iscoroutinefunction
+from typing import Any, Union, get_args, get_origin
+import orjson
+
+
+def _identity(value):
+    return value
+
+@lru_cache(maxsize=None)
+def model_dumper(annotation):
+    """Function that turns ORM rows, dicts or model instances into the plain data `annotation` describes.
+
+    Nothing is validated: it only picks the declared fields, so it must only be used for
+    objects that already hold valid values (rows read from the database, cached snapshots).
+    """
+    origin, args = get_origin(annotation), get_args(annotation)
+    if origin is Union:
+        types = [arg for arg in args if arg is not type(None)]
+        return model_dumper(types[0]) if len(types) == 1 else _identity
+    if origin in (list, tuple, set, frozenset):
+        dump_item = model_dumper(args[0]) if args else _identity
+        if dump_item is _identity:
+            return lambda values: None if values is None else list(values)
+        return lambda values: None if values is None else [dump_item(value) for value in values]
+    if isclass(annotation) and issubclass(annotation, BaseModel):
+        fields = [(name, model_dumper(field.annotation)) for name, field in annotation.model_fields.items()]
+        def dump(obj):
+            if obj is None:
+                return None
+            if isinstance(obj, dict):
+                return {name: dump_field(obj.get(name)) for name, dump_field in fields}
+            return {name: dump_field(getattr(obj, name, None)) for name, dump_field in fields}
+        return dump
+    return _identity
+
+def orjson_response(content: Any, annotation, status_code: int = 200, sub_response: Response = None) -> Response:
+    response = Response(orjson.dumps(model_dumper(annotation)(content)), status_code=status_code, media_type="application/json")
+    if sub_response is not None:
+        # Headers and status set by the endpoint on its injected Response (ETag, X-Next-Cursor...)
+        response.headers.raw.extend(sub_response.headers.raw)
+        if sub_response.status_code:
+            response.status_code = sub_response.status_code
+    return response
+
+
+class ORJSONRoute(APIRoute):
+    """Route class (`APIRouter(route_class=ORJSONRoute)`) that writes the declared response model with orjson.
+
+    The endpoint's return value is dumped field by field and encoded straight to bytes, skipping
+    FastAPI's output validation and jsonable_encoder. The response model is still used for the
+    OpenAPI schema. Endpoints returning a Response are passed through untouched.
+    """
+    def __init__(self, path: str, endpoint, **kwargs):
+        response_model = kwargs.get("response_model")
+        if response_model is None or isinstance(response_model, DefaultPlaceholder):
+            response_model = get_typed_return_annotation(endpoint)
+        if response_model is not None and not (isclass(response_model) and issubclass(response_model, Response)):
+            endpoint = self._serialize_with_orjson(endpoint, response_model, kwargs.get("status_code") or 200)
+        super().__init__(path, endpoint, **kwargs)
+
+    @staticmethod
+    def _serialize_with_orjson(endpoint, response_model, status_code: int):
+        def render(result, kwargs):
+            if isinstance(result, Response):
+                return result
+            sub_response = next((value for value in kwargs.values() if isinstance(value, Response)), None)
+            return orjson_response(result, response_model, status_code, sub_response)
+
+        if iscoroutinefunction(endpoint):
+            @wraps(endpoint)
+            async def serialized(**kwargs):
+                return render(await endpoint(**kwargs), kwargs)
+        else:
+            @wraps(endpoint)
+            def serialized(**kwargs):
+                return render(endpoint(**kwargs), kwargs)
+        return serialized
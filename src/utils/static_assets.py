@@ -0,0 +1,113 @@
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+from hashlib import blake2b
+from mimetypes import guess_type
+from pathlib import Path
+import gzip
+
+try:
+    import brotli
+except ImportError:  # optional: without it only gzip variants are built
+    brotli = None
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "public, no-cache"
+# A compressed variant is only kept when it saves at least this fraction (PNG / WebP barely shrink)
+MIN_SAVING = 0.1
+
+
+def accepted_encodings(accept_encoding: str) -> set:
+    accepted = set()
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        if coding:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+class Asset:
+    """One file or page kept in memory with its gzip / brotli variants, built once."""
+    def __init__(self, body: bytes, media_type: str):
+        self.body = body
+        self.media_type = media_type
+        self.digest = blake2b(body, digest_size=8).hexdigest()
+        self.variants = {}
+        compressors = [("br", lambda data: brotli.compress(data, quality=11))] if brotli is not None else []
+        compressors.append(("gzip", lambda data: gzip.compress(data, 9, mtime=0)))
+        for encoding, compress in compressors:
+            compressed = compress(body)
+            if len(compressed) <= len(body) * (1 - MIN_SAVING):
+                self.variants[encoding] = compressed
+
+    def response(self, accept_encoding: str = None, if_none_match: str = None, cache_control: str = REVALIDATE) -> Response:
+        encoding = next((encoding for encoding in self.variants if encoding in accepted_encodings(accept_encoding)), None)
+        etag = f'"{self.digest}-{encoding}"' if encoding else f'"{self.digest}"'
+        headers = {"Cache-Control": cache_control, "ETag": etag}
+        if self.variants:
+            headers["Vary"] = "Accept-Encoding"
+        if if_none_match and (etag in [candidate.strip() for candidate in if_none_match.split(",")] or if_none_match.strip() == "*"):
+            return Response(status_code=304, headers=headers)
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        return Response(self.variants.get(encoding, self.body), media_type=self.media_type, headers=headers)
+
+
+class StaticAssets:
+    """ASGI app replacing StaticFiles for the bundled /static files.
+
+    Every file is read and compressed once at startup and also published under a fingerprinted name
+    (`images/logo.<hash>.png`, see `url`) that is served with an immutable Cache-Control, so browsers
+    never ask for it again until its content, and therefore its URL, changes. The plain names keep
+    working for old links, revalidated through their ETag.
+    """
+    def __init__(self, directory: str, prefix: str = "/static"):
+        self.directory = Path(directory)
+        self.prefix = prefix.rstrip("/")
+        self.assets = {}
+        self.fingerprints = {}
+        for file in sorted(self.directory.rglob("*")):
+            if not file.is_file():
+                continue
+            name = file.relative_to(self.directory).as_posix()
+            asset = Asset(file.read_bytes(), guess_type(file.name)[0] or "application/octet-stream")
+            fingerprinted = f"{name[:-len(file.suffix)] if file.suffix else name}.{asset.digest}{file.suffix}"
+            self.assets[name] = (asset, REVALIDATE)
+            self.assets[fingerprinted] = (asset, IMMUTABLE)
+            self.fingerprints[name] = fingerprinted
+
+    def url(self, name: str) -> str:
+        """Fingerprinted URL of a static file, for templates: {{ static('images/image.png') }}."""
+        name = name.lstrip("/")
+        return f"{self.prefix}/{self.fingerprints.get(name, name)}"
+
+    async def __call__(self, scope, receive, send):
+        assert scope["type"] == "http"
+        path, root_path = scope["path"], scope.get("root_path", "")
+        if root_path and path.startswith(root_path):
+            path = path[len(root_path):]
+        if scope["method"] not in ("GET", "HEAD"):
+            response = Response(status_code=405, headers={"Allow": "GET, HEAD"})
+        elif path.lstrip("/") not in self.assets:
+            response = Response("Not Found", status_code=404, media_type="text/plain")
+        else:
+            asset, cache_control = self.assets[path.lstrip("/")]
+            headers = Headers(scope=scope)
+            response = asset.response(headers.get("accept-encoding"), headers.get("if-none-match"), cache_control)
+        await response(scope, receive, send)
+
+
+class ImmutableStaticFiles(StaticFiles):
+    """StaticFiles for content addressed files (uploaded images are named by their hash): they never change."""
+    def file_response(self, *args, **kwargs) -> Response:
+        response = super().file_response(*args, **kwargs)
+        if response.status_code == 200:
+            response.headers["Cache-Control"] = IMMUTABLE
+        return response
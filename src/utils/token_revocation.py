@@ -0,0 +1,166 @@
+from sqlalchemy import select, delete, func, or_
+from sqlalchemy.dialects import sqlite, postgresql
+from fastapi.concurrency import run_in_threadpool
+from datetime import datetime
+from dotenv import load_dotenv
+from hashlib import blake2b
+from math import ceil, log
+from threading import Lock
+from time import monotonic
+from os import getenv
+import asyncio
+
+from db_config.db_connection import Session as SessionLocal
+from db_config.db_tables import RevokedToken
+
+load_dotenv()
+
+TOKEN_REVOCATION_SYNC_SEC = float(getenv("TOKEN_REVOCATION_SYNC_SEC", 5))
+TOKEN_REVOCATION_PRUNE_SEC = float(getenv("TOKEN_REVOCATION_PRUNE_SEC", 3600))
+# 0 keeps every revoked jti in a set; a capacity switches to a Bloom filter of that size (see RevocationList)
+TOKEN_REVOCATION_BLOOM_CAPACITY = int(getenv("TOKEN_REVOCATION_BLOOM_CAPACITY", 0))
+# Ids skipped by a sync are re-read once by the next one: a revocation may commit right after a
+# higher id. Beyond this many missing ids the rest are assumed rolled back / ignored duplicates.
+MAX_SYNC_GAPS = 1000
+
+
+def insert_ignore(db, table):
+    """INSERT that skips a jti already revoked (logging out twice is not an error)."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(table).on_conflict_do_nothing()
+    if dialect == "sqlite":
+        return sqlite.insert(table).on_conflict_do_nothing()
+    return table.__table__.insert().prefix_with("IGNORE")
+
+
+class BloomFilter:
+    """Fixed size Bloom filter: no false negatives, about `error_rate` false positives at `capacity` keys."""
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        self.size = max(8, ceil(-capacity * log(error_rate) / log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str):
+        digest = blake2b(key.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
+
+    def add(self, key: str):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class RevocationList:
+    """Per process mirror of the revoked_tokens table, checked by TokenHandler.verify_token on every request.
+
+    By default the revoked jtis live in a dict (jti -> expiry), so the check is one hash lookup. With a
+    Bloom capacity only the filter is kept in memory (about 1.8 bytes per revocation instead of ~100)
+    and the rare positives are confirmed against the table. Other processes' revocations are read by
+    `sync` every TOKEN_REVOCATION_SYNC_SEC, following the table's autoincrement id, and `prune` drops
+    what has expired, since an expired token is rejected anyway.
+    """
+    def __init__(self, session_factory=SessionLocal, bloom_capacity: int = TOKEN_REVOCATION_BLOOM_CAPACITY):
+        self.session_factory = session_factory
+        self.bloom_capacity = bloom_capacity
+        self._revoked = {}
+        self._bloom = BloomFilter(bloom_capacity) if bloom_capacity else None
+        self._last_id = None
+        self._gaps = ()
+        self._lock = Lock()
+
+    def is_revoked(self, jti: str) -> bool:
+        if jti is None:
+            return False
+        if self._bloom is None:
+            return jti in self._revoked
+        if jti not in self._bloom:
+            return False
+        with self.session_factory() as db:
+            return db.scalar(select(RevokedToken.jti).where(RevokedToken.jti == jti)) is not None
+
+    def revoke(self, db, jti: str, expires_at: datetime):
+        """Stores the revocation in the caller's session and commits it, then applies it in this process."""
+        db.execute(insert_ignore(db, RevokedToken).values(jti=jti, expires_at=expires_at, revoked_at=datetime.now()))
+        db.commit()
+        self._add(jti, expires_at)
+
+    def _add(self, jti: str, expires_at: datetime):
+        with self._lock:
+            if self._bloom is None:
+                self._revoked[jti] = expires_at
+            else:
+                self._bloom.add(jti)
+
+    def sync(self) -> int:
+        """Loads the unexpired revocations with an id above the last one seen (all of them the first time)."""
+        last_id, gaps = self._last_id, self._gaps
+        query = select(RevokedToken.id, RevokedToken.jti, RevokedToken.expires_at).where(RevokedToken.expires_at > datetime.now())
+        if last_id is not None:
+            query = query.where(or_(RevokedToken.id > last_id, RevokedToken.id.in_(gaps)) if gaps else RevokedToken.id > last_id)
+        with self.session_factory() as db:
+            if last_id is None:
+                # Read first: rows committed while the full load runs end up above it and are handled like any new id
+                last_id = db.scalar(select(func.max(RevokedToken.id))) or 0
+            rows = db.execute(query).all()
+        for _, jti, expires_at in rows:
+            self._add(jti, expires_at)
+        ids = {id for id, _, _ in rows if id > last_id}
+        if ids:
+            self._gaps = tuple(id for id in range(last_id + 1, max(ids)) if id not in ids)[-MAX_SYNC_GAPS:]
+            last_id = max(ids)
+        else:
+            self._gaps = ()
+        self._last_id = last_id
+        return len(rows)
+
+    def prune(self) -> int:
+        """Deletes expired revocations from the table and from memory; a Bloom filter is rebuilt."""
+        now = datetime.now()
+        with self.session_factory() as db:
+            removed = db.execute(delete(RevokedToken).where(RevokedToken.expires_at <= now)).rowcount
+            db.commit()
+        if self._bloom is None:
+            with self._lock:
+                self._revoked = {jti: expires_at for jti, expires_at in self._revoked.items() if expires_at > now}
+        else:
+            # Built aside and swapped, so the filter is never empty; a revocation made meanwhile is re-read by the next sync
+            bloom = BloomFilter(self.bloom_capacity)
+            with self.session_factory() as db:
+                rebuilt_up_to = db.scalar(select(func.max(RevokedToken.id))) or 0
+                for jti in db.scalars(select(RevokedToken.jti).where(RevokedToken.expires_at > now, RevokedToken.id <= rebuilt_up_to)):
+                    bloom.add(jti)
+            with self._lock:
+                self._bloom = bloom
+            if self._last_id is not None:
+                self._last_id = min(self._last_id, rebuilt_up_to)
+        return removed
+
+    def clear(self):
+        with self._lock:
+            self._revoked = {}
+            self._bloom = BloomFilter(self.bloom_capacity) if self.bloom_capacity else None
+            self._last_id = None
+            self._gaps = ()
+
+    def stats(self) -> dict:
+        return {"mode": "set" if self._bloom is None else "bloom", "revoked": len(self._revoked)}
+
+
+revocation_list = RevocationList()
+
+async def maintain_revocations(interval: float = TOKEN_REVOCATION_SYNC_SEC, prune_interval: float = TOKEN_REVOCATION_PRUNE_SEC):
+    """Background task started with the app: loads every unexpired revocation, then keeps syncing and pruning."""
+    pruned_at = monotonic()
+    while True:
+        try:
+            if monotonic() - pruned_at >= prune_interval:
+                await run_in_threadpool(revocation_list.prune)
+                pruned_at = monotonic()
+            await run_in_threadpool(revocation_list.sync)
+        except Exception as e:
+            print(f"Error syncing revoked tokens: {e}")
+        await asyncio.sleep(interval)
@@ -0,0 +1,71 @@
+from os import environ
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Defaults so the app can be imported without a local .env file
+environ.setdefault("DB_URL", "sqlite://")
+environ.setdefault("ALLOWED_ORIGINS", "http://127.0.0.1:5173")
+environ.setdefault("JWT_SECRET_KEY", "test_secret_key")
+environ.setdefault("ALGORITHM", "HS256")
+environ.setdefault("ACCESS_TOKEN_EXPIRE_SEC", "1200")
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from main import app
+from db_config.db_connection import Base, get_db
+import db_config.db_tables  # noqa: F401 (registers the tables on Base.metadata)
+
+
+@pytest.fixture
+def db_engine():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+@pytest.fixture
+def db_session(db_engine):
+    session = sessionmaker(autoflush=False, bind=db_engine)()
+    yield session
+    session.close()
+
+@pytest.fixture
+def client(db_session):
+    """TestClient whose requests use the test session. Test modules seed data by overriding it as `client(client, db_session)`."""
+    def override_get_db():
+        yield db_session
+
+    app.dependency_overrides[get_db] = override_get_db
+    yield TestClient(app)
+    app.dependency_overrides.pop(get_db)
+
+@pytest.fixture
+def statements(db_engine):
+    """SQL statements executed on the test engine while the test runs."""
+    executed = []
+    def count(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+    event.listen(db_engine, "before_cursor_execute", count)
+    yield executed
+    event.remove(db_engine, "before_cursor_execute", count)
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    from src.components.products.cache import product_cache
+    from db_config.lookups import lookups
+    from src.utils.response_cache import response_cache
+    from src.components.users.cache import principal_cache
+    from src.utils.token_revocation import revocation_list
+    from src.utils.etag import resource_versions
+    revocation_list.clear()
+    resource_versions.clear()
+    product_cache.clear()
+    principal_cache.clear()
+    lookups.clear()
+    response_cache.clear()
+    yield
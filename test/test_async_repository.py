@@ -0,0 +1,88 @@
+import asyncio
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from db_config.db_connection import Base, to_async_url
+from db_config.db_tables import Product, ProductImages, SizesLookup, Category, User
+from db_config.enums import UserRole
+from src.components.products.async_repository import AsyncProductModel
+from src.components.users.async_repository import AsyncUserRepository
+from src.components.users.cache import get_principal, principal_cache
+from src.utils.cache import MISSING
+
+
+async def seed(engine):
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with factory() as db:
+        size = SizesLookup(size="xs")
+        db.add_all([
+            Category(id="c1", name="Todos", color="bg-blue-500"),
+            size,
+            Product(id="p1", name="Shirt", price=10, stock=3, category_name="Todos", sizes=[size],
+                    images=[ProductImages(id="i1", url="http://img/1")]),
+            Product(id="p2", name="Pants", price=20, stock=0, category_name="Todos"),
+        ])
+        await db.commit()
+    return factory
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_to_async_url():
+    assert to_async_url("postgresql://u:p@localhost/db") == "postgresql+asyncpg://u:p@localhost/db"
+    assert to_async_url("sqlite:///./app.db") == "sqlite+aiosqlite:///./app.db"
+
+def test_async_product_reads_load_relationships():
+    async def scenario():
+        engine = create_async_engine("sqlite+aiosqlite://")
+        factory = await seed(engine)
+        async with factory() as db:
+            products = AsyncProductModel(db)
+            all_products, _ = await products.get_all_products()
+            product = await products.get_product_by_name("Shirt")
+            by_category, _ = await products.get_products_by_category("Todos")
+        await engine.dispose()
+        return all_products, product, by_category
+
+    all_products, product, by_category = run(scenario())
+
+    assert {p.id for p in all_products} == {"p1", "p2"}
+    assert len(by_category) == 2
+    assert [image.url for image in product.images] == ["http://img/1"]
+    assert [size.size for size in product.sizes] == ["xs"]
+
+def test_async_repository_falls_back_to_sync_methods():
+    async def scenario():
+        engine = create_async_engine("sqlite+aiosqlite://")
+        factory = await seed(engine)
+        async with factory() as db:
+            # get_product_sizes only exists on the sync ProductModel
+            sizes = await AsyncProductModel(db).get_product_sizes(1)
+        await engine.dispose()
+        return sizes
+
+    sizes = run(scenario())
+
+    assert [size.size for size in sizes] == ["xs"]
+
+def test_async_user_writes_invalidate_the_principal():
+    async def scenario():
+        engine = create_async_engine("sqlite+aiosqlite://")
+        factory = await seed(engine)
+        async with factory() as db:
+            users = AsyncUserRepository(db)
+            await users.create_user(User(user_id="u1", name="Ana", email="ana@example.com", password_hash="x", role=UserRole.admin))
+            get_principal("u1", lambda user_id: User(role=UserRole.admin))
+            await users.update_user("u1", {"role": UserRole.user})
+            after_update = principal_cache.get("u1")
+            get_principal("u1", lambda user_id: User(role=UserRole.user))
+            await users.delete_user("u1")
+            after_delete = principal_cache.get("u1")
+        await engine.dispose()
+        return after_update, after_delete
+
+    after_update, after_delete = run(scenario())
+
+    assert after_update is MISSING and after_delete is MISSING
@@ -0,0 +1,39 @@
+from unittest.mock import patch
+
+from src.utils.cache import TTLCache, MISSING
+
+
+def test_get_returns_missing_for_unknown_keys_and_caches_none():
+    cache = TTLCache(maxsize=2, ttl=60)
+    assert cache.get("a") is MISSING
+
+    cache.set("a", None)
+    assert cache.get("a") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is MISSING
+    assert cache.get("a") == 1
+    assert cache.stats()["evictions"] == 1
+
+def test_entries_expire_after_ttl():
+    cache = TTLCache(maxsize=2, ttl=10)
+    with patch("src.utils.cache.monotonic", return_value=100):
+        cache.set("a", 1)
+    with patch("src.utils.cache.monotonic", return_value=111):
+        assert cache.get("a") is MISSING
+    assert cache.stats()["expirations"] == 1
+    assert len(cache) == 0
+
+def test_pop_removes_entry():
+    cache = TTLCache()
+    cache.set("a", 1)
+    assert cache.pop("a") == 1
+    assert cache.pop("a", "default") == "default"
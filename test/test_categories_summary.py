@@ -0,0 +1,52 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+from db_config.db_connection import get_db
+from db_config.db_tables import Product, ProductImages, SizesLookup, Category
+from src.components.categories.repository import CategotyRepository
+
+
+@pytest.fixture
+def categories(db_session):
+    size = SizesLookup(id=1, size="xs")
+    db_session.add_all([Category(id="c1", name="bebés", color="pink"), Category(id="c2", name="niños", color="blue"), Category(id="c3", name="vacía", color="gray")])
+    for i in range(30):
+        db_session.add(Product(
+            id=f"p{i:02d}", name=f"Product {i:02d}", price=30 - i, stock=i, brand="b", description="d",
+            category_name="bebés" if i < 20 else "niños", sizes=[size], images=[ProductImages(id=f"i{i:02d}", url="http://img")],
+        ))
+    db_session.commit()
+    db_session.expunge_all()
+    return CategotyRepository(db_session)
+
+
+class TestCategoriesSummary:
+
+    def test_counts_and_first_products(self, categories):
+        summary = {category["name"]: category for category in categories.get_categories_summary(3)}
+
+        assert {name: category["product_count"] for name, category in summary.items()} == {"bebés": 20, "niños": 10, "vacía": 0}
+        assert [p.id for p in summary["bebés"]["products"]] == ["p00", "p01", "p02"]
+        assert [p.id for p in summary["niños"]["products"]] == ["p20", "p21", "p22"]
+        assert summary["vacía"]["products"] == []
+
+    def test_sort_matches_category_listing(self, categories):
+        summary = {category["name"]: category for category in categories.get_categories_summary(2, sort_by="price")}
+        assert [p.id for p in summary["bebés"]["products"]] == ["p19", "p18"]
+
+    def test_fixed_number_of_queries(self, categories, statements):
+        categories.get_categories_summary(5)
+        # counts, ranked products, images, sizes
+        assert len(statements) == 4
+
+    def test_endpoint(self, categories, db_session):
+        app.dependency_overrides[get_db] = lambda: db_session
+        try:
+            response = TestClient(app).get("/api/v1/categories/summary?per_category=2")
+        finally:
+            app.dependency_overrides.pop(get_db)
+
+        assert response.status_code == 200
+        assert [len(category["products"]) for category in response.json()] == [2, 2, 0]
+        assert response.json()[0]["products"][0]["images"] == [{"id": "i00", "url": "http://img"}]
@@ -0,0 +1,130 @@
+import pytest
+
+from db_config.db_tables import Product, Category, CarouselImage, ChangeLog
+from src.components.changes.repository import ChangesRepository
+from src.components.products.repository import ProductModel
+from src.components.products.schemas import ProductReq, ProductUpdateRequest
+from src.components.categories.repository import CategotyRepository
+from src.components.carousel.repository import CarouselRepository
+from src.components.carousel.schemas import CarouselReq
+from src.components.reservations.repository import ReservationRepository
+
+
+@pytest.fixture
+def catalog(db_session):
+    db_session.add(Category(id="c1", name="Todos", color="blue"))
+    db_session.commit()
+    return ProductModel(db_session)
+
+@pytest.fixture
+def changes(db_session):
+    return ChangesRepository(db_session, safety_lag=0)
+
+def create(catalog, name="Shirt"):
+    return catalog.save_new_product(ProductReq(name=name, price=10, stock=5, brand="b", description="d", category_name="Todos", images=["http://img/1"], sizes=[]))
+
+
+class TestChangeFeed:
+
+    def test_orm_writes_are_logged_in_the_same_transaction(self, catalog, changes):
+        product_id = create(catalog)
+
+        feed = changes.get_changes(0, 100)
+
+        assert [(c["entity"], c["operation"]) for c in feed["changes"]] == [("category", "upsert"), ("product", "upsert")]
+        product = feed["changes"][1]
+        assert product["id"] == product_id
+        assert product["data"]["images"][0]["url"] == "http://img/1"
+
+    def test_only_latest_change_per_row_after_since(self, catalog, changes):
+        product_id = create(catalog)
+        since = changes.get_changes(0, 100)["next_since"]
+
+        catalog.save_product_changes(product_id, ProductUpdateRequest(price=12, images=[]))
+        catalog.batch_update_products([{"id": product_id, "stock": 1}])
+
+        feed = changes.get_changes(since, 100)
+        assert len(feed["changes"]) == 1
+        assert feed["changes"][0]["data"]["price"] == 12
+        assert feed["changes"][0]["data"]["stock"] == 1
+        assert feed["changes"][0]["data"]["images"] == []
+        assert changes.get_changes(feed["next_since"], 100)["changes"] == []
+
+    def test_deletes_are_tombstones(self, catalog, changes, db_session):
+        first, second = create(catalog, "A"), create(catalog, "B")
+        since = changes.get_changes(0, 100)["next_since"]
+
+        catalog.delete_product(first)
+        catalog.batch_delete_products([second])
+
+        feed = changes.get_changes(since, 100)
+        assert {(c["id"], c["operation"], c["data"]) for c in feed["changes"]} == {(first, "delete", None), (second, "delete", None)}
+
+    def test_stock_paths_are_logged(self, catalog, changes, db_session):
+        product_id = create(catalog)
+        since = changes.get_changes(0, 100)["next_since"]
+
+        reservation = ReservationRepository(db_session).reserve("u1", product_id, 2)
+        ReservationRepository(db_session).release_reservation(reservation.id)
+
+        feed = changes.get_changes(since, 100)
+        assert [(c["id"], c["data"]["stock"]) for c in feed["changes"]] == [(product_id, 5)]
+        assert db_session.query(ChangeLog).filter(ChangeLog.version > since).count() == 2
+
+    def test_categories_and_carousel(self, catalog, db_session, changes):
+        CategotyRepository(db_session).update_category({"id": "c1", "name": "todos", "color": "red"})
+        db_session.add(CarouselImage(id="k1", img_url="http://img", slug="one"))
+        db_session.commit()
+        CarouselRepository(db_session).update_carousel_image(CarouselReq(id="k1", img_url="http://img/2", slug="one"))
+
+        feed = changes.get_changes(0, 100, ["category", "carousel"])
+        assert {(c["entity"], c["id"]): c["data"] for c in feed["changes"]} == {
+            ("category", "c1"): {"id": "c1", "name": "todos", "color": "red"},
+            ("carousel", "k1"): {"id": "k1", "img_url": "http://img/2", "slug": "one"},
+        }
+
+    def test_paging(self, catalog, changes):
+        for i in range(5):
+            create(catalog, f"P{i}")
+
+        first = changes.get_changes(0, 3)
+        second = changes.get_changes(first["next_since"], 3)
+
+        assert first["has_more"] and not second["has_more"]
+        assert len(first["changes"]) + len(second["changes"]) == 6
+
+    def test_recent_rows_are_held_back(self, catalog, db_session):
+        create(catalog)
+        feed = ChangesRepository(db_session, safety_lag=60).get_changes(0, 100)
+
+        assert feed == {"changes": [], "next_since": 0, "has_more": False}
+
+
+class TestCompaction:
+
+    def test_superseded_rows_are_removed_without_changing_the_feed(self, catalog, changes, db_session):
+        kept, deleted = create(catalog, "A"), create(catalog, "B")
+        since = changes.get_changes(0, 100)["next_since"]
+        for price in (11, 12, 13):
+            catalog.save_product_changes(kept, ProductUpdateRequest(price=price))
+        catalog.delete_product(deleted)
+        feeds = [changes.get_changes(0, 100), changes.get_changes(since, 100)]
+
+        assert changes.compact(batch_size=2, keep_window=0) == 4
+
+        assert [changes.get_changes(0, 100), changes.get_changes(since, 100)] == feeds
+        assert db_session.query(ChangeLog).count() == 3
+        assert (deleted, "delete") in {(c["id"], c["operation"]) for c in feeds[1]["changes"]}
+
+    def test_recent_rows_are_not_compacted(self, catalog, db_session):
+        product_id = create(catalog)
+        catalog.save_product_changes(product_id, ProductUpdateRequest(price=11))
+
+        assert ChangesRepository(db_session, safety_lag=60).compact(keep_window=0) == 0
+
+    def test_rows_in_the_version_window_are_kept(self, catalog, changes):
+        product_id = create(catalog)
+        for price in (11, 12, 13):
+            catalog.save_product_changes(product_id, ProductUpdateRequest(price=price))
+
+        assert changes.compact(keep_window=2) == 2
@@ -0,0 +1,42 @@
+from sqlalchemy import create_engine, text
+
+from db_config.db_connection import InstrumentedQueuePool, PoolStats, get_db, get_pool_stats, pool_stats
+
+
+def test_pool_stats_snapshot():
+    stats = PoolStats()
+    stats.record_checkout(0.002)
+    stats.record_checkout(0.004)
+
+    snapshot = stats.snapshot()
+
+    assert snapshot["checkouts"] == 2
+    assert snapshot["avg_wait_ms"] == 3.0
+    assert snapshot["max_wait_ms"] == 4.0
+
+def test_instrumented_pool_records_checkouts(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}", poolclass=InstrumentedQueuePool, pool_size=2, max_overflow=0)
+    pool_stats.reset()
+
+    for _ in range(3):
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+
+    snapshot = pool_stats.snapshot(engine.pool)
+    assert snapshot["checkouts"] == 3
+    assert snapshot["checked_out"] == 0
+    engine.dispose()
+
+def test_get_db_closes_session():
+    dependency = get_db()
+    db = next(dependency)
+    db.execute(text("SELECT 1"))
+    assert db.in_transaction()
+
+    dependency.close()
+    assert not db.in_transaction()
+
+def test_get_pool_stats_reports_the_sync_pool():
+    stats = get_pool_stats()
+
+    assert "checkouts" in stats["sync"]
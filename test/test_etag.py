@@ -0,0 +1,95 @@
+import pytest
+from sqlalchemy import insert
+from sqlalchemy.orm import sessionmaker
+
+from db_config.db_tables import Category, CarouselImage, ChangeLog
+from src.components.categories.repository import CategotyRepository
+from src.utils.etag import ResourceVersions, resource_versions
+
+
+@pytest.fixture
+def client(client, db_session):
+    db_session.add(Category(id="c1", name="todos", color="bg-blue-500"))
+    db_session.add(CarouselImage(id="k1", img_url="http://img/1", slug="carousel1"))
+    db_session.commit()
+    return client
+
+
+def test_etag_changes_with_version_and_query():
+    versions = ResourceVersions()
+    first = versions.etag("products", "/products/", "limit=10")
+
+    assert versions.etag("products", "/products/", "limit=10") == first
+    assert versions.etag("products", "/products/", "limit=20") != first
+    versions.update({"products": (1, 1)})
+    assert versions.etag("products", "/products/", "limit=10") != first
+
+def test_versions_never_go_back():
+    versions = ResourceVersions()
+    changed = []
+    versions.subscribe(lambda *resources: changed.extend(resources))
+
+    versions.update({"products": (3, 2), "carousel": (0, 0)})
+    versions.update({"products": (3, 1)})
+    versions.update({"products": (2, 5)})
+
+    assert versions.get("products") == (3, 2)
+    assert changed == ["products"]
+
+@pytest.mark.parametrize("url", ["/api/v1/categories/", "/api/v1/carousel/", "/api/v1/products/", "/api/v1/products/categories/todos"])
+def test_matching_if_none_match_returns_304_without_queries(client, statements, url):
+    etag = client.get(url).headers["ETag"]
+    statements.clear()
+
+    response = client.get(url, headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert response.content == b""
+    assert statements == []
+
+def test_write_invalidates_etag(client, db_session):
+    etag = client.get("/api/v1/categories/").headers["ETag"]
+
+    CategotyRepository(db_session).create_category(Category(id="c2", name="bebés", color="bg-pink-500"))
+
+    response = client.get("/api/v1/categories/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert len(response.json()) == 2
+
+def test_commits_read_the_version_without_updating_shared_rows(db_session, statements):
+    CategotyRepository(db_session).create_category(Category(id="c1", name="todos"))
+    db_session.add(CarouselImage(id="k1", img_url="http://img/1", slug="carousel1"))
+    db_session.commit()
+
+    assert resource_versions.get("categories") == (1, 1)
+    assert resource_versions.get("carousel") == (2, 1)
+    assert resource_versions.get("products") == (0, 0)
+    assert not [statement for statement in statements if statement.lstrip().upper().startswith("UPDATE")]
+
+def test_writes_from_other_processes_change_the_etag(client, db_engine, db_session, monkeypatch):
+    monkeypatch.setattr(resource_versions, "session_factory", sessionmaker(bind=db_engine))
+    etag = client.get("/api/v1/categories/").headers["ETag"]
+    # Another worker's write: only the log changes until this process syncs
+    db_session.execute(insert(ChangeLog).values(entity="category", entity_id="c2", operation="upsert"))
+    db_session.commit()
+    assert client.get("/api/v1/categories/", headers={"If-None-Match": etag}).status_code == 304
+
+    resource_versions.sync()
+
+    assert client.get("/api/v1/categories/", headers={"If-None-Match": etag}).status_code == 200
+
+def test_late_commit_of_a_lower_version_changes_the_etag(client, db_engine, db_session, monkeypatch):
+    monkeypatch.setattr(resource_versions, "session_factory", sessionmaker(bind=db_engine))
+    db_session.execute(insert(ChangeLog).values(version=10, entity="category", entity_id="c1", operation="upsert"))
+    db_session.commit()
+    resource_versions.sync()
+    etag = client.get("/api/v1/categories/").headers["ETag"]
+    # A transaction that got version 5 before 10 was written commits afterwards
+    db_session.execute(insert(ChangeLog).values(version=5, entity="category", entity_id="c3", operation="upsert"))
+    db_session.commit()
+
+    resource_versions.sync()
+
+    assert client.get("/api/v1/categories/", headers={"If-None-Match": etag}).status_code == 200
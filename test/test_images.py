@@ -0,0 +1,142 @@
+import asyncio
+import pytest
+import struct
+import zlib
+from hashlib import sha256
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from main import app
+from src.components.images.controller import admin_role_required
+from src.components.images import storage
+from src.components.images.storage import ImageStore, image_store, derivative_name
+
+def png(width: int, height: int) -> bytes:
+    """A valid grayscale PNG, built by hand so the tests don't need Pillow."""
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+    rows = b"".join(b"\x00" + b"\x80" * width for _ in range(height))
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 0, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(rows)) + chunk(b"IEND", b""))
+
+PNG = png(8, 8)
+UPLOAD_URL = "/api/v1/images/"
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(image_store, "root", tmp_path)
+    return image_store
+
+@pytest.fixture
+def client(store):
+    app.dependency_overrides[admin_role_required] = lambda: None
+    yield TestClient(app)
+    app.dependency_overrides.pop(admin_role_required)
+
+async def chunked(data: bytes, size: int):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+class TestImageUpload:
+
+    def test_upload_is_stored_by_content_hash(self, client, store):
+        response = client.post(UPLOAD_URL, content=PNG)
+
+        digest = sha256(PNG).hexdigest()
+        assert response.status_code == 201
+        assert response.json()["url"] == f"http://testserver/media/{digest}.png"
+        assert (store.root / f"{digest}.png").read_bytes() == PNG
+
+    def test_same_content_is_deduplicated(self, client, store):
+        first = client.post(UPLOAD_URL, content=PNG)
+        second = client.post(UPLOAD_URL, content=PNG)
+
+        assert second.status_code == 200
+        assert second.json()["duplicate"] is True
+        assert second.json()["url"] == first.json()["url"]
+        assert len(list(store.root.iterdir())) == 1
+
+    @pytest.mark.parametrize("body, status", [(b"not an image at all", 415), (b"", 400)])
+    def test_invalid_uploads_leave_no_files(self, client, store, body, status):
+        response = client.post(UPLOAD_URL, content=body)
+
+        assert response.status_code == status
+        assert list(store.root.iterdir()) == []
+
+    def test_oversized_upload_is_rejected(self, client, store, monkeypatch):
+        monkeypatch.setattr(store, "max_bytes", 32)
+
+        response = client.post(UPLOAD_URL, content=PNG)
+
+        assert response.status_code == 413
+        assert list(store.root.iterdir()) == []
+
+    def test_small_chunks_are_streamed_to_disk(self, tmp_path):
+        store = ImageStore(root=tmp_path, base_url="https://cdn.example.com/img", widths=())
+
+        image = asyncio.run(store.save(chunked(PNG, 3)))
+
+        assert image["url"] == f"https://cdn.example.com/img/{sha256(PNG).hexdigest()}.png"
+        assert image["size"] == len(PNG)
+
+    def test_truncated_signature_is_rejected(self, tmp_path):
+        store = ImageStore(root=tmp_path, widths=())
+
+        with pytest.raises(HTTPException) as error:
+            asyncio.run(store.save(chunked(PNG[:5], 2)))
+
+        assert error.value.status_code == 415
+
+    def test_webp_derivatives_are_generated(self, tmp_path):
+        Image = pytest.importorskip("PIL.Image")
+        source = tmp_path / "source.png"
+        Image.new("RGB", (800, 400), "red").save(source)
+        store = ImageStore(root=tmp_path / "media", widths=(320, 1280), workers=1)
+
+        async def upload():
+            image = await store.save(chunked(source.read_bytes(), 1024))
+            await store.wait_for_derivatives()
+            return image
+
+        image = asyncio.run(upload())
+        store.shutdown()
+
+        with Image.open(store.root / derivative_name(image["sha256"], 320)) as small:
+            assert small.format == "WEBP" and small.size == (320, 160)
+        with Image.open(store.root / derivative_name(image["sha256"], 1280)) as large:
+            assert large.size == (800, 400)
+
+    def test_corrupt_image_is_rejected(self, client, store):
+        pytest.importorskip("PIL")
+
+        response = client.post(UPLOAD_URL, content=PNG[:40] + b"\x00" * 64)
+
+        assert response.status_code == 415
+        assert list(store.root.iterdir()) == []
+
+    def test_image_over_the_pixel_limit_is_rejected(self, client, store, monkeypatch):
+        pytest.importorskip("PIL")
+        monkeypatch.setattr(store, "max_pixels", 1000)
+
+        response = client.post(UPLOAD_URL, content=png(100, 100))
+
+        assert response.status_code == 413
+        assert list(store.root.iterdir()) == []
+
+    def test_derivatives_are_pending_until_written(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(storage, "PILLOW_INSTALLED", True)
+        store = ImageStore(root=tmp_path, base_url="/media", widths=(320, 640))
+        digest = sha256(PNG).hexdigest()
+        (tmp_path / f"{digest}.png").write_bytes(PNG)
+        (tmp_path / derivative_name(digest, 320)).write_bytes(b"webp")
+
+        image = store.describe(f"{digest}.png")
+
+        assert image["derivatives"] == {"320": f"/media/{derivative_name(digest, 320)}"}
+        assert image["pending"] == ["640"]
+
+    def test_describe_only_serves_stored_images(self, client, store):
+        assert client.get(UPLOAD_URL + "missing.png").status_code == 404
+        assert client.get(UPLOAD_URL + ".upload-123").status_code == 404
@@ -0,0 +1,169 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.orm import sessionmaker
+
+from db_config.db_tables import Category, Product
+from src.components.products.live import LiveProductHub
+from src.components.products.repository import ProductModel
+from src.components.products.schemas import ProductReq, ProductUpdateRequest
+from src.components.reservations.repository import ReservationRepository
+from db_config.change_tracking import on_commit, _commit_listeners
+
+
+@pytest.fixture
+def catalog(db_session):
+    db_session.add_all([Category(id="c1", name="Todos"), Category(id="c2", name="Bebés")])
+    db_session.commit()
+    return ProductModel(db_session)
+
+@pytest.fixture
+def hub(db_engine):
+    hub = LiveProductHub(sessionmaker(bind=db_engine))
+    on_commit(hub.publish)
+    yield hub
+    _commit_listeners.remove(hub.publish)
+
+@pytest.fixture
+def polling_hub(db_engine):
+    """A hub that isn't told about commits, like the hub of another process: it only sees change_log."""
+    return LiveProductHub(sessionmaker(bind=db_engine), poll_interval=0.01, safety_lag=0)
+
+def create(catalog, name, category="Todos"):
+    return catalog.save_new_product(ProductReq(name=name, price=10, stock=5, brand="b", description="d", category_name=category, images=[], sizes=[]))
+
+def run(hub, scenario):
+    async def main():
+        hub.start()
+        try:
+            return await scenario()
+        finally:
+            await hub.stop()
+    return asyncio.run(main())
+
+async def next_message(subscription, timeout=1):
+    return await asyncio.wait_for(subscription.queue.get(), timeout)
+
+
+class TestLiveProductHub:
+
+    def test_price_and_stock_updates_reach_product_subscribers(self, catalog, hub):
+        product_id = create(catalog, "Shirt")
+
+        async def scenario():
+            subscription = hub.subscribe(product_ids=[product_id])
+            catalog.save_product_changes(product_id, ProductUpdateRequest(price=12.5, stock=3))
+            return await next_message(subscription)
+
+        message = run(hub, scenario)
+
+        assert message.startswith(b"event: product\n")
+        assert b'"price":12.5' in message and b'"stock":3' in message
+
+    def test_category_subscribers_only_get_their_category(self, catalog, hub):
+        shirt, bib = create(catalog, "Shirt"), create(catalog, "Bib", category="Bebés")
+
+        async def scenario():
+            subscription = hub.subscribe(categories=["Bebés"])
+            catalog.save_product_changes(shirt, ProductUpdateRequest(stock=1))
+            catalog.save_product_changes(bib, ProductUpdateRequest(stock=2, category_name="Bebés"))
+            message = await next_message(subscription)
+            return message, subscription.queue.qsize()
+
+        message, queued = run(hub, scenario)
+
+        assert bib.encode() in message
+        assert queued == 0
+
+    def test_reservations_and_deletes_are_pushed(self, catalog, hub, db_session):
+        product_id = create(catalog, "Shirt")
+
+        async def scenario():
+            subscription = hub.subscribe(product_ids=[product_id])
+            ReservationRepository(db_session).reserve("u1", product_id, 2)
+            reserved = await next_message(subscription)
+            catalog.delete_product(product_id)
+            return reserved, await next_message(subscription)
+
+        reserved, deleted = run(hub, scenario)
+
+        assert b'"stock":3' in reserved
+        assert deleted == b'event: delete\ndata: {"id":"' + product_id.encode() + b'"}\n\n'
+
+    def test_rolled_back_writes_are_not_published(self, catalog, hub, db_session):
+        product_id = create(catalog, "Shirt")
+
+        async def scenario():
+            subscription = hub.subscribe(product_ids=[product_id])
+            db_session.get(Product, product_id).stock = 0
+            db_session.flush()
+            db_session.rollback()
+            await asyncio.sleep(0.05)
+            return subscription.queue.qsize()
+
+        assert run(hub, scenario) == 0
+
+    def test_slow_subscribers_are_closed(self, hub):
+        async def scenario():
+            subscription = hub.subscribe(product_ids=["p1"])
+            subscription.queue_size = 2
+            for _ in range(3):
+                hub._fan_out(b"event: product\n\n", "p1", "Todos")
+            return subscription, hub.stats()
+
+        subscription, stats = run(hub, scenario)
+
+        assert subscription.closed
+        assert stats["subscriptions"] == 0
+
+    def test_stream_unsubscribes_when_closed(self, hub):
+        async def scenario():
+            subscription = hub.subscribe(product_ids=["p1"])
+            stream = hub.stream(subscription, heartbeat=0.01)
+            chunks = [await anext(stream), await anext(stream)]
+            hub.unsubscribe(subscription)
+            chunks += [chunk async for chunk in stream]
+            return chunks, hub.stats()
+
+        chunks, stats = run(hub, scenario)
+
+        assert chunks == [b"retry: 3000\n\n", b": ping\n\n"]
+        assert stats == {"subscriptions": 0, "products": 0, "categories": 0}
+
+    def test_changes_committed_elsewhere_are_polled(self, catalog, polling_hub):
+        product_id = create(catalog, "Shirt")
+
+        async def scenario():
+            subscription = polling_hub.subscribe(product_ids=[product_id])
+            await asyncio.sleep(0.05)
+            catalog.save_product_changes(product_id, ProductUpdateRequest(stock=4))
+            return await next_message(subscription)
+
+        assert b'"stock":4' in run(polling_hub, scenario)
+
+    def test_polled_changes_already_pushed_on_commit_are_not_repeated(self, catalog, hub):
+        # The poll only sees the change after the commit shortcut has pushed it
+        hub.poll_interval, hub.safety_lag = 0.01, 0.05
+        product_id = create(catalog, "Shirt")
+
+        async def scenario():
+            subscription = hub.subscribe(product_ids=[product_id])
+            await asyncio.sleep(0.05)
+            catalog.save_product_changes(product_id, ProductUpdateRequest(stock=4))
+            await next_message(subscription)
+            await asyncio.sleep(0.2)
+            return subscription.queue.qsize()
+
+        assert run(hub, scenario) == 0
+
+    def test_open_subscriptions_are_capped(self, hub):
+        hub.max_subscriptions = 2
+        hub.subscribe(product_ids=["p1"])
+        subscription = hub.subscribe(product_ids=["p2"])
+
+        with pytest.raises(HTTPException) as error:
+            hub.subscribe(product_ids=["p3"])
+        hub.unsubscribe(subscription)
+        hub.subscribe(product_ids=["p3"])
+
+        assert error.value.status_code == 503
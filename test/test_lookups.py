@@ -0,0 +1,86 @@
+import pytest
+from sqlalchemy import update
+
+from db_config.db_tables import SizesLookup, Category
+from db_config.lookups import lookups
+from src.components.categories.repository import CategotyRepository
+from src.components.products.repository import ProductModel
+from src.components.products.schemas import ProductReq
+from src.utils.etag import resource_versions
+
+
+@pytest.fixture
+def db(db_session):
+    db_session.add_all([
+        SizesLookup(id=1, size="xs"), SizesLookup(id=2, size="months_3"),
+        Category(id="c1", name="Todos"),
+    ])
+    db_session.commit()
+    lookups.load(db_session)
+    return db_session
+
+
+class TestLookupRegistry:
+
+    def test_resolves_without_queries(self, db, statements):
+        assert lookups.sizes(db, ["3M", "XS", "XXL", "XS"]) == [("months_3", 2), ("xs", 1)]
+        assert lookups.size_id(db, "XS") == 1
+        assert lookups.category_id(db, "Todos") == "c1"
+        assert statements == []
+
+    def test_unknown_category_reloads_once(self, db, statements):
+        db.add(Category(id="c2", name="Bebés"))
+        db.commit()
+        statements.clear()
+
+        assert lookups.category_id(db, "Bebés") == "c2"
+        assert lookups.category_id(db, "Bebés") == "c2"
+        assert len(statements) == 1
+
+    def test_missing_category_is_negative_cached(self, db, statements):
+        for _ in range(5):
+            assert lookups.category_id(db, "Nope") is None
+
+        assert len(statements) == 1
+
+    def test_category_writes_clear_the_misses(self, db):
+        assert lookups.category_id(db, "Niños") is None
+
+        CategotyRepository(db).create_category(Category(id="c3", name="Niños"))
+
+        assert lookups.category_id(db, "Niños") == "c3"
+
+    def test_category_writes_invalidate(self, db):
+        CategotyRepository(db).create_category(Category(id="c3", name="Niños"))
+
+        assert "categories" not in lookups._tables
+        assert lookups.category_id(db, "Niños") == "c3"
+
+    def test_category_writes_of_other_processes_invalidate(self, db):
+        # Another worker renamed the category: only the database and the synced version change
+        db.execute(update(Category).where(Category.id == "c1").values(name="Todo"))
+        db.commit()
+        assert lookups.category_id(db, "Todos") == "c1"
+
+        resource_versions.update({"categories": (resource_versions.get("categories")[0] + 1, 1)})
+
+        assert lookups.category_id(db, "Todos") is None
+        assert lookups.category_id(db, "Todo") == "c1"
+
+    def test_load_started_before_an_invalidation_is_not_kept(self, db, monkeypatch):
+        load = lookups.loaders["categories"]
+        def load_then_other_process_writes(session):
+            values = load(session)
+            lookups.invalidate("categories")
+            return values
+        lookups.invalidate("categories")
+        monkeypatch.setitem(lookups.loaders, "categories", load_then_other_process_writes)
+
+        assert lookups.category_id(db, "Todos") == "c1"
+        assert "categories" not in lookups._tables
+
+    def test_product_create_does_not_query_sizes(self, db, statements):
+        ProductModel(db).save_new_product(ProductReq(name="Shirt", price=1, stock=1, description="d", category_name="Todos", images=[], sizes=["XS", "3M"]))
+
+        assert not [s for s in statements if "product_sizes_lookup" in s]
+        assert len([s for s in statements if s.startswith("INSERT INTO product_sizes_association")]) == 1
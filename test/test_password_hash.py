@@ -0,0 +1,132 @@
+import asyncio
+import pytest
+from time import sleep
+from fastapi import HTTPException
+
+from db_config.db_tables import User
+from db_config.enums import UserRole
+from src.utils.password_hash import PasswordHashPool, get_password_hash, verify_password, build_context, calibrate, BCRYPT_ROUNDS
+
+
+@pytest.fixture
+def pool():
+    pool = PasswordHashPool(workers=1, max_queue=1)
+    yield pool
+    pool.shutdown()
+
+@pytest.fixture
+def client(client, db_session):
+    db_session.add(User(user_id="u1", name="Ana", email="ana@example.com", password_hash=get_password_hash("secret123"), role=UserRole.user))
+    db_session.commit()
+    return client
+
+
+class TestPasswordHashPool:
+
+    def test_hash_and_verify_run_on_the_pool(self, pool):
+        async def scenario():
+            password_hash = await pool.run(get_password_hash, "secret123")
+            return password_hash, await pool.run(verify_password, "secret123", password_hash)
+
+        password_hash, verified = asyncio.run(scenario())
+
+        assert verified and verify_password("secret123", password_hash)
+        assert pool.stats()["completed"] == 2
+
+    def test_work_beyond_the_queue_is_rejected(self, pool):
+        async def scenario():
+            return await asyncio.gather(*(pool.run(sleep, 0.2) for _ in range(3)), return_exceptions=True)
+
+        results = asyncio.run(scenario())
+
+        rejected = [result for result in results if isinstance(result, HTTPException)]
+        assert len(rejected) == 1 and rejected[0].status_code == 503
+        assert pool.stats()["rejected"] == 1
+
+    def test_stats_report_running_and_queued_work(self, pool):
+        async def scenario():
+            tasks = [asyncio.ensure_future(pool.run(sleep, 0.2)) for _ in range(2)]
+            await asyncio.sleep(0.05)
+            stats = pool.stats()
+            await asyncio.gather(*tasks)
+            return stats
+
+        stats = asyncio.run(scenario())
+
+        assert (stats["running"], stats["queued"]) == (1, 1)
+
+
+class TestPasswordContext:
+
+    def test_lower_cost_hashes_need_update(self):
+        old_hash = build_context("bcrypt", bcrypt_rounds=4).hash("secret123")
+
+        verified, new_hash = build_context("bcrypt", bcrypt_rounds=5).verify_and_update("secret123", old_hash)
+
+        assert verified and new_hash.startswith("$2b$05$")
+
+    def test_secondary_schemes_are_verify_only(self):
+        context = build_context("argon2id, bcrypt")
+
+        assert context.default_scheme() == "argon2"
+        assert context.needs_update(build_context("bcrypt", bcrypt_rounds=4).hash("secret123"))
+
+    def test_calibrate_stops_before_the_target(self):
+        cost, ms = calibrate("bcrypt", target_ms=0, samples=1, min_cost=4)
+
+        assert cost == 4 and ms > 0
+
+
+class TestLogin:
+
+    def test_login_verifies_the_password_off_the_request_threads(self, client):
+        response = client.post("/api/v1/auth/login", data={"username": "ana@example.com", "password": "secret123"})
+
+        assert response.status_code == 200
+        assert response.json()["token_type"] == "bearer"
+
+    def test_login_rehashes_outdated_hashes(self, client, db_session):
+        db_session.get(User, "u1").password_hash = build_context("bcrypt", bcrypt_rounds=4).hash("secret123")
+        db_session.commit()
+
+        response = client.post("/api/v1/auth/login", data={"username": "ana@example.com", "password": "secret123"})
+
+        db_session.expire_all()
+        password_hash = db_session.get(User, "u1").password_hash
+        assert response.status_code == 200
+        assert password_hash.startswith(f"$2b${BCRYPT_ROUNDS:02d}$") and verify_password("secret123", password_hash)
+
+    def test_failed_rehash_still_logs_in(self, client, db_session, monkeypatch):
+        outdated_hash = build_context("bcrypt", bcrypt_rounds=4).hash("secret123")
+        db_session.get(User, "u1").password_hash = outdated_hash
+        db_session.commit()
+        def failing_update(self, id, data):
+            raise HTTPException(status_code=500, detail="Error updating user in repository: database is locked")
+        monkeypatch.setattr("src.components.users.repository.UserRepository.update_user", failing_update)
+
+        response = client.post("/api/v1/auth/login", data={"username": "ana@example.com", "password": "secret123"})
+
+        db_session.expire_all()
+        assert response.status_code == 200
+        assert response.json()["token_type"] == "bearer"
+        assert db_session.get(User, "u1").password_hash == outdated_hash
+
+    def test_login_with_wrong_password(self, client):
+        response = client.post("/api/v1/auth/login", data={"username": "ana@example.com", "password": "wrong"})
+
+        assert response.status_code == 400
+
+
+class TestPreRegister:
+
+    def test_saturated_hash_pool_sends_no_email(self, client, monkeypatch):
+        sent = []
+        async def saturated(password):
+            raise HTTPException(status_code=503, detail="Too many password operations in progress, try again.")
+        monkeypatch.setattr("src.components.auth.service.get_password_hash_async", saturated)
+        monkeypatch.setattr("src.utils.email_handler.EmailHandler.send_verification_email", lambda self: sent.append(self))
+
+        response = client.post("/api/v1/auth/register", json={"user_name": "Bea", "email": "bea@example.com", "password": "secret123", "password_confirm": "secret123"})
+
+        assert response.status_code == 503
+        assert sent == []
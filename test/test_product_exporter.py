@@ -0,0 +1,51 @@
+import csv
+import io
+import json
+import pytest
+
+from db_config.db_tables import Product, ProductImages, SizesLookup, Category
+from src.components.products.exporter import export_products, product_chunks
+from src.components.products.importer import ProductImporter
+
+
+@pytest.fixture
+def catalog(db_session):
+    sizes = [SizesLookup(id=1, size="xs"), SizesLookup(id=2, size="months_3")]
+    db_session.add_all([Category(id="c1", name="Todos"), *sizes])
+    for i in range(12):
+        db_session.add(Product(
+            id=f"p{i:02d}", name=f"Product {i:02d}", price=i, stock=i, brand="b", description="d", category_name="Todos",
+            sizes=sizes[: i % 2 + 1], images=[ProductImages(id=f"i{i:02d}", url=f"http://img/{i}")],
+        ))
+    db_session.commit()
+    return db_session
+
+
+class TestProductExport:
+
+    def test_reads_catalog_in_chunks(self, catalog, statements):
+        chunks = list(product_chunks(catalog, chunk_size=5))
+
+        assert [len(chunk) for chunk in chunks] == [5, 5, 2]
+        assert [product.id for chunk in chunks for product in chunk] == [f"p{i:02d}" for i in range(12)]
+        # One products query plus one images and one sizes SELECT ... IN per chunk
+        assert len(statements) == 1 + 2 * 3
+
+    def test_ndjson_lines_are_product_responses(self, catalog):
+        lines = "".join(export_products("ndjson", catalog, chunk_size=5)).splitlines()
+
+        assert len(lines) == 12
+        first = json.loads(lines[0])
+        assert first["id"] == "p00"
+        assert first["images"] == [{"id": "i00", "url": "http://img/0"}]
+
+    def test_csv_can_be_imported_back(self, catalog):
+        exported = "".join(export_products("csv", catalog, chunk_size=5))
+        rows = list(csv.DictReader(io.StringIO(exported)))
+        assert len(rows) == 12
+        assert rows[1]["sizes"] == "XS|3M"
+
+        catalog.query(Product).delete()
+        catalog.commit()
+        result = ProductImporter(catalog).import_file(io.StringIO(exported), "csv")
+        assert result["imported"] == 12
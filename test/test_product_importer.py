@@ -0,0 +1,105 @@
+import csv
+import io
+import json
+import pytest
+
+from db_config.db_tables import Product, ProductImages, SizesLookup, Category
+from src.components.products.importer import ProductImporter
+from src.components.products.cache import product_cache, cache_product, generation
+from src.utils.cache import MISSING
+
+
+@pytest.fixture
+def importer(db_session):
+    db_session.add_all([
+        Category(id="c1", name="Todos"),
+        SizesLookup(id=1, size="xs"),
+        SizesLookup(id=2, size="s"),
+        Product(id="p0", name="Existing", price=1, stock=1, category_name="Todos"),
+    ])
+    db_session.commit()
+    return ProductImporter(db_session, batch_size=2)
+
+def product_row(name, **overrides):
+    row = {"name": name, "price": 10, "stock": 3, "description": "d", "category_name": "Todos", "images": ["http://img/1"], "sizes": ["XS"]}
+    row.update(overrides)
+    return row
+
+
+class TestProductImporter:
+
+    def test_imports_csv_with_images_and_sizes(self, importer, db_session):
+        csv_file = io.BytesIO(
+            "name,price,stock,brand,description,category_name,images,sizes\n"
+            "Shirt,10.5,4,Acme,A shirt,Todos,http://img/1|http://img/2,XS|S\n"
+            "Socks,2,9,,Warm socks,Todos,,\n"
+            "Hat,3,1,,A hat,Todos,http://img/3,S\n".encode()
+        )
+        result = importer.import_file(csv_file, "csv")
+
+        assert result == {"imported": 3, "failed": 0, "errors": []}
+        shirt = db_session.query(Product).filter_by(name="Shirt").one()
+        assert sorted(image.url for image in shirt.images) == ["http://img/1", "http://img/2"]
+        assert sorted(size.size for size in shirt.sizes) == ["s", "xs"]
+        assert db_session.query(Product).filter_by(name="Socks").one().brand == "Dalana Kids"
+
+    def test_imports_ndjson(self, importer, db_session):
+        lines = io.BytesIO("\n".join(json.dumps(product_row(f"P{i}")) for i in range(5)).encode())
+        result = importer.import_file(lines, "ndjson")
+
+        assert result["imported"] == 5
+        assert db_session.query(ProductImages).count() == 5
+
+    def test_rows_after_a_malformed_line_are_imported(self, importer, db_session):
+        lines = io.BytesIO("\n".join([json.dumps(product_row("A")), '{"name": "broken', json.dumps(product_row("B")), json.dumps(product_row("C"))]).encode())
+        result = importer.import_file(lines, "ndjson")
+
+        assert result["imported"] == 3
+        assert [error["row"] for error in result["errors"]] == [2]
+        assert result["errors"][0]["error"].startswith("Unreadable row")
+
+    def test_rows_after_an_unreadable_csv_line_are_imported(self, importer, db_session):
+        limit = csv.field_size_limit(100)
+        try:
+            result = importer.import_file(io.BytesIO(
+                "name,price,stock,description,category_name\n"
+                "A,1,1,d,Todos\n"
+                f"B,1,1,{'x' * 200},Todos\n"
+                "C,1,1,d,Todos\n".encode()
+            ), "csv")
+        finally:
+            csv.field_size_limit(limit)
+
+        assert result["imported"] == 2
+        assert [error["row"] for error in result["errors"]] == [2]
+
+    def test_invalid_encoding_stops_the_import(self, importer, db_session):
+        result = importer.import_file(io.BytesIO(b"name,price,stock,description,category_name\nA,1,1,d,Todos\nB,1,1,\xff\xfe,Todos\n"), "csv")
+
+        assert result["errors"][0]["error"].startswith("Unreadable file")
+
+    def test_reports_invalid_rows_and_keeps_valid_ones(self, importer, db_session):
+        rows = iter([
+            product_row("Good"),
+            product_row("Bad price", price="free"),
+            product_row("Bad size", sizes=["XXXL"]),
+            product_row("Bad category", category_name="Nope"),
+            product_row("Existing"),
+            product_row("Good"),
+        ])
+        result = importer.import_rows(rows)
+
+        assert result["imported"] == 1
+        assert [error["row"] for error in result["errors"]] == [2, 3, 4, 5, 6]
+        assert db_session.query(Product).count() == 2
+
+    def test_batched_inserts(self, importer, statements):
+        importer.import_rows(iter([product_row(f"P{i}") for i in range(6)]))
+
+        inserts = [s for s in statements if s.startswith("INSERT INTO products ")]
+        assert len(inserts) == 3
+
+    def test_invalidates_cached_misses(self, importer, db_session):
+        cache_product(("name", "New"), None, generation())
+        importer.import_rows(iter([product_row("New")]))
+        assert product_cache.get(("name", "New")) is MISSING
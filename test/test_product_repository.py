@@ -0,0 +1,340 @@
+import pytest
+from os import getenv
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from db_config.db_connection import Base
+from db_config.db_tables import Product, ProductImages, SizesLookup, Category
+from src.components.products.repository import ProductModel
+from src.components.products.cache import product_cache
+from src.utils.etag import resource_versions
+from src.components.products.schemas import ProductReq, ProductUpdateRequest, ProductImage
+
+
+@pytest.fixture
+def products(db_session):
+    db_session.add_all([Category(id="c1", name="Todos"), Category(id="c2", name="Bebés")])
+    for i in range(25):
+        db_session.add(Product(
+            id=f"p{i:02d}", name=f"Product {i:02d}", price=float(i % 5), stock=i,
+            category_name="Todos" if i % 2 else "Bebés",
+            images=[ProductImages(id=f"i{i:02d}", url=f"http://img/{i}")],
+        ))
+    db_session.commit()
+    return ProductModel(db_session)
+
+def collect_pages(fetch, **kwargs):
+    seen, cursor = [], None
+    while True:
+        page, cursor = fetch(cursor=cursor, **kwargs)
+        seen.extend(page)
+        if cursor is None:
+            return seen
+
+
+class TestKeysetPagination:
+
+    def test_first_page_returns_limit_and_cursor(self, products):
+        page, next_cursor = products.get_all_products(limit=10)
+        assert [p.id for p in page] == [f"p{i:02d}" for i in range(10)]
+        assert next_cursor is not None
+
+    @pytest.mark.parametrize("sort_by", ["id", "name", "price", "stock"])
+    @pytest.mark.parametrize("order", ["asc", "desc"])
+    def test_pages_cover_catalog_in_sort_order(self, products, sort_by, order):
+        seen = collect_pages(products.get_all_products, limit=7, sort_by=sort_by, order=order)
+
+        keys = [(getattr(p, sort_by), p.id) for p in seen]
+        assert len(seen) == 25
+        assert keys == sorted(keys, reverse=order == "desc")
+
+    def test_category_pages(self, products):
+        seen = collect_pages(products.get_products_by_category, category="Todos", limit=4, sort_by="price")
+        assert len(seen) == 12
+        assert all(p.category_name == "Todos" for p in seen)
+
+    def test_last_page_has_no_cursor(self, products):
+        page, next_cursor = products.get_all_products(limit=25)
+        assert len(page) == 25
+        assert next_cursor is None
+
+    def test_cursor_for_other_sort_key_is_rejected(self, products):
+        _, next_cursor = products.get_all_products(limit=5, sort_by="price")
+        with pytest.raises(HTTPException) as exc_info:
+            products.get_all_products(limit=5, cursor=next_cursor, sort_by="name")
+        assert exc_info.value.status_code == 400
+
+    def test_invalid_cursor_is_rejected(self, products):
+        with pytest.raises(HTTPException) as exc_info:
+            products.get_all_products(cursor="not-a-cursor")
+        assert exc_info.value.status_code == 400
+
+
+def add_search_catalog(db_session):
+    db_session.add(Category(id="c1", name="Todos"))
+    db_session.add_all([
+        Product(id="p1", name="Camiseta azul", brand="Dalana Kids", description="Algodón suave", category_name="Todos"),
+        Product(id="p2", name="Pantalón", brand="Dalana Kids", description="Azul marino, con bolsillos", category_name="Todos"),
+        Product(id="p3", name="Vestido", brand="Otra marca", description="Flores rojas", category_name="Todos"),
+    ])
+    db_session.commit()
+    return ProductModel(db_session)
+
+
+class TestSearchProducts:
+
+    @pytest.fixture
+    def catalog(self, db_session):
+        return add_search_catalog(db_session)
+
+    def test_matches_partial_words_across_fields(self, catalog):
+        assert {p.id for p in catalog.search_products("azu")} == {"p1", "p2"}
+        assert [p.id for p in catalog.search_products("otra")] == ["p3"]
+
+    def test_all_terms_must_match(self, catalog):
+        assert [p.id for p in catalog.search_products("dalana bolsi")] == ["p2"]
+
+    def test_accents_are_ignored(self, catalog):
+        assert [p.id for p in catalog.search_products("algodon")] == ["p1"]
+
+    def test_index_follows_updates_and_deletes(self, catalog, db_session):
+        db_session.get(Product, "p3").description = "Azul cielo"
+        db_session.delete(db_session.get(Product, "p1"))
+        db_session.commit()
+
+        assert {p.id for p in catalog.search_products("azul")} == {"p2", "p3"}
+
+    def test_index_survives_vacuum(self, catalog, db_session, db_engine):
+        db_session.delete(db_session.get(Product, "p1"))
+        db_session.commit()
+        with db_engine.connect() as connection:
+            connection.exec_driver_sql("VACUUM")
+
+        assert [p.id for p in catalog.search_products("flores")] == ["p3"]
+        assert [p.id for p in catalog.search_products("bolsillos")] == ["p2"]
+
+    def test_pagination_and_empty_query(self, catalog):
+        first = catalog.search_products("dalana", limit=1)
+        second = catalog.search_products("dalana", limit=1, offset=1)
+        assert len(first) == len(second) == 1
+        assert first[0].id != second[0].id
+        assert catalog.search_products("  ¿? ") == []
+
+
+@pytest.mark.skipif(not getenv("TEST_POSTGRES_URL"), reason="set TEST_POSTGRES_URL to an empty Postgres database")
+class TestPostgresSearch:
+
+    @pytest.fixture
+    def catalog(self):
+        engine = create_engine(getenv("TEST_POSTGRES_URL"))
+        Base.metadata.create_all(engine)
+        session = sessionmaker(autoflush=False, bind=engine)()
+        yield add_search_catalog(session)
+        session.close()
+        Base.metadata.drop_all(engine)
+        engine.dispose()
+
+    @pytest.mark.parametrize("q", ["algodon", "algodón", "ALGODÓN", "pantalon"])
+    def test_accents_are_ignored(self, catalog, q):
+        assert len(catalog.search_products(q)) == 1
+
+    def test_prefixes_match_across_fields(self, catalog):
+        assert {p.id for p in catalog.search_products("azu")} == {"p1", "p2"}
+
+
+class TestProductCache:
+
+    @pytest.fixture
+    def catalog(self, db_session):
+        db_session.add(Category(id="c1", name="Todos"))
+        db_session.add(Product(id="p1", name="Shirt", brand="b", description="d", category_name="Todos",
+                               images=[ProductImages(id="i1", url="http://img/1")]))
+        db_session.commit()
+        return ProductModel(db_session)
+
+    def test_reads_are_served_from_cache(self, catalog, statements):
+        first = catalog.get_product_by_id("p1")
+        executed = len(statements)
+
+        assert catalog.get_product_by_id("p1") == first
+        assert catalog.get_product_by_name("Shirt") == first
+        assert len(statements) == executed
+        assert product_cache.stats()["hits"] == 2
+
+    def test_misses_are_cached(self, catalog, statements):
+        assert catalog.get_product_by_name("Unknown") is None
+        executed = len(statements)
+
+        assert catalog.get_product_by_name("Unknown") is None
+        assert len(statements) == executed
+
+    def test_create_invalidates_negative_entry(self, catalog):
+        assert catalog.get_product_by_name("Pants") is None
+
+        product_id = catalog.save_new_product(ProductReq(name="Pants", price=1, stock=1, brand="b", description="d", category_name="Todos", images=[], sizes=[]))
+
+        assert catalog.get_product_by_name("Pants").id == product_id
+
+    def test_update_invalidates_old_and_new_name(self, catalog):
+        catalog.get_product_by_name("Shirt")
+        assert catalog.get_product_by_name("T-Shirt") is None
+
+        catalog.save_product_changes("p1", ProductUpdateRequest(name="T-Shirt", price=9.5))
+
+        assert catalog.get_product_by_name("Shirt") is None
+        assert catalog.get_product_by_name("T-Shirt").price == 9.5
+        assert catalog.get_product_by_id("p1").name == "T-Shirt"
+
+    def test_image_writes_invalidate_product(self, catalog):
+        catalog.get_product_by_name("Shirt")
+
+        catalog.save_product_changes("p1", ProductUpdateRequest(images=[]))
+        assert catalog.get_product_by_name("Shirt").images == []
+
+        catalog.save_product_changes("p1", ProductUpdateRequest(images=[ProductImage(id="i2", url="http://img/2")]))
+        assert [image.id for image in catalog.get_product_by_name("Shirt").images] == ["i2"]
+
+    def test_delete_invalidates_product(self, catalog):
+        catalog.get_product_by_id("p1")
+
+        catalog.delete_product("p1")
+
+        assert catalog.get_product_by_id("p1") is None
+        assert catalog.get_product_by_name("Shirt") is None
+
+    def test_writes_from_other_processes_clear_the_cache(self, catalog, statements):
+        catalog.get_product_by_id("p1")
+        executed = len(statements)
+
+        resource_versions.update({"products": (resource_versions.get("products")[0] + 1, 1)})
+
+        catalog.get_product_by_id("p1")
+        assert len(statements) > executed
+
+    def test_read_loaded_before_a_write_is_not_stored(self, catalog, monkeypatch):
+        read = catalog.get_product
+        def read_then_other_process_writes(id):
+            product = read(id)
+            resource_versions.update({"products": (resource_versions.get("products")[0] + 1, 1)})
+            return product
+        monkeypatch.setattr(catalog, "get_product", read_then_other_process_writes)
+
+        assert catalog.get_product_by_id("p1").name == "Shirt"
+        assert len(product_cache) == 0
+
+
+class TestBatchWrites:
+
+    def test_batch_update_is_one_transaction_with_per_item_results(self, products, db_session, statements):
+        results = products.batch_update_products([
+            {"id": "p00", "price": 99.0},
+            {"id": "p01", "stock": 0, "name": "Renamed"},
+            {"id": "nope", "price": 1.0},
+            {"id": "p02", "name": "Product 03"},
+            {"id": "p04", "category_name": "Unknown"},
+        ])
+
+        assert [r["status"] for r in results] == ["updated", "updated", "not_found", "error", "error"]
+        updates = [s for s in statements if s.startswith("UPDATE products")]
+        assert len(updates) <= 2
+        assert db_session.get(Product, "p00").price == 99.0
+        assert db_session.get(Product, "p01").name == "Renamed"
+        assert db_session.get(Product, "p02").name == "Product 02"
+
+    def test_batch_update_invalidates_cache(self, products):
+        assert products.get_product_by_id("p05").price == 0.0
+        products.batch_update_products([{"id": "p05", "price": 7.0}])
+        assert products.get_product_by_id("p05").price == 7.0
+
+    def test_batch_update_of_many_rows_uses_few_statements(self, products, statements):
+        products.batch_update_products([{"id": f"p{i:02d}", "price": 5.0} for i in range(25)])
+        assert len(statements) <= 4
+
+    def test_batch_delete_removes_children(self, products, db_session):
+        results = products.batch_delete_products(["p00", "p01", "nope"])
+
+        assert [r["status"] for r in results] == ["deleted", "deleted", "not_found"]
+        assert db_session.query(Product).count() == 23
+        assert db_session.query(ProductImages).filter(ProductImages.product_id.in_(["p00", "p01"])).count() == 0
+
+
+class TestProductUnitOfWork:
+
+    @pytest.fixture
+    def catalog(self, db_session):
+        db_session.add_all([Category(id="c1", name="Todos"), SizesLookup(id=1, size="xs"), SizesLookup(id=2, size="s"), SizesLookup(id=3, size="m")])
+        db_session.commit()
+        return ProductModel(db_session)
+
+    @pytest.fixture
+    def commits(self, db_session):
+        from sqlalchemy import event
+        count = []
+        def after_commit(session):
+            count.append(session)
+        event.listen(db_session, "after_commit", after_commit)
+        yield count
+        event.remove(db_session, "after_commit", after_commit)
+
+    def create(self, catalog):
+        return catalog.save_new_product(ProductReq(
+            name="Shirt", price=10, stock=3, description="d", category_name="Todos",
+            images=["http://img/1", "http://img/2"], sizes=["XS", "S"],
+        ))
+
+    def test_create_commits_product_images_and_sizes_once(self, catalog, commits):
+        product_id = self.create(catalog)
+
+        product = catalog.get_product_by_id(product_id)
+        assert len(commits) == 1
+        assert sorted(image.url for image in product.images) == ["http://img/1", "http://img/2"]
+        assert sorted(size.size for size in product.sizes) == ["s", "xs"]
+
+    def test_update_diffs_images_and_sizes_in_one_commit(self, catalog, commits, statements):
+        product_id = self.create(catalog)
+        kept, dropped = catalog.get_product_by_id(product_id).images
+        commits.clear()
+
+        updated = catalog.save_product_changes(product_id, ProductUpdateRequest(
+            name="T-Shirt", price=12, stock=3, description="d", category_name="Todos", sizes=["S", "M"],
+            images=[{"id": kept.id, "url": "http://img/1b"}, {"id": "new", "url": "http://img/3"}],
+        ))
+
+        assert len(commits) == 1
+        assert updated.name == "T-Shirt"
+        assert sorted((image.id, image.url) for image in updated.images) == sorted([(kept.id, "http://img/1b"), ("new", "http://img/3")])
+        assert sorted(size.size for size in updated.sizes) == ["m", "s"]
+        assert not [s for s in statements if s.startswith("SELECT") and "product_images.id = ?" in s]
+
+    def test_omitted_fields_are_left_untouched(self, catalog, db_session):
+        db_session.add(Category(id="c2", name="Bebés"))
+        db_session.commit()
+        product_id = catalog.save_new_product(ProductReq(
+            name="Bib", price=1, stock=1, description="d", category_name="Bebés", images=["http://img/1"], sizes=["XS"],
+        ))
+
+        updated = catalog.save_product_changes(product_id, ProductUpdateRequest(price=2, category_name="string"))
+
+        assert updated.price == 2
+        assert updated.category_name == "Bebés"
+        assert [image.url for image in updated.images] == ["http://img/1"]
+        assert [size.size for size in updated.sizes] == ["xs"]
+
+    def test_failed_update_leaves_product_untouched(self, catalog):
+        product_id = self.create(catalog)
+        catalog.save_new_product(ProductReq(name="Pants", price=1, stock=1, brand="b", description="d", category_name="Todos", images=[], sizes=[]))
+
+        with pytest.raises(HTTPException):
+            catalog.save_product_changes(product_id, ProductUpdateRequest(
+                name="Pants", price=1, stock=3, description="d", category_name="Todos", sizes=[], images=[],
+            ))
+
+        product = catalog.get_product_by_id(product_id)
+        assert product.name == "Shirt"
+        assert len(product.images) == 2
+
+    def test_update_unknown_product(self, catalog):
+        with pytest.raises(HTTPException) as exc_info:
+            catalog.save_product_changes("nope", ProductUpdateRequest(name="x"))
+        assert exc_info.value.status_code == 404
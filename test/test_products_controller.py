@@ -0,0 +1,133 @@
+import pytest
+
+from main import app
+from src.components.products.controller import admin_role_required
+from db_config.db_tables import Product, ProductImages, SizesLookup, Category
+
+
+@pytest.fixture
+def client(client, db_session):
+    sizes = [SizesLookup(size=size) for size in ("xs", "s", "m")]
+    db_session.add_all([Category(id="c1", name="Todos"), *sizes])
+    for i in range(50):
+        db_session.add(Product(
+            id=f"p{i:02d}", name=f"Product {i:02d}", price=i, stock=i, brand="Dalana Kids", description="Dalana Kids",
+            category_name="Todos", sizes=sizes[: i % 3 + 1],
+            images=[ProductImages(id=f"i{i:02d}-{n}", url=f"http://img/{i}/{n}") for n in range(2)],
+        ))
+    db_session.commit()
+    db_session.expunge_all()
+    return client
+
+
+class TestProductQueryCount:
+    # One SELECT for the products plus one SELECT ... IN for images and one for sizes
+
+    @pytest.mark.parametrize("url", [
+        "/api/v1/products/?limit=50",
+        "/api/v1/products/categories/Todos?limit=50",
+        "/api/v1/products/name/Product 07",
+        "/api/v1/products/{product_id}?id=p07",
+    ])
+    def test_product_reads_use_fixed_number_of_statements(self, client, statements, url):
+        response = client.get(url)
+
+        assert response.status_code == 200
+        assert len(statements) == 3
+
+    def test_listing_serializes_relationships(self, client):
+        response = client.get("/api/v1/products/?limit=50")
+
+        products = response.json()
+        assert len(products) == 50
+        assert all(len(product["images"]) == 2 for product in products)
+        assert [len(product["sizes"]) for product in products[:3]] == [1, 2, 3]
+
+
+class TestFilterProducts:
+
+    def test_filter_returns_page_and_disjunctive_facets(self, client):
+        response = client.get("/api/v1/products/filter", params={"min_price": 10, "max_price": 19, "sizes": ["M"], "limit": 5})
+
+        body = response.json()
+        assert response.status_code == 200
+        # prices 10..19 with size "m" (i % 3 == 2): 11, 14, 17
+        assert [item["id"] for item in body["items"]] == ["p11", "p14", "p17"]
+        assert body["next_cursor"] is None
+        assert body["facets"]["sizes"] == {"XS": 10, "S": 7, "M": 3}
+        assert body["facets"]["brands"] == {"Dalana Kids": 3}
+        assert body["facets"]["categories"] == {"Todos": 3}
+        assert body["facets"]["in_stock"] == {"true": 3, "false": 0}
+        # price facet ignores the price filter: every product with size "m"
+        assert body["facets"]["price"] == {"min": 2.0, "max": 47.0}
+
+    def test_filter_uses_fixed_number_of_statements(self, client, statements):
+        response = client.get("/api/v1/products/filter", params={"brands": ["Dalana Kids"], "in_stock": True})
+
+        assert response.status_code == 200
+        # page + images + sizes + one aggregate per facet
+        assert len(statements) == 8
+
+
+class TestImportProducts:
+
+    def test_upload_csv_reports_per_row_results(self, client):
+        app.dependency_overrides[admin_role_required] = lambda: None
+        csv_file = "name,price,stock,description,category_name,images,sizes\nNew,1,1,d,Todos,http://img/new,XS|M\nProduct 01,1,1,d,Todos,,\n"
+        try:
+            response = client.post("/api/v1/products/import", files={"file": ("products.csv", csv_file, "text/csv")})
+        finally:
+            app.dependency_overrides.pop(admin_role_required)
+
+        assert response.status_code == 200
+        assert response.json()["imported"] == 1
+        assert response.json()["errors"] == [{"row": 2, "error": 'Product "Product 01" already exists'}]
+        assert sorted(size["size"] for size in client.get("/api/v1/products/name/New").json()["sizes"]) == ["m", "xs"]
+
+
+class TestExportCatalog:
+
+    def test_requires_authentication(self, client):
+        assert client.get("/api/v1/products/export").status_code == 401
+
+    def test_streams_from_the_request_session(self, client):
+        app.dependency_overrides[admin_role_required] = lambda: None
+        try:
+            response = client.get("/api/v1/products/export?format=csv")
+        finally:
+            app.dependency_overrides.pop(admin_role_required)
+
+        assert response.status_code == 200
+        assert response.headers["content-disposition"] == 'attachment; filename="products.csv"'
+        assert len(response.text.splitlines()) == 51
+
+
+class TestBatchEndpoints:
+
+    @pytest.fixture(autouse=True)
+    def as_admin(self):
+        app.dependency_overrides[admin_role_required] = lambda: None
+        yield
+        app.dependency_overrides.pop(admin_role_required)
+
+    def test_batch_reprice_in_one_request(self, client, statements):
+        response = client.patch("/api/v1/products/batch", json=[{"id": f"p{i:02d}", "price": 1.5} for i in range(50)])
+
+        assert response.status_code == 200
+        assert all(result["status"] == "updated" for result in response.json())
+        assert len(statements) <= 4
+        assert client.get("/api/v1/products/{product_id}?id=p10").json()["price"] == 1.5
+
+    def test_batch_delete(self, client):
+        response = client.post("/api/v1/products/batch/delete", json=["p00", "missing"])
+
+        assert [result["status"] for result in response.json()] == ["deleted", "not_found"]
+        assert client.get("/api/v1/products/{product_id}?id=p00").status_code == 404
+
+
+class TestProductStream:
+
+    def test_stream_requires_ids_or_categories(self, client):
+        response = client.get("/api/v1/products/stream")
+
+        assert response.status_code == 400
@@ -0,0 +1,145 @@
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from db_config.db_connection import Base
+from db_config.db_tables import Product, Category, StockReservation
+from src.components.reservations.repository import ReservationRepository, RESERVATION_MAX_ACTIVE
+from src.components.reservations.schemas import ReservationReq, RESERVATION_MAX_QUANTITY, RESERVATION_MAX_TTL_SEC
+from pydantic import ValidationError
+from src.components.reservations.sweeper import expire_reservations
+
+
+@pytest.fixture
+def reservations(db_session):
+    db_session.add_all([Category(id="c1", name="Todos"), Product(id="p1", name="Hot", price=1, stock=5, category_name="Todos")])
+    db_session.commit()
+    return ReservationRepository(db_session)
+
+def stock(db_session):
+    return db_session.query(Product.stock).filter(Product.id == "p1").scalar()
+
+def expire(db_session, reservation_id):
+    db_session.query(StockReservation).filter_by(id=reservation_id).update({"expires_at": datetime.now() - timedelta(seconds=1)})
+    db_session.commit()
+
+
+class TestReservations:
+
+    def test_reserve_takes_stock(self, reservations, db_session):
+        reservation = reservations.reserve("u1", "p1", 3)
+
+        assert reservation.status == "held"
+        assert stock(db_session) == 2
+
+    def test_never_oversells(self, reservations, db_session):
+        reservations.reserve("u1", "p1", 4)
+        with pytest.raises(HTTPException) as exc_info:
+            reservations.reserve("u1", "p1", 2)
+
+        assert exc_info.value.status_code == 409
+        assert stock(db_session) == 1
+
+    def test_unknown_product(self, reservations):
+        with pytest.raises(HTTPException) as exc_info:
+            reservations.reserve("u1", "nope", 1)
+        assert exc_info.value.status_code == 404
+
+    def test_commit_keeps_stock_taken(self, reservations, db_session):
+        reservation = reservations.reserve("u1", "p1", 2)
+
+        assert reservations.commit_reservation(reservation.id).status == "committed"
+        assert stock(db_session) == 3
+        with pytest.raises(HTTPException) as exc_info:
+            reservations.release_reservation(reservation.id)
+        assert exc_info.value.status_code == 409
+        assert stock(db_session) == 3
+
+    def test_release_gives_stock_back_once(self, reservations, db_session):
+        reservation = reservations.reserve("u1", "p1", 2)
+
+        assert reservations.release_reservation(reservation.id).status == "released"
+        with pytest.raises(HTTPException):
+            reservations.release_reservation(reservation.id)
+        assert stock(db_session) == 5
+
+    def test_expired_hold_cannot_be_committed(self, reservations, db_session):
+        reservation = reservations.reserve("u1", "p1", 2)
+        expire(db_session, reservation.id)
+
+        with pytest.raises(HTTPException) as exc_info:
+            reservations.commit_reservation(reservation.id)
+        assert exc_info.value.detail == "Reservation is already expired."
+
+    def test_only_the_owner_can_commit_or_release(self, reservations, db_session):
+        reservation = reservations.reserve("u1", "p1", 2)
+
+        for action in (reservations.commit_reservation, reservations.release_reservation):
+            with pytest.raises(HTTPException) as exc_info:
+                action(reservation.id, "u2")
+            assert exc_info.value.status_code == 403
+        assert reservations.release_reservation(reservation.id, "u1").status == "released"
+        assert stock(db_session) == 5
+
+    def test_admins_can_release_any_hold(self, reservations):
+        reservation = reservations.reserve("u1", "p1", 2)
+
+        assert reservations.release_reservation(reservation.id, None).status == "released"
+
+    def test_active_holds_per_user_are_limited(self, reservations, db_session):
+        db_session.get(Product, "p1").stock = RESERVATION_MAX_ACTIVE + 5
+        db_session.commit()
+        holds = [reservations.reserve("u1", "p1", 1) for _ in range(RESERVATION_MAX_ACTIVE)]
+
+        with pytest.raises(HTTPException) as exc_info:
+            reservations.reserve("u1", "p1", 1)
+        assert exc_info.value.status_code == 429
+        assert stock(db_session) == 5
+        reservations.reserve("u2", "p1", 1)
+        reservations.release_reservation(holds[0].id, "u1")
+        reservations.reserve("u1", "p1", 1)
+
+    @pytest.mark.parametrize("field, value", [("quantity", RESERVATION_MAX_QUANTITY + 1), ("ttl_sec", RESERVATION_MAX_TTL_SEC + 1)])
+    def test_quantity_and_ttl_are_capped(self, field, value):
+        with pytest.raises(ValidationError):
+            ReservationReq(product_id="p1", **{"quantity": 1, field: value})
+
+    def test_sweeper_returns_abandoned_holds(self, reservations, db_session, db_engine):
+        abandoned = [reservations.reserve("u1", "p1", 1) for _ in range(3)]
+        live = reservations.reserve("u1", "p1", 1)
+        for reservation in abandoned:
+            expire(db_session, reservation.id)
+
+        assert expire_reservations(sessionmaker(bind=db_engine)) == 3
+        assert stock(db_session) == 4
+        assert reservations.commit_reservation(live.id).status == "committed"
+
+
+def test_concurrent_reservations_on_hot_product(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'reservations.db'}", connect_args={"check_same_thread": False, "timeout": 30})
+    Base.metadata.create_all(engine)
+    SessionLocal = sessionmaker(bind=engine)
+    with SessionLocal() as db:
+        db.add_all([Category(id="c1", name="Todos"), Product(id="p1", name="Hot", price=1, stock=10, category_name="Todos")])
+        db.commit()
+
+    def reserve(i):
+        with SessionLocal() as db:
+            try:
+                ReservationRepository(db).reserve(f"u{i}", "p1", 1)
+                return True
+            except HTTPException as e:
+                assert e.status_code == 409
+                return False
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(reserve, range(30)))
+
+    with SessionLocal() as db:
+        assert results.count(True) == 10
+        assert db.query(Product.stock).filter(Product.id == "p1").scalar() == 0
+        assert db.query(StockReservation).count() == 10
+    engine.dispose()
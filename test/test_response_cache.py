@@ -0,0 +1,92 @@
+import pytest
+
+from db_config.db_tables import Product, Category
+from src.utils.etag import resource_versions
+from src.utils.response_cache import response_cache, CachedResponse, cache_tags, accepts_gzip
+
+
+@pytest.fixture
+def client(client, db_session):
+    db_session.add_all([Category(id="c1", name="Todos", color="blue")])
+    for i in range(40):
+        db_session.add(Product(id=f"p{i:02d}", name=f"Product {i:02d}", price=i, stock=i, brand="b", description="Camiseta " * 10, category_name="Todos"))
+    db_session.commit()
+    return client
+
+
+class TestResponseCache:
+
+    def test_hit_skips_routing_and_database(self, client, statements):
+        first = client.get("/api/v1/products/?limit=40")
+        executed = len(statements)
+        second = client.get("/api/v1/products/?limit=40")
+
+        assert "x-cache" not in first.headers
+        assert second.headers["x-cache"] == "HIT"
+        assert second.json() == first.json()
+        assert len(statements) == executed
+
+    def test_serves_precompressed_body(self, client):
+        client.get("/api/v1/products/?limit=40")
+        response = client.get("/api/v1/products/?limit=40", headers={"Accept-Encoding": "gzip"})
+
+        assert response.headers["content-encoding"] == "gzip"
+        assert len(response.json()) == 40
+
+    def test_gzip_refused_with_q_zero_is_not_sent(self, client):
+        client.get("/api/v1/products/?limit=40")
+        response = client.get("/api/v1/products/?limit=40", headers={"Accept-Encoding": "gzip;q=0, identity"})
+
+        assert response.headers["x-cache"] == "HIT"
+        assert "content-encoding" not in response.headers
+
+    def test_misses_and_hits_vary_on_accept_encoding(self, client):
+        miss = client.get("/api/v1/products/?limit=40")
+        hit = client.get("/api/v1/products/?limit=40")
+
+        for response in (miss, hit):
+            assert [value.strip() for value in response.headers["vary"].split(",")].count("Accept-Encoding") == 1
+
+    @pytest.mark.parametrize("header, expected", [
+        ("gzip", True), ("deflate, gzip;q=0.5", True), ("*", True), ("br, *;q=0.1", True),
+        ("gzip;q=0", False), ("GZIP; Q=0.0", False), ("*;q=0", False), ("", False), ("identity", False), ("gzip;q=bad", False),
+    ])
+    def test_accepts_gzip(self, header, expected):
+        assert accepts_gzip(header) is expected
+
+    def test_query_is_part_of_the_key(self, client):
+        client.get("/api/v1/products/?limit=5")
+        response = client.get("/api/v1/products/?limit=6")
+
+        assert "x-cache" not in response.headers
+        assert len(response.json()) == 6
+
+    def test_hit_answers_conditional_requests(self, client):
+        etag = client.get("/api/v1/categories/").headers["etag"]
+        response = client.get("/api/v1/categories/", headers={"If-None-Match": etag})
+
+        assert response.status_code == 304
+
+    def test_writes_invalidate_by_tag(self, client, statements):
+        client.get("/api/v1/products/?limit=40")
+        client.get("/api/v1/categories/")
+
+        resource_versions.update({"products": (resource_versions.get("products")[0] + 1, 1)})
+
+        assert "x-cache" not in client.get("/api/v1/products/?limit=40").headers
+        assert client.get("/api/v1/categories/").headers["x-cache"] == "HIT"
+
+    def test_only_listings_are_cached(self, client):
+        client.get("/api/v1/products/name/Product 01")
+        assert "x-cache" not in client.get("/api/v1/products/name/Product 01").headers
+
+    def test_response_rendered_during_a_write_is_not_stored(self):
+        generation = response_cache.generation
+        resource_versions.update({"carousel": (resource_versions.get("carousel")[0] + 1, 1)})
+        response_cache.set("key", CachedResponse(200, [], b"[]", frozenset({"carousel"})), generation)
+
+        assert len(response_cache.entries) == 0
+
+    def test_tags(self):
+        assert cache_tags("/api/v1/products/categories/Beb%C3%A9s") == {"products"}
+        assert cache_tags("/api/v1/products/p01") is None
@@ -0,0 +1,57 @@
+import pytest
+from fastapi import HTTPException
+
+from db_config.db_tables import User
+from db_config.enums import UserRole
+from src.components.users.repository import UserRepository
+from src.utils.jwt_handler import TokenHandler
+from src.utils.roles import roles_required
+
+ADMIN, USER = UserRole.admin, UserRole.user
+
+
+@pytest.fixture
+def admin(db_session):
+    db_session.add(User(user_id="u1", name="Admin", email="admin@example.com", password_hash="x", role=ADMIN))
+    db_session.commit()
+    return TokenHandler.create_access_token({"user_id": "u1"})
+
+def denied(token, db_session, roles=(ADMIN,)):
+    with pytest.raises(HTTPException) as error:
+        roles_required(list(roles), token, db=db_session)
+    return error.value.status_code == 403
+
+
+class TestPrincipalCache:
+
+    def test_repeated_checks_skip_the_users_table(self, admin, db_session, statements):
+        for _ in range(5):
+            roles_required([ADMIN], admin, db=db_session)
+
+        assert len([s for s in statements if "FROM users" in s]) == 1
+
+    def test_unknown_users_are_denied_and_cached(self, db_session, statements):
+        token = TokenHandler.create_access_token({"user_id": "ghost"})
+
+        assert denied(token, db_session) and denied(token, db_session)
+        assert len(statements) == 1
+
+    def test_update_user_invalidates_the_principal(self, admin, db_session):
+        roles_required([ADMIN], admin, db=db_session)
+
+        UserRepository(db_session).update_user("u1", {"role": USER})
+
+        assert denied(admin, db_session)
+        roles_required([ADMIN, USER], admin, db=db_session)
+
+    def test_deleted_role_is_inactive(self, admin, db_session):
+        UserRepository(db_session).update_user("u1", {"role": UserRole.deleted})
+
+        assert denied(admin, db_session, roles=(ADMIN, UserRole.deleted))
+
+    def test_delete_user_invalidates_the_principal(self, admin, db_session):
+        roles_required([ADMIN], admin, db=db_session)
+
+        UserRepository(db_session).delete_user("u1")
+
+        assert denied(admin, db_session)
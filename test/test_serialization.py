@@ -0,0 +1,76 @@
+import orjson
+from fastapi import APIRouter, FastAPI, Response
+from fastapi.testclient import TestClient
+from typing import List, Optional
+
+from db_config.db_tables import Product, ProductImages, SizesLookup
+from src.components.products.schemas import ProductResponse, ProductFilterResponse
+from src.utils.serialization import ORJSONRoute, model_dumper
+
+
+def product(i):
+    return Product(
+        id=f"p{i}", name=f"Product {i}", price=1.5, stock=i, brand="b", description="d", category_name="Todos",
+        images=[ProductImages(id=f"i{i}", url="http://img")], sizes=[SizesLookup(id=1, size="xs")],
+    )
+
+
+class TestModelDumper:
+
+    def test_matches_pydantic_output_for_orm_rows(self):
+        rows = [product(i) for i in range(3)]
+        expected = [ProductResponse.model_validate(row, from_attributes=True).model_dump() for row in rows]
+
+        assert model_dumper(List[ProductResponse])(rows) == expected
+
+    def test_dicts_and_optional_fields(self):
+        content = {"items": [product(1)], "facets": {"brands": {"b": 1}, "categories": {}, "sizes": {}, "in_stock": {}, "price": {"min": 1, "max": None}}, "next_cursor": None}
+
+        dumped = model_dumper(ProductFilterResponse)(content)
+
+        assert dumped["items"][0]["sizes"] == [{"size": "xs", "id": 1}]
+        assert dumped["facets"]["price"] == {"min": 1, "max": None}
+        assert dumped["next_cursor"] is None
+
+
+class TestORJSONRoute:
+
+    def client(self):
+        router = APIRouter(route_class=ORJSONRoute)
+
+        @router.get("/products")
+        async def products(response: Response) -> list[ProductResponse]:
+            response.headers["X-Next-Cursor"] = "abc"
+            return [product(i) for i in range(2)]
+
+        @router.post("/products", status_code=201)
+        def create() -> Optional[ProductResponse]:
+            return product(9)
+
+        @router.get("/raw")
+        async def raw() -> ProductResponse:
+            return Response(status_code=304)
+
+        app = FastAPI()
+        app.include_router(router)
+        return TestClient(app), app
+
+    def test_serializes_with_headers_and_status(self):
+        client, _ = self.client()
+
+        listing = client.get("/products")
+        created = client.post("/products")
+
+        assert listing.headers["X-Next-Cursor"] == "abc"
+        assert orjson.loads(listing.content)[1]["id"] == "p1"
+        assert created.status_code == 201
+        assert created.json()["images"] == [{"id": "i9", "url": "http://img"}]
+
+    def test_responses_pass_through(self):
+        client, _ = self.client()
+        assert client.get("/raw").status_code == 304
+
+    def test_openapi_keeps_response_model(self):
+        _, app = self.client()
+        schema = app.openapi()["paths"]["/products"]["get"]["responses"]["200"]["content"]["application/json"]["schema"]
+        assert schema["items"]["$ref"].endswith("/ProductResponse")
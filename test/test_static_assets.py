@@ -0,0 +1,77 @@
+import gzip
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app, static_assets
+from src.utils.static_assets import StaticAssets, Asset, IMMUTABLE, accepted_encodings
+
+CSS = b"body { color: #00d38d; }\n" * 40
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+@pytest.fixture
+def assets(tmp_path):
+    (tmp_path / "css").mkdir()
+    (tmp_path / "css" / "site.css").write_bytes(CSS)
+    return StaticAssets(tmp_path)
+
+
+class TestStaticAssets:
+
+    def test_fingerprinted_url_is_immutable(self, assets):
+        asset, _ = assets.assets["css/site.css"]
+
+        assert assets.url("css/site.css") == f"/static/css/site.{asset.digest}.css"
+        name = assets.url("css/site.css").removeprefix("/static/")
+        assert assets.assets[name][1] == IMMUTABLE
+
+    def test_variant_follows_accept_encoding(self, assets):
+        asset, _ = assets.assets["css/site.css"]
+
+        compressed = asset.response("gzip, deflate")
+        plain = asset.response("identity")
+
+        assert compressed.headers["content-encoding"] == "gzip"
+        assert gzip.decompress(compressed.body) == CSS
+        assert plain.body == CSS and "content-encoding" not in plain.headers
+        assert compressed.headers["etag"] != plain.headers["etag"]
+        assert compressed.headers["vary"] == "Accept-Encoding"
+
+    def test_incompressible_files_have_no_variant(self):
+        asset = Asset(bytes(range(256)), "image/png")
+
+        assert asset.variants == {}
+        assert "vary" not in asset.response("gzip").headers
+
+    def test_refused_encodings_are_ignored(self):
+        assert accepted_encodings("gzip;q=0, br") == {"br"}
+
+
+class TestStaticRoutes:
+
+    def test_fingerprinted_static_file(self, client):
+        response = client.get(static_assets.url("images/image-1.png"))
+
+        assert response.status_code == 200
+        assert response.headers["cache-control"] == IMMUTABLE
+
+    def test_plain_static_path_revalidates(self, client):
+        first = client.get("/static/images/image-1.png")
+        second = client.get("/static/images/image-1.png", headers={"If-None-Match": first.headers["etag"]})
+
+        assert first.status_code == 200
+        assert second.status_code == 304 and second.content == b""
+
+    def test_unknown_static_file(self, client):
+        assert client.get("/static/images/missing.png").status_code == 404
+
+    def test_docs_page_is_prerendered_and_compressed(self, client):
+        response = client.get("/", headers={"Accept-Encoding": "gzip"})
+
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "gzip"
+        assert static_assets.url("images/image.png") in response.text
+        assert client.get("/", headers={"Accept-Encoding": "gzip", "If-None-Match": response.headers["etag"]}).status_code == 304
@@ -0,0 +1,113 @@
+import pytest
+from datetime import datetime, timedelta
+from fastapi import HTTPException
+from jose import jwt
+from sqlalchemy import select
+from sqlalchemy.orm import sessionmaker
+
+from db_config.db_tables import RevokedToken
+from src.utils.jwt_handler import TokenHandler, JWT_SECRET_KEY
+from src.utils.token_revocation import RevocationList, BloomFilter, revocation_list
+
+FUTURE = datetime.now() + timedelta(hours=1)
+
+
+@pytest.fixture
+def session_factory(db_engine):
+    return sessionmaker(bind=db_engine)
+
+def revoked_rows(db_session):
+    return db_session.scalars(select(RevokedToken.jti)).all()
+
+
+class TestTokenRevocation:
+
+    def test_tokens_carry_jti_and_exp(self):
+        claims = jwt.get_unverified_claims(TokenHandler.create_access_token({"user_id": "u1"}))
+
+        assert claims["jti"] and claims["exp"] > datetime.now().timestamp()
+
+    def test_logout_revokes_the_token(self, client, db_session):
+        token = TokenHandler.create_access_token({"user_id": "u1"})
+
+        response = client.get("/api/v1/auth/logout", headers={"Authorization": f"Bearer {token}"})
+
+        assert response.status_code == 200
+        assert revoked_rows(db_session) == [jwt.get_unverified_claims(token)["jti"]]
+        with pytest.raises(HTTPException) as error:
+            TokenHandler.verify_token(token)
+        assert error.value.status_code == 401
+        assert client.get("/api/v1/auth/logout", headers={"Authorization": f"Bearer {token}"}).status_code == 401
+
+    def test_other_tokens_stay_valid(self, db_session):
+        revoked, valid = (TokenHandler.create_access_token({"user_id": "u1"}) for _ in range(2))
+
+        TokenHandler.revoke_token(revoked, db_session)
+
+        assert TokenHandler.verify_token(valid)["user_id"] == "u1"
+
+    def test_tokens_without_jti_are_accepted(self):
+        legacy = jwt.encode({"user_id": "u1"}, key=JWT_SECRET_KEY)
+
+        assert TokenHandler.verify_token(legacy)["user_id"] == "u1"
+
+    def test_sync_loads_revocations_from_other_processes(self, db_session, session_factory):
+        revocation_list.revoke(db_session, "jti-1", FUTURE)
+        other_process = RevocationList(session_factory)
+
+        assert not other_process.is_revoked("jti-1")
+        assert other_process.sync() == 1
+        assert other_process.is_revoked("jti-1")
+
+    def test_sync_follows_the_table_id_not_the_clock(self, db_session, session_factory):
+        other_process = RevocationList(session_factory)
+        other_process.sync()
+        # Revoked "in the past" by a host whose clock is behind
+        db_session.add(RevokedToken(jti="jti-1", expires_at=FUTURE, revoked_at=datetime.now() - timedelta(hours=1)))
+        db_session.commit()
+
+        assert other_process.sync() == 1
+        assert other_process.is_revoked("jti-1")
+        assert other_process.sync() == 0
+
+    def test_ids_committed_out_of_order_are_picked_up(self, db_session, session_factory):
+        other_process = RevocationList(session_factory)
+        other_process.sync()
+        db_session.add(RevokedToken(id=2, jti="jti-2", expires_at=FUTURE))
+        db_session.commit()
+        assert other_process.sync() == 1
+
+        db_session.add(RevokedToken(id=1, jti="jti-1", expires_at=FUTURE))
+        db_session.commit()
+
+        assert other_process.sync() == 1
+        assert other_process.is_revoked("jti-1")
+
+    def test_prune_drops_expired_revocations(self, db_session, session_factory):
+        revocations = RevocationList(session_factory)
+        revocations.revoke(db_session, "expired", datetime.now() - timedelta(seconds=1))
+        revocations.revoke(db_session, "active", FUTURE)
+
+        assert revocations.prune() == 1
+        assert revoked_rows(db_session) == ["active"]
+        assert revocations.stats()["revoked"] == 1
+
+    def test_bloom_mode_confirms_positives_in_the_table(self, db_session, session_factory):
+        revocations = RevocationList(session_factory, bloom_capacity=1000)
+        revocations.revoke(db_session, "jti-1", FUTURE)
+        revocations._bloom.add("false-positive")
+
+        assert revocations.is_revoked("jti-1")
+        assert not revocations.is_revoked("false-positive")
+        assert not revocations.is_revoked("jti-2")
+
+
+class TestBloomFilter:
+
+    def test_no_false_negatives_and_few_false_positives(self):
+        bloom = BloomFilter(10000, error_rate=0.01)
+        for i in range(10000):
+            bloom.add(f"revoked-{i}")
+
+        assert all(f"revoked-{i}" in bloom for i in range(10000))
+        assert sum(f"other-{i}" in bloom for i in range(10000)) < 300
@@ -1,4 +1,5 @@
 from fastapi import HTTPException
+import asyncio
 import pytest
 from fastapi.security import  OAuth2PasswordRequestForm
 from datetime import datetime, timedelta
@@ -19,7 +20,7 @@ from src.utils.password_hash import get_password_hash
 fake = faker.Faker() 
 @pytest.fixture
 def user_service_instance():
-    return UserService(UserRepository, EmailHandler, TokenHandler, UserRole)
+    return UserService(None, UserRepository, EmailHandler, TokenHandler, UserRole)
 @pytest.fixture
 def mock_OAuth2PasswordRequestForm():
     return OAuth2PasswordRequestForm(username="test@example.com",
@@ -35,7 +36,7 @@ def fake_user():
     role= UserRole.user, 
     confirmation_code= fake.random_int(min=1000, max=9999),
     attempts_to_change_password= 0,
-    active= False
+    # User has no `active` column (User(active=...) raises TypeError); an inactive account is one with role UserRole.deleted
     )
 
 @pytest.fixture
@@ -330,11 +331,11 @@ class TestUserService:
     def test_update_user(self, user_service_instance, fake_user, fake_user_updates, mocker):
         # Mocks
         mocker.patch.object(user_service_instance.user_repository, 'get_user_by_id', return_value=fake_user)
-        mocker.patch('src.components.users.service.verify_password', return_value=True)
-        mocker.patch('src.components.users.service.get_password_hash', return_value="fake_hashed_password")
+        mocker.patch('src.components.users.service.verify_password_async', return_value=True)
+        mocker.patch('src.components.users.service.get_password_hash_async', return_value="fake_hashed_password")
         mock_update_user = mocker.patch.object(user_service_instance.user_repository, 'update_user', return_value=fake_user)
         # Acts & Assertions
-        result = user_service_instance.update_user(fake_user.user_id, fake_user_updates)
+        result = asyncio.run(user_service_instance.update_user(fake_user.user_id, fake_user_updates))
         
         updated_user_data = {
             "name": fake_user_updates.name,
@@ -348,10 +349,10 @@ class TestUserService:
         # Mocks
         mocker.patch.object(user_service_instance.user_repository, 'get_user_by_id', return_value=None)
 
-        mock_verify_apssword = mocker.patch('src.components.users.service.verify_password')
+        mock_verify_apssword = mocker.patch('src.components.users.service.verify_password_async')
         # Failure
         with pytest.raises(HTTPException) as exc_info:
-            user_service_instance.update_user("non_existing_user_id", fake_user_updates)
+            asyncio.run(user_service_instance.update_user("non_existing_user_id", fake_user_updates))
         # Assertions
         assert mock_verify_apssword.call_count == 0
         assert exc_info.value.status_code == 404
@@ -360,11 +361,11 @@ class TestUserService:
     def test_update_user_verify_password_exception(self, user_service_instance, fake_user, fake_user_updates, mocker):
         # Mocks
         mocker.patch.object(user_service_instance.user_repository, 'get_user_by_id', return_value=fake_user)
-        mocker.patch('src.components.users.service.verify_password', return_value=False)
+        mocker.patch('src.components.users.service.verify_password_async', return_value=False)
         mock_update_user = mocker.patch.object(user_service_instance.user_repository, 'update_user', return_value=fake_user)
         # Failure 
         with pytest.raises(HTTPException) as exc_info:
-            user_service_instance.update_user(fake_user.user_id, fake_user_updates)
+            asyncio.run(user_service_instance.update_user(fake_user.user_id, fake_user_updates))
         # Assertions
         assert mock_update_user.call_count == 0
         assert exc_info.value.status_code == 400
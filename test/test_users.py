@@ -0,0 +1,72 @@
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.orm import sessionmaker
+
+from db_config.db_tables import User
+from db_config.enums import UserRole
+from src.components.users.repository import UserRepository
+from src.utils.jwt_handler import TokenHandler
+from src.utils.password_hash import get_password_hash, verify_password
+
+
+@pytest.fixture
+def users(db_session):
+    db_session.add_all([
+        User(user_id="u1", name="Ana", email="ana@example.com", password_hash="x", role=UserRole.admin),
+        User(user_id="u2", name="Bea", email="bea@example.com", password_hash="x", role=UserRole.user),
+    ])
+    db_session.commit()
+    return UserRepository(db_session)
+
+
+class TestUserRepository:
+
+    def test_delete_user_is_committed(self, users, db_engine):
+        users.delete_user("u2")
+        users.db.close()
+
+        with sessionmaker(bind=db_engine)() as other_session:
+            assert other_session.get(User, "u2") is None
+            assert other_session.get(User, "u1") is not None
+
+    def test_delete_unknown_user(self, users):
+        with pytest.raises(HTTPException) as error:
+            users.delete_user("ghost")
+
+        assert error.value.status_code == 404
+
+
+@pytest.fixture
+def tokens(users, db_session):
+    db_session.get(User, "u2").password_hash = get_password_hash("secret123")
+    db_session.commit()
+    return {user_id: {"Authorization": f"Bearer {TokenHandler.create_access_token({'user_id': user_id})}"} for user_id in ("u1", "u2")}
+
+
+class TestUserEndpoints:
+
+    def test_update_applies_to_the_caller(self, client, tokens, db_session):
+        response = client.put("/api/v1/users/{updates}", headers=tokens["u2"], json={"name": "Beatriz", "current_password": "secret123", "new_password": "secret456"})
+
+        db_session.expire_all()
+        assert response.status_code == 200
+        assert db_session.get(User, "u2").name == "Beatriz"
+        assert verify_password("secret456", db_session.get(User, "u2").password_hash)
+
+    def test_users_can_only_delete_themselves(self, client, tokens, db_session):
+        response = client.delete("/api/v1/users/u1", headers=tokens["u2"])
+
+        db_session.expire_all()
+        assert response.status_code == 200
+        assert db_session.get(User, "u2") is None
+        assert db_session.get(User, "u1") is not None
+
+    def test_admins_delete_other_users(self, client, tokens, db_session):
+        response = client.delete("/api/v1/users/u2", headers=tokens["u1"])
+
+        db_session.expire_all()
+        assert response.status_code == 200
+        assert db_session.get(User, "u2") is None
+
+    def test_delete_requires_a_token(self, client, users):
+        assert client.delete("/api/v1/users/u2").status_code == 401